@@ -121,3 +121,35 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
+
+
+# Local caches
+
+VAR_DIR = BASE_DIR / 'var'
+
+# Columnar (NumPy) snapshots of MarketTick used by backtests
+MARKET_COLUMNS_CACHE_DIR = VAR_DIR / 'columns'
+MARKET_COLUMNS_CACHE_MAX_BYTES = int(os.getenv('MARKET_COLUMNS_CACHE_MAX_MB', '1024')) * 1024 * 1024
+
+# Rendered wallet analysis charts (content-addressed PNGs, LRU-bounded)
+CHART_CACHE_DIR = VAR_DIR / 'charts'
+CHART_CACHE_MAX_BYTES = int(os.getenv('CHART_CACHE_MAX_MB', '512')) * 1024 * 1024
+# Chart render worker processes; 0 renders inline in the request
+CHART_RENDER_WORKERS = int(os.getenv('CHART_RENDER_WORKERS', '2'))
+# Batch wallet analysis: wallets fetched/analyzed at once, and wallets per batch
+WALLET_BATCH_WORKERS = int(os.getenv('WALLET_BATCH_WORKERS', '8'))
+WALLET_BATCH_MAX = int(os.getenv('WALLET_BATCH_MAX', '200'))
+# Local stand-in Polymarket API (mock_polymarket / record_fixtures)
+POLYMARKET_MOCK_HOST = os.getenv('POLYMARKET_MOCK_HOST', '127.0.0.1')
+POLYMARKET_MOCK_PORT = int(os.getenv('POLYMARKET_MOCK_PORT', '8766'))
+POLYMARKET_FIXTURES_DIR = Path(os.getenv('POLYMARKET_FIXTURES_DIR', VAR_DIR / 'fixtures'))
+# Market search answers from the local catalog (sync_catalog). With this on, a
+# query with no local hit asks public-search (cached for POLYMARKET_SEARCH_TTL)
+# and stores what it finds; an empty catalog always asks public-search
+POLYMARKET_CATALOG_REMOTE_FALLBACK = os.getenv('POLYMARKET_CATALOG_REMOTE_FALLBACK', '') in ('1', 'true', 'yes')
+
+
+# Live tick feed (market recorder / replay server)
+
+TICK_FEED_HOST = os.getenv('TICK_FEED_HOST', '127.0.0.1')
+TICK_FEED_PORT = int(os.getenv('TICK_FEED_PORT', '8765'))
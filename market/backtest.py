@@ -0,0 +1,391 @@
+"""Tick replay backtesting over stored markets.
+
+Ticks are loaded once into a columnar cache (NumPy arrays, one row per tick,
+markets laid out back to back) and replayed market by market through a
+``Strategy``. Orders fill by walking the 5-level book and open positions
+settle at market resolution (``Market.resolved_side``).
+
+The cache directory keeps one file per market set: a rebuild deletes the
+stale file of the same set, reads bump the file mtime and the least recently
+used files are deleted once it grows past MARKET_COLUMNS_CACHE_MAX_BYTES.
+Files are keyed by tick count, last tick id and labels only, so whatever
+rewrites tick values in place (backfill_features) calls clear_columns_cache.
+"""
+import hashlib
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .models import Market, MarketTick
+from .outcome import has_ended, resolve
+
+
+TICK_COLUMNS = [
+    'timestamp_ms',
+    'seconds_till_end',
+    'oracle_btc_price',
+    'binance_btc_price',
+    'lag',
+    'lat_dir_norm_x1000',
+    'pm_up_imbalance',
+    'pm_down_imbalance',
+    'pm_up_microprice',
+    'pm_down_microprice',
+]
+
+BOOK_COLUMNS = ['up_asks', 'up_bids', 'down_asks', 'down_bids']
+BOOK_DEPTH = 5
+SIDES = ('up', 'down')
+
+
+class TickColumns:
+    """All ticks of a set of markets as flat NumPy arrays."""
+
+    def __init__(self, slugs, offsets, columns, books, sides=None):
+        self.slugs = list(slugs)
+        self.offsets = offsets          # int64, len(slugs) + 1
+        self.columns = columns          # name -> float64 (n,)
+        self.books = books              # name -> float64 (n, BOOK_DEPTH, 2) [price, size]
+        # Market.resolved_side per market, '' when not labelled
+        self.sides = list(sides) if sides is not None else [''] * len(self.slugs)
+
+    def __len__(self):
+        return len(self.slugs)
+
+    @property
+    def tick_count(self):
+        return int(self.offsets[-1])
+
+    def market(self, index):
+        """Column views (no copies) for one market."""
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return (
+            self.slugs[index],
+            {name: col[start:end] for name, col in self.columns.items()},
+            {name: book[start:end] for name, book in self.books.items()},
+        )
+
+    @classmethod
+    def from_db(cls, markets=None):
+        markets = Market.objects.all() if markets is None else markets
+        markets = list(markets.order_by('id').values_list('id', 'slug', 'resolved_side'))
+        market_ids = [m[0] for m in markets]
+
+        rows = (
+            MarketTick.objects
+            .filter(market_id__in=market_ids)
+            .order_by('market_id', 'timestamp_ms')
+            .values_list('market_id', *TICK_COLUMNS, *BOOK_COLUMNS)
+        )
+
+        n = rows.count()
+        columns = {name: np.full(n, np.nan) for name in TICK_COLUMNS}
+        books = {name: np.full((n, BOOK_DEPTH, 2), np.nan) for name in BOOK_COLUMNS}
+        counts = dict.fromkeys(market_ids, 0)
+
+        ncols = len(TICK_COLUMNS)
+        for i, row in enumerate(rows.iterator(chunk_size=5000)):
+            counts[row[0]] += 1
+            for j, name in enumerate(TICK_COLUMNS):
+                value = row[1 + j]
+                if value is not None:
+                    columns[name][i] = value
+            for j, name in enumerate(BOOK_COLUMNS):
+                levels = row[1 + ncols + j] or []
+                book = books[name][i]
+                for k, level in enumerate(levels[:BOOK_DEPTH]):
+                    book[k, 0] = level['price']
+                    book[k, 1] = level['size']
+
+        offsets = np.zeros(len(markets) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([counts[m] for m in market_ids])
+        return cls([m[1] for m in markets], offsets, columns, books, [m[2] for m in markets])
+
+    def save(self, path):
+        arrays = {f'col_{k}': v for k, v in self.columns.items()}
+        arrays.update({f'book_{k}': v for k, v in self.books.items()})
+        tmp = f'{path}.tmp.npz'
+        np.savez(tmp, slugs=np.array(self.slugs), sides=np.array(self.sides, dtype=str),
+                 offsets=self.offsets, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            columns = {k[4:]: data[k] for k in data.files if k.startswith('col_')}
+            books = {k[5:]: data[k] for k in data.files if k.startswith('book_')}
+            return cls(data['slugs'].tolist(), data['offsets'], columns, books, data['sides'].tolist())
+
+    @classmethod
+    def cached(cls, markets=None, cache_dir=None, max_bytes=None):
+        """Load from the on-disk cache, rebuilding it when the ticks or labels changed."""
+        markets = Market.objects.all() if markets is None else markets
+        stats = markets.aggregate(n=Count('ticks'), last=Max('ticks__id'))
+        rows = list(markets.order_by('id').values_list('id', 'resolved_side'))
+        # ticks-<market set>-<tick count, last tick id and labels>.npz
+        set_key = hashlib.sha1(str([r[0] for r in rows]).encode()).hexdigest()[:16]
+        state_key = hashlib.sha1(
+            f"{stats['n']}|{stats['last']}|{[r[1] for r in rows]}".encode()
+        ).hexdigest()[:16]
+
+        cache_dir = Path(cache_dir or settings.MARKET_COLUMNS_CACHE_DIR)
+        path = cache_dir / f'ticks-{set_key}-{state_key}.npz'
+        try:
+            os.utime(path)
+            return cls.load(path)
+        except FileNotFoundError:
+            pass
+
+        columns = cls.from_db(markets)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        columns.save(path)
+        # older versions of the same market set are stale
+        for stale in cache_dir.glob(f'ticks-{set_key}-*.npz'):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+        if max_bytes is None:
+            max_bytes = settings.MARKET_COLUMNS_CACHE_MAX_BYTES
+        evict_columns(cache_dir, max_bytes, keep=path)
+        return columns
+
+
+def clear_columns_cache(cache_dir=None):
+    """Delete every cached column file; returns how many."""
+    cache_dir = Path(cache_dir or settings.MARKET_COLUMNS_CACHE_DIR)
+    removed = 0
+    for path in cache_dir.glob('ticks-*.npz'):
+        path.unlink(missing_ok=True)
+        removed += 1
+    return removed
+
+
+def evict_columns(cache_dir, max_bytes, keep=None):
+    """Delete least recently used cache files until the directory fits in max_bytes."""
+    files = []
+    for path in Path(cache_dir).glob('ticks-*.npz'):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    total = sum(f[1] for f in files)
+    removed = 0
+    for _, size, path in sorted(files, key=lambda f: f[0]):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        path.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+    return removed
+
+
+def walk_book(book, shares):
+    """Fill `shares` against one book snapshot. Returns (filled, cost)."""
+    filled = cost = 0.0
+    for price, size in book:
+        if np.isnan(price) or np.isnan(size) or size <= 0:
+            continue
+        take = min(size, shares - filled)
+        filled += take
+        cost += take * price
+        if filled >= shares:
+            break
+    return filled, cost
+
+
+class MarketReplay:
+    """State of one market while a strategy is replayed over it."""
+
+    def __init__(self, slug, columns, books, fee_rate=0.0, resolved_side=''):
+        self.slug = slug
+        self.resolved_side = resolved_side
+        self.columns = columns
+        self.books = books
+        self.fee_rate = fee_rate
+        self.i = 0
+        self.cash = 0.0
+        self.position = {'up': 0.0, 'down': 0.0}
+        self.fills = []
+
+    def __len__(self):
+        return len(self.columns['timestamp_ms'])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def value(self, name):
+        """Current tick value of a column, None when missing."""
+        value = self.columns[name][self.i]
+        return None if np.isnan(value) else float(value)
+
+    def buy(self, side, shares):
+        return self._execute(side, shares, 'Buy')
+
+    def sell(self, side, shares=None):
+        held = self.position[side]
+        shares = held if shares is None else min(shares, held)
+        return self._execute(side, shares, 'Sell') if shares > 0 else 0.0
+
+    def close(self):
+        for side in SIDES:
+            self.sell(side)
+
+    def _execute(self, side, shares, kind):
+        book = self.books[f'{side}_asks' if kind == 'Buy' else f'{side}_bids'][self.i]
+        filled, cost = walk_book(book, shares)
+        if filled <= 0:
+            return 0.0
+        fee = cost * self.fee_rate
+        if kind == 'Buy':
+            self.cash -= cost + fee
+            self.position[side] += filled
+        else:
+            self.cash += cost - fee
+            self.position[side] -= filled
+        self.fills.append((self.i, kind, side, filled, cost / filled))
+        return filled
+
+    def settle(self):
+        resolved = self.resolved_side
+        if not resolved:
+            # Not labelled yet: same rule as outcome.label_market
+            oracle = self.columns['oracle_btc_price']
+            oracle = oracle[~np.isnan(oracle)]
+            seconds = self.columns['seconds_till_end']
+            if len(oracle) and has_ended(seconds[-1] if len(seconds) else None):
+                resolved = resolve(oracle[0], oracle[-1])
+        if resolved:
+            value = self.position[resolved]
+        else:
+            # Unresolvable: mark open shares to the last best bid
+            value = 0.0
+            for side in SIDES:
+                bids = self.books[f'{side}_bids']
+                if len(bids) and not np.isnan(bids[-1, 0, 0]):
+                    value += self.position[side] * bids[-1, 0, 0]
+        bought = sum(f[3] * f[4] for f in self.fills if f[1] == 'Buy')
+        return {
+            'slug': self.slug,
+            'resolved_side': resolved or None,
+            'fills': len(self.fills),
+            'volume': bought + sum(f[3] * f[4] for f in self.fills if f[1] == 'Sell'),
+            'cost': bought,
+            'final_up': self.position['up'],
+            'final_down': self.position['down'],
+            'pnl': self.cash + value,
+        }
+
+
+class Strategy:
+    """Base class for replayed strategies.
+
+    ``candidates`` may return the tick indices worth visiting (vectorized
+    pre-filter); ``on_tick`` is then called only for those, in order.
+    """
+
+    def candidates(self, market):
+        return None
+
+    def on_market_start(self, market):
+        pass
+
+    def on_tick(self, market, i):
+        pass
+
+    def on_market_end(self, market):
+        pass
+
+
+class ThresholdStrategy(Strategy):
+    """Enter once when `field` crosses ±threshold inside a seconds_till_end window.
+
+    A positive signal buys Up, a negative one buys Down; the position is held
+    to resolution unless `exit_threshold` is set, in which case it is sold
+    when the signal falls back inside ±exit_threshold.
+    """
+
+    def __init__(self, field='lag', threshold=1.0, size=100.0,
+                 min_seconds=0, max_seconds=900, exit_threshold=None):
+        self.field = field
+        self.threshold = threshold
+        self.size = size
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.exit_threshold = exit_threshold
+
+    def candidates(self, market):
+        signal = market[self.field]
+        seconds = market['seconds_till_end']
+        in_window = (seconds >= self.min_seconds) & (seconds <= self.max_seconds)
+        mask = in_window & (np.abs(signal) >= self.threshold)
+        if self.exit_threshold is not None:
+            mask |= np.abs(signal) <= self.exit_threshold
+        return np.flatnonzero(mask)
+
+    def on_market_start(self, market):
+        self.entered = None
+
+    def on_tick(self, market, i):
+        signal = market.value(self.field)
+        if signal is None:
+            return
+        if self.entered is None:
+            seconds = market['seconds_till_end'][i]
+            if abs(signal) >= self.threshold and self.min_seconds <= seconds <= self.max_seconds:
+                side = 'up' if signal > 0 else 'down'
+                if market.buy(side, self.size):
+                    self.entered = side
+        elif self.entered and self.exit_threshold is not None and abs(signal) <= self.exit_threshold:
+            market.sell(self.entered)
+            self.entered = False  # stay flat for the rest of the market
+
+
+class BacktestResult:
+    def __init__(self, markets, elapsed, tick_count):
+        self.markets = markets
+        self.elapsed = elapsed
+        self.tick_count = tick_count
+
+    @property
+    def summary(self):
+        traded = [m for m in self.markets if m['fills']]
+        pnl = sum(m['pnl'] for m in self.markets)
+        cost = sum(m['cost'] for m in self.markets)
+        wins = sum(1 for m in traded if m['pnl'] > 0)
+        return {
+            'markets': len(self.markets),
+            'traded': len(traded),
+            'wins': wins,
+            'win_rate': wins / len(traded) * 100 if traded else 0.0,
+            'pnl': pnl,
+            'cost': cost,
+            'roi': pnl / cost * 100 if cost > 0 else 0.0,
+            'elapsed': self.elapsed,
+            'ticks_per_sec': self.tick_count / self.elapsed if self.elapsed > 0 else 0.0,
+        }
+
+
+def run_backtest(strategy, columns, fee_rate=0.0):
+    """Replay every market of `columns` through `strategy`."""
+    started = time.perf_counter()
+    results = []
+    for index in range(len(columns)):
+        slug, cols, books = columns.market(index)
+        market = MarketReplay(slug, cols, books, fee_rate=fee_rate, resolved_side=columns.sides[index])
+        strategy.on_market_start(market)
+        if len(market):
+            indices = strategy.candidates(market)
+            if indices is None:
+                indices = range(len(market))
+            for i in indices:
+                market.i = int(i)
+                strategy.on_tick(market, market.i)
+        strategy.on_market_end(market)
+        results.append(market.settle())
+    return BacktestResult(results, time.perf_counter() - started, columns.tick_count)
@@ -0,0 +1,317 @@
+"""Rolling-window Binance features (momentum, volume, ATR, VWAP).
+
+Trades (or 1s klines) are folded into 1-second bars; every closed bar is
+pushed into fixed-size windows that keep running sums, so each update costs
+O(1) amortized regardless of window length. The produced keys match
+``MarketTick`` column names.
+"""
+import csv
+import io
+import math
+import os
+import zipfile
+from collections import deque
+
+
+FEATURE_FIELDS = [
+    'binance_ret1s_x100',
+    'binance_ret5s_x100',
+    'binance_volume_1s',
+    'binance_volume_5s',
+    'binance_volma_30s',
+    'binance_volume_spike',
+    'binance_atr_5s',
+    'binance_atr_30s',
+    'binance_rvol_30s',
+    'binance_vwap_30s',
+    'binance_p_vwap_5s',
+    'binance_p_vwap_30s',
+]
+
+# Gaps longer than the widest window leave every window empty anyway
+MAX_GAP_FILL = 30
+# A tick is backfilled only from features at most this old
+MAX_FEATURE_AGE_MS = 2000
+
+
+class RollingSum:
+    """Sum of the last `size` pushed values.
+
+    The running total is recomputed exactly (fsum) every `size` pushes so
+    rounding error cannot build up, and is exactly 0 once the window holds
+    only zeros (quiet seconds).
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque()
+        self.total = 0.0
+        self.nonzero = 0
+        self.pushes = 0
+
+    def push(self, value):
+        self.values.append(value)
+        self.total += value
+        if value:
+            self.nonzero += 1
+        if len(self.values) > self.size:
+            old = self.values.popleft()
+            self.total -= old
+            if old:
+                self.nonzero -= 1
+        self.pushes += 1
+        if not self.nonzero:
+            self.total = 0.0
+        elif self.pushes >= self.size:
+            self.total = math.fsum(self.values)
+            self.pushes = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def mean(self):
+        return self.total / len(self.values) if self.values else None
+
+
+class RollingStd:
+    """Sample standard deviation of the last `size` pushed values."""
+
+    def __init__(self, size):
+        self.sum = RollingSum(size)
+        self.sumsq = RollingSum(size)
+
+    def push(self, value):
+        self.sum.push(value)
+        self.sumsq.push(value * value)
+
+    @property
+    def std(self):
+        n = len(self.sum)
+        if n < 2:
+            return None
+        var = (self.sumsq.total - self.sum.total * self.sum.total / n) / (n - 1)
+        return math.sqrt(var) if var > 0 else 0.0
+
+
+class BinanceFeatureEngine:
+    """Streaming calculator for the Binance feature columns of MarketTick."""
+
+    def __init__(self):
+        self.closes = deque(maxlen=6)
+        self.quote_1s = None
+        self.quote_5s = RollingSum(5)
+        self.quote_30s = RollingSum(30)
+        self.base_5s = RollingSum(5)
+        self.base_30s = RollingSum(30)
+        self.tr_5s = RollingSum(5)
+        self.tr_30s = RollingSum(30)
+        self.log_ret_30s = RollingStd(30)
+
+        self.bar = None
+        self.bar_second = None
+        self.snapshot = None
+        self.snapshot_ms = None
+
+    def update(self, timestamp_ms, price, qty):
+        """Add one trade. Returns True when it closed at least one bar."""
+        second = int(timestamp_ms) // 1000
+        closed = False
+        if self.bar_second is not None and second > self.bar_second:
+            self._close_until(second)
+            closed = True
+
+        if self.bar is None:
+            self.bar = [price, price, price, price, 0.0, 0.0]
+            self.bar_second = second
+        else:
+            bar = self.bar
+            if price > bar[1]:
+                bar[1] = price
+            if price < bar[2]:
+                bar[2] = price
+            bar[3] = price
+        self.bar[4] += price * qty
+        self.bar[5] += qty
+        return closed
+
+    def add_bar(self, open_time_ms, open_, high, low, close, quote_volume, base_volume):
+        """Add a closed 1-second kline."""
+        second = int(open_time_ms) // 1000
+        if self.bar is not None:
+            self._close_until(second)
+        elif self.bar_second is not None and second > self.bar_second + 1:
+            self._fill_gap(self.bar_second + 1, second)
+        self._push_bar(second, open_, high, low, close, quote_volume, base_volume)
+
+    def flush(self):
+        """Close the bar in progress (end of a batch)."""
+        if self.bar is not None:
+            self._close_until(self.bar_second + 1)
+
+    def features(self):
+        """Latest feature dict, or None before the first closed bar."""
+        return self.snapshot
+
+    def _close_until(self, second):
+        bar = self.bar
+        self.bar = None
+        self._push_bar(self.bar_second, *bar[:4], bar[4], bar[5])
+        self._fill_gap(self.bar_second + 1, second)
+
+    def _fill_gap(self, start, end):
+        if end - start > MAX_GAP_FILL:
+            start = end - MAX_GAP_FILL
+        close = self.closes[-1] if self.closes else None
+        for second in range(start, end):
+            self._push_bar(second, close, close, close, close, 0.0, 0.0)
+
+    def _push_bar(self, second, open_, high, low, close, quote_volume, base_volume):
+        prev_close = self.closes[-1] if self.closes else None
+        if prev_close is None:
+            true_range = high - low
+        else:
+            true_range = max(high, prev_close) - min(low, prev_close)
+            if close > 0 and prev_close > 0:
+                self.log_ret_30s.push(math.log(close / prev_close))
+
+        self.closes.append(close)
+        self.quote_1s = quote_volume
+        self.quote_5s.push(quote_volume)
+        self.quote_30s.push(quote_volume)
+        self.base_5s.push(base_volume)
+        self.base_30s.push(base_volume)
+        self.tr_5s.push(true_range)
+        self.tr_30s.push(true_range)
+
+        self.bar_second = second
+        self.snapshot_ms = (second + 1) * 1000
+        self.snapshot = self._compute()
+
+    def _compute(self):
+        closes = self.closes
+        close = closes[-1]
+
+        ret1s = ret5s = None
+        if len(closes) >= 2 and closes[-2]:
+            ret1s = (close / closes[-2] - 1.0) * 10000.0
+        if len(closes) >= 6 and closes[0]:
+            ret5s = (close / closes[0] - 1.0) * 10000.0
+
+        volma_30s = self.quote_30s.mean
+        spike = self.quote_1s / volma_30s if volma_30s else None
+
+        vwap_5s = self.quote_5s.total / self.base_5s.total if self.base_5s.total > 0 else None
+        vwap_30s = self.quote_30s.total / self.base_30s.total if self.base_30s.total > 0 else None
+
+        rvol = self.log_ret_30s.std
+
+        return {
+            'binance_ret1s_x100': ret1s,
+            'binance_ret5s_x100': ret5s,
+            'binance_volume_1s': self.quote_1s,
+            'binance_volume_5s': self.quote_5s.total,
+            'binance_volma_30s': volma_30s,
+            'binance_volume_spike': spike,
+            'binance_atr_5s': self.tr_5s.mean,
+            'binance_atr_30s': self.tr_30s.mean,
+            'binance_rvol_30s': rvol * 100.0 if rvol is not None else None,
+            'binance_vwap_30s': vwap_30s,
+            'binance_p_vwap_5s': (close / vwap_5s - 1.0) * 100.0 if vwap_5s else None,
+            'binance_p_vwap_30s': (close / vwap_30s - 1.0) * 100.0 if vwap_30s else None,
+        }
+
+
+# BATCH MODE
+
+def iter_features(path):
+    """Yield (timestamp_ms, features) for every closed second in a Binance dump."""
+    engine = BinanceFeatureEngine()
+    kind, rows = read_binance_file(path)
+
+    if kind == 'klines':
+        for open_time, open_, high, low, close, base_volume, quote_volume in rows:
+            engine.add_bar(open_time, open_, high, low, close, quote_volume, base_volume)
+            yield engine.snapshot_ms, engine.snapshot
+        return
+
+    last_ms = None
+    for timestamp_ms, price, qty in rows:
+        if engine.update(timestamp_ms, price, qty) and engine.snapshot_ms != last_ms:
+            last_ms = engine.snapshot_ms
+            yield last_ms, engine.snapshot
+    engine.flush()
+    if engine.snapshot is not None and engine.snapshot_ms != last_ms:
+        yield engine.snapshot_ms, engine.snapshot
+
+
+def read_binance_file(path):
+    """Open an aggTrades/trades/1s-klines CSV (optionally zipped). Returns (kind, rows)."""
+    name = os.path.basename(str(path)).lower()
+    kind = 'klines' if '-1s-' in name or 'kline' in name else 'trades'
+    return kind, _iter_rows(path, kind)
+
+
+def _iter_rows(path, kind):
+    for line in _iter_lines(path):
+        row = line.split(',')
+        if not row or not row[0].strip().isdigit():
+            continue  # header or blank line
+        if kind == 'klines':
+            yield (
+                _to_ms(int(row[0])), float(row[1]), float(row[2]),
+                float(row[3]), float(row[4]), float(row[5]), float(row[7]),
+            )
+        elif len(row) >= 7:
+            # aggTrades: id, price, qty, first_id, last_id, time, is_buyer_maker[, best_match]
+            yield _to_ms(int(row[5])), float(row[1]), float(row[2])
+        else:
+            # trades: id, price, qty, quote_qty, time, is_buyer_maker
+            yield _to_ms(int(row[4])), float(row[1]), float(row[2])
+
+
+def _iter_lines(path):
+    path = str(path)
+    if path.lower().endswith('.zip'):
+        with zipfile.ZipFile(path) as archive:
+            member = next(n for n in archive.namelist() if n.lower().endswith('.csv'))
+            with archive.open(member) as raw:
+                yield from io.TextIOWrapper(raw, encoding='utf-8')
+    else:
+        with open(path, newline='', encoding='utf-8') as f:
+            yield from f
+
+
+def _to_ms(timestamp):
+    # Spot dumps switched to microseconds in 2025
+    return timestamp // 1000 if timestamp > 10**14 else timestamp
+
+
+def features_asof(features, timestamps_ms, max_age_ms=MAX_FEATURE_AGE_MS):
+    """Match each timestamp with the latest (ts, features) pair known at that time.
+
+    Both inputs must be sorted ascending. Yields (timestamp_ms, features or None);
+    None also when the latest features are older than `max_age_ms` (past the end
+    of the dump, or a hole in it).
+    """
+    current = current_ts = None
+    pending = next(features, None)
+    for ts in timestamps_ms:
+        while pending is not None and pending[0] <= ts:
+            current_ts, current = pending
+            pending = next(features, None)
+        if current is not None and ts - current_ts > max_age_ms:
+            yield ts, None
+        else:
+            yield ts, current
+
+
+def write_features_csv(path, out):
+    """Dump features of a Binance file as CSV (timestamp_ms + FEATURE_FIELDS)."""
+    writer = csv.writer(out)
+    writer.writerow(['timestamp_ms'] + FEATURE_FIELDS)
+    count = 0
+    for timestamp_ms, values in iter_features(path):
+        writer.writerow([timestamp_ms] + ['' if values[f] is None else values[f] for f in FEATURE_FIELDS])
+        count += 1
+    return count
@@ -0,0 +1,173 @@
+"""Chainlink oracle vs Binance lead/lag analysis.
+
+Both price series are forward-filled onto a uniform time grid, turned into
+returns and cross-correlated through an FFT. A positive best-fit delay
+means the oracle follows Binance by that many milliseconds.
+"""
+import numpy as np
+from django.db.models import Count
+
+from .models import LagAnalysis, Market
+
+
+LAG_STEP_MS = 250
+LAG_MAX_MS = 30_000
+
+
+def resample(timestamps_ms, values, start_ms, step_ms, length):
+    """Forward-fill a sparse series onto `length` grid points from `start_ms`."""
+    mask = ~np.isnan(values)
+    ts = timestamps_ms[mask]
+    vals = values[mask]
+    grid = start_ms + np.arange(length) * step_ms
+    idx = np.searchsorted(ts, grid, side='right') - 1
+    out = np.full(length, np.nan)
+    ok = idx >= 0
+    out[ok] = vals[idx[ok]]
+    return out
+
+
+def cross_correlation(a, b, max_shift):
+    """Normalized cross-correlation corr(a[t], b[t + k]) for k in [-max_shift, max_shift]."""
+    a = a - a.mean()
+    b = b - b.mean()
+    denom = np.sqrt(np.dot(a, a) * np.dot(b, b))
+    shifts = np.arange(-max_shift, max_shift + 1)
+    if denom == 0:
+        return shifts, np.zeros(len(shifts))
+
+    n = len(a)
+    nfft = 1 << (2 * n - 1).bit_length()
+    cc = np.fft.irfft(np.conj(np.fft.rfft(a, nfft)) * np.fft.rfft(b, nfft), nfft)
+    # cc[k] holds shift k, cc[nfft - k] holds shift -k
+    corr = np.concatenate((cc[nfft - max_shift:], cc[:max_shift + 1])) / denom
+    return shifts, corr
+
+
+def analyze_series(timestamps_ms, oracle, binance, lag=None,
+                   step_ms=LAG_STEP_MS, max_lag_ms=LAG_MAX_MS):
+    """Cross-correlate oracle and Binance returns. Returns None without enough overlap."""
+    timestamps_ms = np.asarray(timestamps_ms, dtype=np.float64)
+    oracle = np.asarray(oracle, dtype=np.float64)
+    binance = np.asarray(binance, dtype=np.float64)
+
+    both = ~np.isnan(oracle) & ~np.isnan(binance)
+    if both.sum() < 2:
+        return None
+
+    start = max(timestamps_ms[~np.isnan(oracle)][0], timestamps_ms[~np.isnan(binance)][0])
+    end = timestamps_ms[-1]
+    length = int((end - start) // step_ms) + 1
+    max_shift = min(max_lag_ms // step_ms, length - 1)
+    if length < 3 or max_shift < 1:
+        return None
+
+    oracle_grid = resample(timestamps_ms, oracle, start, step_ms, length)
+    binance_grid = resample(timestamps_ms, binance, start, step_ms, length)
+    oracle_ret = np.diff(np.log(oracle_grid))
+    binance_ret = np.diff(np.log(binance_grid))
+
+    shifts, corr = cross_correlation(binance_ret, oracle_ret, int(max_shift))
+    best = int(np.argmax(corr))
+
+    result = {
+        'step_ms': step_ms,
+        'max_lag_ms': int(max_shift * step_ms),
+        'best_delay_ms': float(shifts[best] * step_ms),
+        'peak_corr': float(corr[best]),
+        'curve': [round(float(c), 5) for c in corr],
+        'lag_mean': None,
+        'lag_abs_p95': None,
+    }
+
+    if lag is not None:
+        lag = np.asarray(lag, dtype=np.float64)
+        lag = lag[~np.isnan(lag)]
+        if len(lag):
+            result['lag_mean'] = float(lag.mean())
+            result['lag_abs_p95'] = float(np.percentile(np.abs(lag), 95))
+    return result
+
+
+def analyze_market(market, step_ms=LAG_STEP_MS, max_lag_ms=LAG_MAX_MS):
+    """Compute and store the LagAnalysis of one market."""
+    rows = list(
+        market.ticks.order_by('timestamp_ms')
+        .values_list('timestamp_ms', 'oracle_btc_price', 'binance_btc_price', 'lag')
+    )
+    if rows:
+        data = np.array(rows, dtype=np.float64)  # None -> nan
+        result = analyze_series(data[:, 0], data[:, 1], data[:, 2], data[:, 3],
+                                step_ms=step_ms, max_lag_ms=max_lag_ms)
+    else:
+        result = None
+
+    defaults = {
+        'tick_count': len(rows),
+        'step_ms': step_ms,
+        'max_lag_ms': max_lag_ms,
+        'best_delay_ms': None,
+        'peak_corr': None,
+        'curve': [],
+        'lag_mean': None,
+        'lag_abs_p95': None,
+    }
+    if result:
+        defaults.update(result)
+
+    analysis, _ = LagAnalysis.objects.update_or_create(market=market, defaults=defaults)
+    return analysis
+
+
+def refresh_lag_analyses(markets=None, force=False):
+    """Analyze markets that have no analysis yet or gained ticks since the last one."""
+    markets = (Market.objects.all() if markets is None else markets).annotate(n_ticks=Count('ticks'))
+    markets = markets.select_related('lag_analysis')
+
+    updated = 0
+    for market in markets:
+        current = getattr(market, 'lag_analysis', None)
+        if force or current is None or current.tick_count != market.n_ticks:
+            analyze_market(market)
+            updated += 1
+    return updated
+
+
+def aggregate_lag(analyses, bin_ms=1000):
+    """Mean correlation curve and best-delay histogram over many analyses."""
+    analyses = [a for a in analyses if a.curve and a.best_delay_ms is not None]
+    if not analyses:
+        return None
+
+    # Curves can be shorter for short markets; align them on the zero shift
+    width = max(len(a.curve) for a in analyses)
+    half = width // 2
+    total = np.zeros(width)
+    count = np.zeros(width)
+    for a in analyses:
+        curve = np.asarray(a.curve)
+        offset = half - len(curve) // 2
+        total[offset:offset + len(curve)] += curve
+        count[offset:offset + len(curve)] += 1
+
+    mean_curve = np.divide(total, count, out=np.zeros(width), where=count > 0)
+    step_ms = analyses[0].step_ms
+    shifts_ms = (np.arange(width) - half) * step_ms
+    best = int(np.argmax(mean_curve))
+
+    delays = np.array([a.best_delay_ms for a in analyses])
+    max_ms = max(abs(delays).max(), bin_ms)
+    edges = np.arange(-max_ms - bin_ms / 2, max_ms + bin_ms, bin_ms)
+    hist, edges = np.histogram(delays, bins=edges)
+
+    return {
+        'markets': len(analyses),
+        'shifts_ms': shifts_ms.tolist(),
+        'mean_curve': [round(float(c), 5) for c in mean_curve],
+        'best_delay_ms': float(shifts_ms[best]),
+        'peak_corr': float(mean_curve[best]),
+        'median_delay_ms': float(np.median(delays)),
+        'mean_delay_ms': float(delays.mean()),
+        'hist_centers_ms': ((edges[:-1] + edges[1:]) / 2).tolist(),
+        'hist_counts': hist.tolist(),
+    }
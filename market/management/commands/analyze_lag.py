@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from market.lag import aggregate_lag, refresh_lag_analyses
+from market.models import LagAnalysis, Market
+
+
+class Command(BaseCommand):
+    help = 'Cross-correlate oracle and Binance prices for markets without an up-to-date analysis'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--market', action='append', dest='markets', default=[])
+        parser.add_argument('--force', action='store_true', help='Recompute every selected market')
+
+    def handle(self, *args, **options):
+        markets = Market.objects.all()
+        if options['markets']:
+            markets = markets.filter(slug__in=options['markets'])
+
+        updated = refresh_lag_analyses(markets, force=options['force'])
+        self.stdout.write(f'Analyzed {updated} markets')
+
+        analyses = list(LagAnalysis.objects.filter(market__in=markets).select_related('market'))
+        for a in analyses:
+            if a.best_delay_ms is not None:
+                self.stdout.write(f'{a.market.slug:<32} delay={a.best_delay_ms:8.0f}ms corr={a.peak_corr:.3f}')
+
+        agg = aggregate_lag(analyses)
+        if agg:
+            self.stdout.write(self.style.SUCCESS(
+                f"Aggregate over {agg['markets']} markets: delay={agg['best_delay_ms']:.0f}ms "
+                f"corr={agg['peak_corr']:.3f} median best delay={agg['median_delay_ms']:.0f}ms"
+            ))
@@ -0,0 +1,84 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from market.backtest import clear_columns_cache
+from market.features import FEATURE_FIELDS, MAX_FEATURE_AGE_MS, features_asof, iter_features, write_features_csv
+from market.models import Market, MarketTick
+
+
+class Command(BaseCommand):
+    help = 'Compute Binance rolling features from a local aggTrades/1s-klines dump and backfill MarketTick'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Binance aggTrades/trades/1s-klines CSV or ZIP')
+        parser.add_argument('--market', action='append', dest='markets', default=[],
+                            help='Market slug to backfill (repeatable, default: all markets)')
+        parser.add_argument('--overwrite', action='store_true',
+                            help='Replace values that are already set')
+        parser.add_argument('--csv', action='store_true',
+                            help='Write features to stdout as CSV instead of updating the DB')
+        parser.add_argument('--max-age', type=float, default=MAX_FEATURE_AGE_MS / 1000,
+                            help='Leave a tick untouched when the latest features are older than this (seconds)')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        path = options['file']
+
+        if options['csv']:
+            count = write_features_csv(path, sys.stdout)
+            self.stderr.write(f'{count} seconds written')
+            return
+
+        ticks = MarketTick.objects.order_by('timestamp_ms')
+        if options['markets']:
+            found = Market.objects.filter(slug__in=options['markets']).count()
+            if found != len(set(options['markets'])):
+                raise CommandError('Unknown market slug')
+            ticks = ticks.filter(market__slug__in=options['markets'])
+
+        rows = list(ticks.values_list('id', 'timestamp_ms', *FEATURE_FIELDS))
+        if not rows:
+            raise CommandError('No ticks to backfill')
+
+        overwrite = options['overwrite']
+        pending = []
+        updated = stale = 0
+        stream = features_asof(iter(iter_features(path)), (r[1] for r in rows),
+                               max_age_ms=options['max_age'] * 1000)
+
+        for row, (_, values) in zip(rows, stream):
+            if values is None:
+                stale += 1
+                continue
+            tick = MarketTick(id=row[0])
+            changed = False
+            for i, field in enumerate(FEATURE_FIELDS):
+                current = row[2 + i]
+                if overwrite or current is None:
+                    setattr(tick, field, values[field])
+                    changed = changed or values[field] != current
+                else:
+                    setattr(tick, field, current)
+            if changed:
+                pending.append(tick)
+            if len(pending) >= options['batch_size']:
+                updated += self._flush(pending)
+
+        updated += self._flush(pending)
+        if updated:
+            # cached backtest columns are keyed by tick count / id, not values
+            clear_columns_cache()
+        self.stdout.write(self.style.SUCCESS(
+            f'Backfilled {updated} of {len(rows)} ticks ({stale} without features in the last {options["max_age"]:g}s)'
+        ))
+
+    def _flush(self, pending):
+        if not pending:
+            return 0
+        with transaction.atomic():
+            MarketTick.objects.bulk_update(pending, FEATURE_FIELDS, batch_size=1000)
+        count = len(pending)
+        pending.clear()
+        return count
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from market.backtest import ThresholdStrategy, TickColumns, TICK_COLUMNS, run_backtest
+from market.models import Market
+
+
+class Command(BaseCommand):
+    help = 'Replay stored markets through a threshold strategy and report PnL per market'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--field', default='lag', choices=TICK_COLUMNS)
+        parser.add_argument('--threshold', type=float, default=1.0)
+        parser.add_argument('--exit-threshold', type=float, default=None)
+        parser.add_argument('--size', type=float, default=100.0, help='Shares per entry')
+        parser.add_argument('--min-seconds', type=int, default=0)
+        parser.add_argument('--max-seconds', type=int, default=900)
+        parser.add_argument('--fee-rate', type=float, default=0.0)
+        parser.add_argument('--market', action='append', dest='markets', default=[])
+        parser.add_argument('--no-cache', action='store_true', help='Read ticks from the DB directly')
+        parser.add_argument('--quiet', action='store_true', help='Only print the summary')
+
+    def handle(self, *args, **options):
+        markets = Market.objects.all()
+        if options['markets']:
+            markets = markets.filter(slug__in=options['markets'])
+        if not markets.exists():
+            raise CommandError('No markets to replay')
+
+        columns = TickColumns.from_db(markets) if options['no_cache'] else TickColumns.cached(markets)
+
+        strategy = ThresholdStrategy(
+            field=options['field'],
+            threshold=options['threshold'],
+            size=options['size'],
+            min_seconds=options['min_seconds'],
+            max_seconds=options['max_seconds'],
+            exit_threshold=options['exit_threshold'],
+        )
+        result = run_backtest(strategy, columns, fee_rate=options['fee_rate'])
+
+        if not options['quiet']:
+            for m in result.markets:
+                if m['fills']:
+                    self.stdout.write(
+                        f"{m['slug']:<32} {m['resolved_side'] or '-':<5} fills={m['fills']:<3} "
+                        f"cost=$ {m['cost']:9.2f}  pnl=$ {m['pnl']:9.2f}"
+                    )
+
+        s = result.summary
+        self.stdout.write('')
+        self.stdout.write(f"Markets: {s['markets']} | Traded: {s['traded']} | Wins: {s['wins']} ({s['win_rate']:.1f}%)")
+        self.stdout.write(f"Cost: $ {s['cost']:.2f} | ROI: {s['roi']:.2f}%")
+        self.stdout.write(self.style.SUCCESS(f"PnL: $ {s['pnl']:.2f}"))
+        self.stdout.write(f"Replayed {columns.tick_count:,} ticks in {s['elapsed']:.3f}s ({s['ticks_per_sec']:,.0f} ticks/s)")
@@ -0,0 +1,46 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from market.features import BinanceFeatureEngine
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the rolling Binance feature engine (updates/sec)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trades', type=int, default=1_000_000)
+        parser.add_argument('--per-second', type=int, default=50,
+                            help='Average trades per second in the synthetic stream')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        n = options['trades']
+        step_ms = max(1, 1000 // options['per_second'])
+
+        ts = 1_770_000_000_000
+        price = 76_000.0
+        trades = []
+        for _ in range(n):
+            ts += rng.randint(0, 2 * step_ms)
+            price *= 1.0 + rng.gauss(0, 0.00002)
+            trades.append((ts, price, rng.expovariate(10.0)))
+
+        engine = BinanceFeatureEngine()
+        update = engine.update
+        bars = 0
+        started = time.perf_counter()
+        for trade in trades:
+            if update(*trade):
+                bars += 1
+                engine.features()
+        engine.flush()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(f'Trades:        {n:,}')
+        self.stdout.write(f'Closed bars:   {bars:,}')
+        self.stdout.write(f'Elapsed:       {elapsed:.3f}s')
+        self.stdout.write(self.style.SUCCESS(f'Updates/sec:   {n / elapsed:,.0f}'))
+        self.stdout.write(f'Bars/sec:      {bars / elapsed:,.0f}')
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from market.models import Market
+from market.similarity import refresh_embeddings
+
+
+class Command(BaseCommand):
+    help = 'Compute trajectory embeddings for markets without an up-to-date one'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--market', action='append', dest='markets', default=[])
+        parser.add_argument('--force', action='store_true', help='Recompute every selected market')
+
+    def handle(self, *args, **options):
+        markets = Market.objects.all()
+        if options['markets']:
+            markets = markets.filter(slug__in=options['markets'])
+
+        updated = refresh_embeddings(markets, force=options['force'])
+        self.stdout.write(self.style.SUCCESS(f'Embedded {updated} markets'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from market.models import Market
+from market.outcome import label_markets
+
+
+class Command(BaseCommand):
+    help = 'Derive strike, final oracle price, resolved side and window times for stored markets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--market', action='append', dest='markets', default=[])
+
+    def handle(self, *args, **options):
+        markets = Market.objects.all()
+        if options['markets']:
+            markets = markets.filter(slug__in=options['markets'])
+
+        count = label_markets(markets)
+        self.stdout.write(self.style.SUCCESS(f'Labelled {count} markets'))
@@ -0,0 +1,34 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from market.recorder import TickRecorder
+
+
+class Command(BaseCommand):
+    help = 'Record a live line-delimited tick feed into the database in batched transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default=settings.TICK_FEED_HOST)
+        parser.add_argument('--port', type=int, default=settings.TICK_FEED_PORT)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--flush-interval', type=float, default=1.0, help='Max seconds a tick waits in the buffer')
+        parser.add_argument('--report-every', type=float, default=10.0, help='Seconds between stats lines')
+        parser.add_argument('--max-backlog', type=int, default=100_000)
+        parser.add_argument('--once', action='store_true', help='Exit when the feed closes instead of reconnecting')
+
+    def handle(self, *args, **options):
+        recorder = TickRecorder(
+            options['host'],
+            options['port'],
+            batch_size=options['batch_size'],
+            flush_interval=options['flush_interval'],
+            report_every=options['report_every'],
+            max_backlog=options['max_backlog'],
+            log=self.stdout.write,
+        )
+        try:
+            asyncio.run(recorder.run(once=options['once']))
+        except KeyboardInterrupt:
+            self.stdout.write('stopped')
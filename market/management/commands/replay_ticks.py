@@ -0,0 +1,28 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from market.recorder import load_replay_rows, serve_replay
+
+
+class Command(BaseCommand):
+    help = 'Serve stored CSV files as a live line-delimited tick feed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help='Market CSV files')
+        parser.add_argument('--host', default=settings.TICK_FEED_HOST)
+        parser.add_argument('--port', type=int, default=settings.TICK_FEED_PORT)
+        parser.add_argument('--speed', type=float, default=1.0, help='Replay speed multiplier, 0 = as fast as possible')
+
+    def handle(self, *args, **options):
+        rows, header = load_replay_rows(options['files'])
+        if not rows:
+            raise CommandError('No rows to replay')
+        try:
+            asyncio.run(serve_replay(
+                rows, header, options['host'], options['port'],
+                speed=options['speed'], log=self.stdout.write,
+            ))
+        except KeyboardInterrupt:
+            self.stdout.write('stopped')
@@ -0,0 +1,57 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from market.backtest import TICK_COLUMNS, TickColumns
+from market.models import Market
+from market.sweep import expand_grid, run_sweep, save_sweep
+
+
+GRID_PARAMS = ['threshold', 'min_seconds', 'max_seconds', 'size', 'exit_threshold']
+
+
+class Command(BaseCommand):
+    help = 'Grid-search ThresholdStrategy parameters over stored markets in a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--field', default='lag', choices=TICK_COLUMNS)
+        parser.add_argument('--threshold', type=float, nargs='+', default=[1.0])
+        parser.add_argument('--min-seconds', type=int, nargs='+', default=[0])
+        parser.add_argument('--max-seconds', type=int, nargs='+', default=[900])
+        parser.add_argument('--size', type=float, nargs='+', default=[100.0])
+        parser.add_argument('--exit-threshold', type=float, nargs='+', default=None)
+        parser.add_argument('--fee-rate', type=float, default=0.0)
+        parser.add_argument('--market', action='append', dest='markets', default=[])
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--no-save', action='store_true', help='Do not store results in the DB')
+
+    def handle(self, *args, **options):
+        markets = Market.objects.all()
+        if options['markets']:
+            markets = markets.filter(slug__in=options['markets'])
+        if not markets.exists():
+            raise CommandError('No markets to replay')
+
+        grid = {p: options[p] for p in GRID_PARAMS if options[p] is not None}
+        base = {'field': options['field']}
+        combos = len(expand_grid(grid))
+
+        columns = TickColumns.cached(markets)
+        self.stdout.write(
+            f'{combos} parameter sets x {len(columns)} markets ({columns.tick_count:,} ticks) '
+            f'on {options["processes"]} processes'
+        )
+
+        rows, elapsed = run_sweep(
+            columns, grid, base=base, fee_rate=options['fee_rate'], processes=options['processes'],
+        )
+
+        for params, s in sorted(rows, key=lambda r: r[1]['pnl'], reverse=True)[:10]:
+            label = ' '.join(f'{k}={v}' for k, v in params.items())
+            self.stdout.write(f"{label:<60} traded={s['traded']:<5} pnl=$ {s['pnl']:10.2f} roi={s['roi']:7.2f}%")
+
+        self.stdout.write(f'Finished in {elapsed:.2f}s ({combos / elapsed:.1f} sets/s)')
+
+        if not options['no_save']:
+            run = save_sweep(columns, grid, rows, elapsed, base=base, processes=options['processes'])
+            self.stdout.write(self.style.SUCCESS(f'Saved sweep #{run.pk}'))
@@ -0,0 +1,49 @@
+# Generated by Django 6.0.1 on 2026-10-19 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0002_market_comment_market_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SweepRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('strategy', models.CharField(max_length=50)),
+                ('field', models.CharField(blank=True, max_length=50)),
+                ('grid', models.JSONField(default=dict)),
+                ('market_count', models.IntegerField(default=0)),
+                ('tick_count', models.IntegerField(default=0)),
+                ('processes', models.IntegerField(default=1)),
+                ('elapsed', models.FloatField(default=0)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SweepResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('params', models.JSONField(default=dict)),
+                ('traded', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('win_rate', models.FloatField(default=0)),
+                ('cost', models.FloatField(default=0)),
+                ('pnl', models.FloatField(default=0)),
+                ('roi', models.FloatField(default=0)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='market.sweeprun')),
+            ],
+            options={
+                'ordering': ['-pnl'],
+                'indexes': [models.Index(fields=['run', 'pnl'], name='market_swee_run_id_930f94_idx')],
+            },
+        ),
+    ]
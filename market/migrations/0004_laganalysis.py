@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0003_sweeprun_sweepresult'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LagAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('tick_count', models.IntegerField(default=0)),
+                ('step_ms', models.IntegerField(default=250)),
+                ('max_lag_ms', models.IntegerField(default=30000)),
+                ('best_delay_ms', models.FloatField(blank=True, null=True)),
+                ('peak_corr', models.FloatField(blank=True, null=True)),
+                ('curve', models.JSONField(default=list)),
+                ('lag_mean', models.FloatField(blank=True, null=True)),
+                ('lag_abs_p95', models.FloatField(blank=True, null=True)),
+                ('market', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='lag_analysis', to='market.market')),
+            ],
+        ),
+    ]
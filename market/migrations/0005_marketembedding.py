@@ -0,0 +1,25 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0004_laganalysis'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketEmbedding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('tick_count', models.IntegerField(default=0)),
+                ('binance', models.BinaryField(null=True)),
+                ('microprice', models.BinaryField(null=True)),
+                ('market', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='embedding', to='market.market')),
+            ],
+        ),
+    ]
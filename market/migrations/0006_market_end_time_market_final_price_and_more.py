@@ -0,0 +1,60 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0005_marketembedding'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='market',
+            name='end_time',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='market',
+            name='final_price',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='market',
+            name='max_abs_lag',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='market',
+            name='resolved_side',
+            field=models.CharField(blank=True, choices=[('up', 'Up'), ('down', 'Down')], max_length=4),
+        ),
+        migrations.AddField(
+            model_name='market',
+            name='start_time',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='market',
+            name='strike',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='market',
+            name='window_minutes',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='market',
+            index=models.Index(fields=['start_time'], name='market_mark_start_t_33412b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='market',
+            index=models.Index(fields=['resolved_side', 'start_time'], name='market_mark_resolve_39ea11_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='market',
+            index=models.Index(fields=['resolved_side', 'max_abs_lag'], name='market_mark_resolve_fc1861_idx'),
+        ),
+    ]
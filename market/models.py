@@ -13,8 +13,28 @@ class Market(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='not_analyzed')
     comment = models.TextField(blank=True)
 
+    # Окно рынка из slug (btc-updown-15m-<epoch start>)
+    start_time = models.DateTimeField(null=True, blank=True)
+    end_time = models.DateTimeField(null=True, blank=True)
+    window_minutes = models.IntegerField(null=True, blank=True)
+
+    # Исход: страйк = первая цена оракула, итог = последняя
+    SIDE_CHOICES = [
+        ('up', 'Up'),
+        ('down', 'Down'),
+    ]
+    strike = models.FloatField(null=True, blank=True)
+    final_price = models.FloatField(null=True, blank=True)
+    resolved_side = models.CharField(max_length=4, choices=SIDE_CHOICES, blank=True)
+    max_abs_lag = models.FloatField(null=True, blank=True)
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['start_time']),
+            models.Index(fields=['resolved_side', 'start_time']),
+            models.Index(fields=['resolved_side', 'max_abs_lag']),
+        ]
 
     def __str__(self):
         return self.slug
@@ -106,3 +126,76 @@ class MarketTick(models.Model):
 
     def __str__(self):
         return f"{self.market.slug} @ {self.seconds_till_end}s"
+
+
+class SweepRun(models.Model):
+    """Прогон перебора параметров стратегии по сохранённым рынкам"""
+    created_at = models.DateTimeField(auto_now_add=True)
+    strategy = models.CharField(max_length=50)
+    field = models.CharField(max_length=50, blank=True)
+    grid = models.JSONField(default=dict)  # {param: [values, ...]}
+    market_count = models.IntegerField(default=0)
+    tick_count = models.IntegerField(default=0)
+    processes = models.IntegerField(default=1)
+    elapsed = models.FloatField(default=0)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.strategy} #{self.pk}"
+
+
+class SweepResult(models.Model):
+    """Итог одной комбинации параметров"""
+    run = models.ForeignKey(SweepRun, on_delete=models.CASCADE, related_name='results')
+    params = models.JSONField(default=dict)
+    traded = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    win_rate = models.FloatField(default=0)
+    cost = models.FloatField(default=0)
+    pnl = models.FloatField(default=0)
+    roi = models.FloatField(default=0)
+
+    class Meta:
+        ordering = ['-pnl']
+        indexes = [
+            models.Index(fields=['run', 'pnl']),
+        ]
+
+    def __str__(self):
+        return f"{self.run} {self.params}"
+
+
+class LagAnalysis(models.Model):
+    """Кросс-корреляция цен оракула и Binance для одного рынка (кэш)"""
+    market = models.OneToOneField(Market, on_delete=models.CASCADE, related_name='lag_analysis')
+    computed_at = models.DateTimeField(auto_now=True)
+    tick_count = models.IntegerField(default=0)  # число тиков на момент расчёта
+    step_ms = models.IntegerField(default=250)
+    max_lag_ms = models.IntegerField(default=30000)
+
+    # > 0: оракул отстаёт от Binance
+    best_delay_ms = models.FloatField(null=True, blank=True)
+    peak_corr = models.FloatField(null=True, blank=True)
+    curve = models.JSONField(default=list)  # корреляция для сдвигов -max_lag..+max_lag
+
+    # Статистика по колонке lag
+    lag_mean = models.FloatField(null=True, blank=True)
+    lag_abs_p95 = models.FloatField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.market.slug} lag {self.best_delay_ms}ms"
+
+
+class MarketEmbedding(models.Model):
+    """Вектор траектории рынка для поиска похожих (float32, сетка по seconds_till_end)"""
+    market = models.OneToOneField(Market, on_delete=models.CASCADE, related_name='embedding')
+    computed_at = models.DateTimeField(auto_now=True)
+    tick_count = models.IntegerField(default=0)  # число тиков на момент расчёта
+
+    binance = models.BinaryField(null=True)      # Binance относительно страйка, %
+    microprice = models.BinaryField(null=True)   # pm_up_microprice - 0.5
+
+    def __str__(self):
+        return f"{self.market.slug} embedding"
@@ -0,0 +1,77 @@
+"""Market outcome labels derived from the slug and the stored ticks.
+
+Only markets that ran to the end are labelled: a partial recording or a
+market still in progress keeps an empty resolved side and final price.
+"""
+import re
+from datetime import datetime, timedelta, timezone
+
+from django.db.models import Max, Min
+
+from .models import Market
+
+
+SLUG_RE = re.compile(r'-(\d+)m-(\d+)$')
+
+# The feed sends its last tick of a market at seconds_till_end = 1
+FINAL_TICK_SECONDS = 2
+
+
+def parse_slug(slug):
+    """'btc-updown-15m-1770304500' -> (start, end, 15); Nones when the slug has no window."""
+    match = SLUG_RE.search(slug)
+    if not match:
+        return None, None, None
+    minutes, epoch = int(match.group(1)), int(match.group(2))
+    start = datetime.fromtimestamp(epoch, tz=timezone.utc)
+    return start, start + timedelta(minutes=minutes), minutes
+
+
+def resolve(strike, final_price):
+    """'up' when the last oracle price is >= the strike, '' when unknown."""
+    if strike is None or final_price is None:
+        return ''
+    return 'up' if final_price >= strike else 'down'
+
+
+def has_ended(last_seconds_till_end, end_time=None, now=None):
+    """Whether the last tick closes the market and its window is over."""
+    if last_seconds_till_end is None or last_seconds_till_end > FINAL_TICK_SECONDS:
+        return False
+    if end_time is not None:
+        return end_time <= (now or datetime.now(timezone.utc))
+    return True
+
+
+def label_market(market):
+    """Fill timing, strike, final price, resolved side and max |lag| of a market."""
+    market.start_time, market.end_time, market.window_minutes = parse_slug(market.slug)
+
+    oracle = market.ticks.exclude(oracle_btc_price=None).order_by('timestamp_ms')
+    first = oracle.values_list('oracle_btc_price', flat=True).first()
+    last = oracle.reverse().values_list('oracle_btc_price', flat=True).first()
+    seconds = market.ticks.order_by('timestamp_ms').values_list('seconds_till_end', flat=True).last()
+    if not has_ended(seconds, market.end_time):
+        last = None
+    market.strike = first
+    market.final_price = last
+    market.resolved_side = resolve(first, last)
+
+    lag = market.ticks.aggregate(low=Min('lag'), high=Max('lag'))
+    values = [abs(v) for v in lag.values() if v is not None]
+    market.max_abs_lag = max(values) if values else None
+
+    market.save(update_fields=[
+        'start_time', 'end_time', 'window_minutes',
+        'strike', 'final_price', 'resolved_side', 'max_abs_lag',
+    ])
+    return market
+
+
+def label_markets(markets=None):
+    markets = Market.objects.all() if markets is None else markets
+    count = 0
+    for market in markets.iterator():
+        label_market(market)
+        count += 1
+    return count
@@ -0,0 +1,342 @@
+"""Live tick recording from a line-delimited stream.
+
+The feed speaks the same schema as the uploaded CSV files: a header line
+followed by one CSV row per tick (a line holding a JSON object with the same
+keys is accepted too). Lines are read on the asyncio loop and queued with
+their arrival time; a single writer thread turns them into MarketTick rows
+via ``parse_row`` and commits them in batches.
+
+After a reconnect the feed may send ticks again (a replay starts over), so
+ticks before the last stored timestamp_ms of their market are dropped. Several
+ticks can share one millisecond; at the last stored stamp only those beyond
+the number already stored are written.
+"""
+import asyncio
+import csv
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.db import close_old_connections, transaction
+from django.db.models import Max
+
+from .lag import analyze_market
+from .models import Market, MarketTick
+from .outcome import label_market
+from .similarity import embed_market
+from .views import parse_int, parse_row
+
+
+def now_ms():
+    return time.time() * 1000
+
+
+class LineDecoder:
+    """Turns feed lines into row dicts; the CSV header may be re-sent at any time."""
+
+    def __init__(self):
+        self.header = None
+
+    def decode(self, line):
+        line = line.strip()
+        if not line:
+            return None
+        if line.startswith('{'):
+            return json.loads(line)
+        values = next(csv.reader([line]))
+        if values and values[0] == 'market_slug':
+            self.header = values
+            return None
+        if self.header is None:
+            raise ValueError('CSV row before header')
+        return dict(zip(self.header, values))
+
+
+class RecorderStats:
+    """Counters and latency samples between two reports."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.received = 0
+        self.written = 0
+        self.rejected = 0
+        self.duplicates = 0
+        self.flushes = 0
+        self.reset_window()
+
+    def reset_window(self):
+        self.window_started = time.monotonic()
+        self.window_written = 0
+        self.commit_latency = []    # arrival -> commit, ms
+        self.feed_latency = []      # tick timestamp -> commit, ms
+
+    def record_flush(self, written, arrivals, stamps, committed_ms):
+        self.flushes += 1
+        self.written += written
+        self.window_written += written
+        self.commit_latency.extend(committed_ms - a for a in arrivals)
+        self.feed_latency.extend(committed_ms - s for s in stamps if s)
+
+    def report(self, backlog):
+        elapsed = max(time.monotonic() - self.window_started, 1e-9)
+        commit = np.array(self.commit_latency or [0.0])
+        feed = np.array(self.feed_latency or [0.0])
+        line = (
+            f'recv={self.received} written={self.written} rejected={self.rejected} duplicates={self.duplicates} '
+            f'rate={self.window_written / elapsed:.1f}/s backlog={backlog} '
+            f'commit p50={np.percentile(commit, 50):.0f}ms p95={np.percentile(commit, 95):.0f}ms '
+            f'feed p50={np.percentile(feed, 50):.0f}ms p95={np.percentile(feed, 95):.0f}ms'
+        )
+        self.reset_window()
+        return line
+
+
+class TickRecorder:
+    """Consumes a tick feed and writes it to the database in batches."""
+
+    def __init__(self, host, port, batch_size=500, flush_interval=1.0,
+                 report_every=10.0, max_backlog=100_000, log=print):
+        self.host = host
+        self.port = port
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.report_every = report_every
+        self.log = log
+
+        # Bounded: when the DB falls behind the reader blocks and TCP pushes back
+        self.queue = asyncio.Queue(maxsize=max_backlog)
+        self.stats = RecorderStats()
+        self.markets = {}
+        # slug -> (last stored timestamp_ms, ticks stored at it, ticks seen at it since connecting)
+        self.last_stamp = {}
+        self.current_slug = None
+        self.finished = set()
+        # One thread owns every DB call
+        self.db = ThreadPoolExecutor(max_workers=1, thread_name_prefix='recorder-db')
+
+    @property
+    def backlog(self):
+        return self.queue.qsize()
+
+    async def run(self, once=False):
+        writer = asyncio.create_task(self.write_loop())
+        reporter = asyncio.create_task(self.report_loop())
+        try:
+            await self.read_loop(once=once)
+            await self.queue.join()
+        finally:
+            writer.cancel()
+            reporter.cancel()
+            await self.flush_remaining()
+            await asyncio.get_running_loop().run_in_executor(self.db, self.close_current)
+            self.log(self.stats.report(self.backlog))
+            self.db.shutdown(wait=True)
+
+    async def read_loop(self, once=False):
+        delay = 1.0
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError as e:
+                if once:
+                    raise
+                self.log(f'connect {self.host}:{self.port} failed: {e}; retry in {delay:.0f}s')
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+                continue
+
+            self.log(f'connected to {self.host}:{self.port}')
+            delay = 1.0
+            await self.queue.put((now_ms(), None))
+            decoder = LineDecoder()
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    try:
+                        row = decoder.decode(line.decode('utf-8'))
+                    except (ValueError, UnicodeDecodeError):
+                        self.stats.rejected += 1
+                        continue
+                    if row is not None:
+                        self.stats.received += 1
+                        await self.queue.put((now_ms(), row))
+            finally:
+                writer.close()
+
+            self.log('feed closed')
+            if once:
+                return
+
+    async def write_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await loop.run_in_executor(self.db, self.flush, batch)
+            except Exception as e:
+                self.log(f'flush of {len(batch)} ticks failed: {e}')
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def flush_remaining(self):
+        batch = []
+        while not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+            self.queue.task_done()
+        if batch:
+            await asyncio.get_running_loop().run_in_executor(self.db, self.flush, batch)
+
+    async def report_loop(self):
+        while True:
+            await asyncio.sleep(self.report_every)
+            self.log(self.stats.report(self.backlog))
+
+    def market(self, slug):
+        market = self.markets.get(slug)
+        if market is None:
+            market, created = Market.objects.get_or_create(slug=slug)
+            if created:
+                self.log(f'new market {slug}')
+            self.markets[slug] = market
+        return market
+
+    def stored_stamp(self, market):
+        last = market.ticks.aggregate(last=Max('timestamp_ms'))['last']
+        if last is None:
+            return None, 0, 0
+        return last, market.ticks.filter(timestamp_ms=last).count(), 0
+
+    def is_duplicate(self, state, slug, timestamp_ms):
+        """Whether the tick is already stored; updates state[slug]."""
+        last, stored, seen = state[slug]
+        if last is not None and timestamp_ms < last:
+            state[slug] = (last, stored, 0)
+            return True
+        if timestamp_ms == last:
+            seen += 1
+            state[slug] = (last, stored if seen <= stored else stored + 1, seen)
+            return seen <= stored
+        state[slug] = (timestamp_ms, 1, 1)
+        return False
+
+    def flush(self, batch):
+        """Write one batch (runs on the DB thread)."""
+        close_old_connections()
+        ticks, arrivals, stamps = [], [], []
+        # applied only once the batch is committed
+        state = dict(self.last_stamp)
+        for arrived, row in batch:
+            if row is None:
+                # reconnected: the feed may start over
+                state = {slug: (last, stored, 0) for slug, (last, stored, _) in state.items()}
+                continue
+            slug = row.get('market_slug', '')
+            tick = parse_row(self.market(slug), row) if slug else None
+            # without a timestamp the tick can be neither ordered nor stored
+            if tick is None or tick.timestamp_ms is None:
+                self.stats.rejected += 1
+                continue
+            if slug not in state:
+                state[slug] = self.stored_stamp(tick.market)
+            if self.is_duplicate(state, slug, tick.timestamp_ms):
+                self.stats.duplicates += 1
+                continue
+            ticks.append(tick)
+            arrivals.append(arrived)
+            stamps.append(tick.timestamp_ms)
+            if slug != self.current_slug:
+                if self.current_slug is not None:
+                    self.finished.add(self.current_slug)
+                self.current_slug = slug
+
+        with transaction.atomic():
+            MarketTick.objects.bulk_create(ticks, batch_size=5000)
+        self.last_stamp = state
+        self.stats.record_flush(len(ticks), arrivals, stamps, now_ms())
+        self.finalize_markets()
+
+    def close_current(self):
+        if self.current_slug is not None:
+            self.finished.add(self.current_slug)
+            self.current_slug = None
+        self.finalize_markets()
+
+    def finalize_markets(self):
+        """Outcome labels, lag analysis and embedding for markets the feed has moved past."""
+        for slug in self.finished:
+            market = self.markets.pop(slug, None)
+            self.last_stamp.pop(slug, None)
+            if market is not None:
+                label_market(market)
+                analyze_market(market)
+                embed_market(market)
+        self.finished.clear()
+
+
+async def serve_replay(rows, header, host, port, speed=1.0, log=print):
+    """Serve CSV rows to every connecting client, paced by timestamp_ms / speed."""
+
+    async def handle(reader, writer):
+        peer = writer.get_extra_info('peername')
+        log(f'client {peer} connected')
+        buffer = io.StringIO()
+        out = csv.writer(buffer, lineterminator='\n')
+        out.writerow(header)
+        sent = 0
+        previous = None
+        try:
+            for row in rows:
+                ts = parse_int(row.get('timestamp_ms'))
+                if speed > 0 and previous is not None and ts is not None and ts > previous:
+                    writer.write(buffer.getvalue().encode())
+                    buffer.seek(0)
+                    buffer.truncate()
+                    await writer.drain()
+                    await asyncio.sleep((ts - previous) / 1000 / speed)
+                if ts is not None:
+                    previous = ts
+                out.writerow([row.get(k, '') for k in header])
+                sent += 1
+                if buffer.tell() > 65536:
+                    writer.write(buffer.getvalue().encode())
+                    buffer.seek(0)
+                    buffer.truncate()
+                    await writer.drain()
+            writer.write(buffer.getvalue().encode())
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            log(f'client {peer} done after {sent} ticks')
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    log(f'replaying {len(rows)} ticks on {host}:{port} (speed={speed or "max"})')
+    async with server:
+        await server.serve_forever()
+
+
+def load_replay_rows(paths):
+    """Rows of several CSV files in timestamp order, plus their common header."""
+    rows, header = [], None
+    for path in paths:
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            header = header or reader.fieldnames
+            rows.extend(reader)
+    rows.sort(key=lambda r: int(r.get('timestamp_ms') or 0))
+    return rows, header
@@ -0,0 +1,197 @@
+"""Similar-market search over downsampled price trajectories.
+
+Every market gets a fixed-length embedding per channel: the trajectory is
+sampled on a uniform seconds_till_end grid (900 -> 0) and normalized so that
+markets with different price levels are comparable. Search is an exact
+NumPy brute force; an optional random-hyperplane LSH narrows the candidates
+first when the index grows large.
+"""
+import numpy as np
+from django.db.models import Count, Max
+
+from .models import Market, MarketEmbedding
+
+
+EMBED_POINTS = 60          # one point per 15 seconds
+MARKET_SECONDS = 900
+CHANNELS = {
+    # name -> (tick field, label)
+    'binance': ('binance_btc_price', 'Binance vs strike'),
+    'microprice': ('pm_up_microprice', 'UP microprice'),
+}
+
+BUCKET_SIZE = 64
+
+# Binance channel is in percent of the strike, microprice is centered on 0.5
+BINANCE_SCALE = 100.0
+
+
+def trajectory(seconds_till_end, values, points=EMBED_POINTS):
+    """Sample a series on a uniform grid from market start to end. None when empty."""
+    seconds_till_end = np.asarray(seconds_till_end, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    mask = ~np.isnan(values) & ~np.isnan(seconds_till_end)
+    if mask.sum() < 2:
+        return None
+
+    # np.interp needs increasing x; seconds_till_end falls over time
+    x = seconds_till_end[mask][::-1]
+    y = values[mask][::-1]
+    x, first = np.unique(x, return_index=True)
+    y = y[first]
+    grid = np.linspace(0, MARKET_SECONDS, points)
+    return np.interp(grid, x, y)[::-1]
+
+
+def embed_ticks(seconds_till_end, binance, microprice, strike=None, points=EMBED_POINTS):
+    """Per-channel float32 embeddings for one market's ticks."""
+    binance = np.asarray(binance, dtype=np.float64)
+    out = {}
+
+    path = trajectory(seconds_till_end, binance, points)
+    if path is not None:
+        if strike is None:
+            valid = binance[~np.isnan(binance)]
+            strike = valid[0]
+        out['binance'] = ((path / strike - 1) * BINANCE_SCALE).astype(np.float32)
+    else:
+        out['binance'] = None
+
+    path = trajectory(seconds_till_end, microprice, points)
+    out['microprice'] = None if path is None else (path - 0.5).astype(np.float32)
+    return out
+
+
+def market_strike(rows):
+    """First oracle price of the market, None when the oracle is missing."""
+    for row in rows:
+        if row[1] is not None:
+            return row[1]
+    return None
+
+
+def embed_market(market):
+    """Compute and store the embeddings of one market."""
+    rows = list(
+        market.ticks.order_by('timestamp_ms')
+        .values_list('seconds_till_end', 'oracle_btc_price', 'binance_btc_price', 'pm_up_microprice')
+    )
+    vectors = {'binance': None, 'microprice': None}
+    if rows:
+        data = np.array(rows, dtype=np.float64)
+        vectors = embed_ticks(data[:, 0], data[:, 2], data[:, 3], strike=market_strike(rows))
+
+    defaults = {'tick_count': len(rows)}
+    for name, vector in vectors.items():
+        defaults[name] = None if vector is None else vector.tobytes()
+
+    embedding, _ = MarketEmbedding.objects.update_or_create(market=market, defaults=defaults)
+    return embedding
+
+
+def refresh_embeddings(markets=None, force=False):
+    """Embed markets that have no embedding yet or gained ticks since the last one."""
+    markets = (Market.objects.all() if markets is None else markets).annotate(n_ticks=Count('ticks'))
+    markets = markets.select_related('embedding')
+
+    updated = 0
+    for market in markets:
+        current = getattr(market, 'embedding', None)
+        if force or current is None or current.tick_count != market.n_ticks:
+            embed_market(market)
+            updated += 1
+    return updated
+
+
+class SimilarityIndex:
+    """In-memory k-NN index over one embedding channel."""
+
+    def __init__(self, slugs, vectors, planes=None, tables=8, seed=0):
+        self.slugs = list(slugs)
+        self.positions = {slug: i for i, slug in enumerate(self.slugs)}
+        self.vectors = vectors                      # float32 (n, EMBED_POINTS)
+        self.norms = (vectors ** 2).sum(axis=1)
+
+        # LSH: sign of projections on random hyperplanes -> bucket key per table,
+        # about BUCKET_SIZE markets per bucket
+        if planes is None:
+            planes = int(np.clip(np.log2(max(len(vectors), 1) / BUCKET_SIZE), 1, 24))
+        rng = np.random.default_rng(seed)
+        dim = vectors.shape[1] if len(vectors) else EMBED_POINTS
+        self.planes = rng.standard_normal((tables, dim, planes)).astype(np.float32)
+        self.weights = 1 << np.arange(planes, dtype=np.int64)
+        self.center = vectors.mean(axis=0) if len(vectors) else np.zeros(dim, dtype=np.float32)
+
+        # Per table: row indices sorted by bucket key, and the sorted keys
+        self.tables = []
+        for t in range(tables):
+            keys = self._keys(vectors - self.center, t)
+            order = np.argsort(keys, kind='stable')
+            self.tables.append((keys[order], order))
+
+    def __len__(self):
+        return len(self.slugs)
+
+    def _keys(self, vectors, table):
+        return ((vectors @ self.planes[table]) > 0) @ self.weights
+
+    @classmethod
+    def from_db(cls, channel):
+        rows = list(
+            MarketEmbedding.objects.exclude(**{channel: None})
+            .order_by('market_id')
+            .values_list('market__slug', channel)
+        )
+        vectors = np.array(
+            [np.frombuffer(blob, dtype=np.float32) for _, blob in rows], dtype=np.float32,
+        ).reshape(len(rows), -1 if rows else EMBED_POINTS)
+        return cls([slug for slug, _ in rows], vectors)
+
+    def _candidates(self, query):
+        centered = (query - self.center)[None, :]
+        found = []
+        for t, (keys, order) in enumerate(self.tables):
+            key = self._keys(centered, t)[0]
+            lo, hi = np.searchsorted(keys, [key, key + 1])
+            found.append(order[lo:hi])
+        return np.unique(np.concatenate(found))
+
+    def search(self, slug, k=5, approximate=False):
+        """Nearest markets to `slug` as (slug, distance) pairs, closest first."""
+        position = self.positions.get(slug)
+        if position is None:
+            return []
+        query = self.vectors[position]
+
+        if approximate:
+            candidates = self._candidates(query)
+            candidates = candidates[candidates != position]
+        else:
+            candidates = None
+
+        if candidates is None or len(candidates) < k:
+            candidates = np.flatnonzero(np.arange(len(self)) != position)
+        if not len(candidates):
+            return []
+
+        # ||a - b||^2 = ||a||^2 + ||b||^2 - 2ab
+        dist = self.norms[candidates] + self.norms[position] - 2 * (self.vectors[candidates] @ query)
+        dist = np.sqrt(np.maximum(dist, 0) / self.vectors.shape[1])
+        k = min(k, len(candidates))
+        top = np.argpartition(dist, k - 1)[:k]
+        top = top[np.argsort(dist[top])]
+        return [(self.slugs[candidates[i]], float(dist[i])) for i in top]
+
+
+_indexes = {}
+
+
+def get_index(channel):
+    """Index for `channel`, rebuilt only when the stored embeddings changed."""
+    state = MarketEmbedding.objects.aggregate(n=Count('id'), last=Max('computed_at'))
+    key = (state['n'], state['last'])
+    cached = _indexes.get(channel)
+    if cached is None or cached[0] != key:
+        cached = (key, SimilarityIndex.from_db(channel))
+        _indexes[channel] = cached
+    return cached[1]
@@ -0,0 +1,147 @@
+"""Parallel parameter sweeps over the backtest engine.
+
+The tick columns are copied once into shared memory; pool workers attach to
+those blocks read-only and never touch the database, so each parameter set
+only costs the replay itself.
+"""
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+# Worker-side state, set by _init_worker
+_columns = None
+_blocks = []
+
+
+def expand_grid(grid):
+    """{'a': [1, 2], 'b': [3]} -> [{'a': 1, 'b': 3}, {'a': 2, 'b': 3}]"""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+class SharedColumns:
+    """TickColumns arrays published as shared memory blocks."""
+
+    def __init__(self, columns):
+        self.blocks = []
+        self.spec = {
+            'slugs': columns.slugs,
+            'sides': columns.sides,
+            'offsets': columns.offsets,
+            'columns': {k: self._publish(v) for k, v in columns.columns.items()},
+            'books': {k: self._publish(v) for k, v in columns.books.items()},
+        }
+
+    def _publish(self, array):
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        self.blocks.append(block)
+        return block.name, array.shape, array.dtype.str
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _attach(ref):
+    name, shape, dtype = ref
+    block = shared_memory.SharedMemory(name=name)
+    _blocks.append(block)
+    array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    array.flags.writeable = False
+    return array
+
+
+def _init_worker(spec):
+    global _columns
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    from .backtest import TickColumns
+
+    _columns = TickColumns(
+        spec['slugs'],
+        spec['offsets'],
+        {k: _attach(v) for k, v in spec['columns'].items()},
+        {k: _attach(v) for k, v in spec['books'].items()},
+        spec['sides'],
+    )
+
+
+def _run_params(base, params, fee_rate):
+    from .backtest import ThresholdStrategy, run_backtest
+
+    strategy = ThresholdStrategy(**{**base, **params})
+    summary = run_backtest(strategy, _columns, fee_rate=fee_rate).summary
+    return params, summary
+
+
+def run_sweep(columns, grid, base=None, fee_rate=0.0, processes=None):
+    """Run ThresholdStrategy for every combination of `grid`.
+
+    Returns (rows, elapsed) where rows are (params, summary) pairs in grid order.
+    """
+    combos = expand_grid(grid)
+    base = base or {}
+    processes = processes or os.cpu_count() or 1
+    started = time.perf_counter()
+
+    if processes == 1 or len(combos) == 1:
+        global _columns
+        _columns = columns
+        rows = [_run_params(base, params, fee_rate) for params in combos]
+        return rows, time.perf_counter() - started
+
+    with SharedColumns(columns) as shared:
+        with ProcessPoolExecutor(
+            max_workers=min(processes, len(combos)),
+            initializer=_init_worker,
+            initargs=(shared.spec,),
+        ) as pool:
+            futures = [pool.submit(_run_params, base, params, fee_rate) for params in combos]
+            rows = [f.result() for f in futures]
+    return rows, time.perf_counter() - started
+
+
+def save_sweep(columns, grid, rows, elapsed, base=None, processes=1):
+    """Persist a finished sweep as SweepRun + SweepResult rows."""
+    from .models import SweepResult, SweepRun
+
+    base = base or {}
+    run = SweepRun.objects.create(
+        strategy='threshold',
+        field=base.get('field', ''),
+        grid=grid,
+        market_count=len(columns),
+        tick_count=columns.tick_count,
+        processes=processes,
+        elapsed=elapsed,
+    )
+    SweepResult.objects.bulk_create([
+        SweepResult(
+            run=run,
+            params=params,
+            traded=s['traded'],
+            wins=s['wins'],
+            win_rate=s['win_rate'],
+            cost=s['cost'],
+            pnl=s['pnl'],
+            roi=s['roi'],
+        )
+        for params, s in rows
+    ])
+    return run
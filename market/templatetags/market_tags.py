@@ -7,3 +7,9 @@ register = template.Library()
 def getattribute(obj, attr):
     """Get an attribute from an object dynamically."""
     return getattr(obj, attr, None)
+
+
+@register.filter
+def getitem(mapping, key):
+    """Get a dict item dynamically."""
+    return mapping.get(key) if mapping else None
@@ -1,3 +1,500 @@
-from django.test import TestCase
+import io
+import math
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timezone
 
-# Create your tests here.
+import numpy as np
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from .backtest import MarketReplay, ThresholdStrategy, TickColumns, run_backtest, walk_book
+from .features import BinanceFeatureEngine, RollingSum, features_asof
+from .lag import aggregate_lag, analyze_market, analyze_series, cross_correlation, refresh_lag_analyses
+from .models import Market, MarketTick
+from .outcome import label_market, parse_slug
+from .recorder import LineDecoder, TickRecorder
+from .similarity import EMBED_POINTS, SimilarityIndex, embed_ticks, get_index, refresh_embeddings, trajectory
+from .sweep import expand_grid, run_sweep, save_sweep
+
+
+def synthetic_trades(n, seed=42, start_ms=1_770_000_000_000):
+    """(timestamp_ms, price, qty) random walk, about 50 trades a second."""
+    rng = random.Random(seed)
+    ts, price = start_ms, 76_000.0
+    for _ in range(n):
+        ts += rng.randint(0, 40)
+        price *= 1.0 + rng.gauss(0, 0.00002)
+        yield ts, price, rng.expovariate(10.0)
+
+
+def add_ticks(market, timestamps_ms, **fields):
+    """MarketTicks at these timestamps; `fields` values may be callables of the index."""
+    ticks = []
+    for i, ts in enumerate(timestamps_ms):
+        values = {k: v(i) if callable(v) else v for k, v in fields.items()}
+        values.setdefault('seconds_till_end', max(0, 900 - i))
+        ticks.append(MarketTick(
+            market=market, timestamp_ms=ts,
+            timestamp_et=datetime.fromtimestamp(ts / 1000, tz=timezone.utc), **values,
+        ))
+    return MarketTick.objects.bulk_create(ticks)
+
+
+BOOK = {
+    'up_asks': [{'price': 0.5, 'size': 50.0}], 'down_asks': [{'price': 0.5, 'size': 50.0}],
+    'up_bids': [{'price': 0.45, 'size': 50.0}], 'down_bids': [{'price': 0.45, 'size': 50.0}],
+}
+
+
+def add_market(slug, direction, n=50, start_ms=1_770_000_000_000):
+    """Finished market of n one-second ticks whose oracle price moves by `direction` per tick."""
+    market = Market.objects.create(slug=slug)
+    add_ticks(
+        market, [start_ms + i * 1000 for i in range(n)], seconds_till_end=lambda i: n - i,
+        oracle_btc_price=lambda i: 100.0 + direction * i, lag=lambda i: (i % 7) - 3.0, **BOOK,
+    )
+    return market
+
+
+class CacheDirMixin:
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_dir = tmp.name
+        override = override_settings(MARKET_COLUMNS_CACHE_DIR=tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def cached_files(self):
+        return sorted(os.listdir(self.cache_dir))
+
+
+class RollingSumTests(SimpleTestCase):
+    def test_matches_fsum_after_long_stream_and_gap(self):
+        rng = random.Random(1)
+        window = RollingSum(30)
+        for i in range(200_000):
+            window.push(rng.lognormvariate(8, 2))
+            if i % 9_973 == 0:
+                expected = math.fsum(window.values)
+                self.assertAlmostEqual(window.total, expected, delta=abs(expected) * 1e-12)
+        for _ in range(40):
+            window.push(0.0)
+        self.assertEqual(window.total, 0.0)
+        self.assertEqual(window.mean, 0.0)
+
+    def test_window_size(self):
+        window = RollingSum(3)
+        for value in (1.0, 2.0, 3.0, 4.0):
+            window.push(value)
+        self.assertEqual(len(window), 3)
+        self.assertEqual(window.total, 9.0)
+        self.assertIsNone(RollingSum(3).mean)
+
+
+class FeatureEngineTests(SimpleTestCase):
+    def test_quiet_period_is_exactly_zero(self):
+        engine = BinanceFeatureEngine()
+        last = None
+        for trade in synthetic_trades(200_000):
+            engine.update(*trade)
+            last = trade
+        # next trade 40 s later: the 30 gap seconds in between have no volume
+        engine.update(last[0] + 40_000, last[1], 0.5)
+        features = engine.features()
+        self.assertEqual(engine.base_30s.total, 0.0)
+        self.assertEqual(engine.quote_30s.total, 0.0)
+        self.assertEqual(features['binance_volume_5s'], 0.0)
+        self.assertEqual(features['binance_volma_30s'], 0.0)
+        self.assertEqual(features['binance_atr_30s'], 0.0)
+        self.assertEqual(features['binance_rvol_30s'], 0.0)
+        self.assertIsNone(features['binance_vwap_30s'])
+        self.assertIsNone(features['binance_volume_spike'])
+
+    def test_kline_features(self):
+        engine = BinanceFeatureEngine()
+        bars = [(100.0, 101.0, 99.0, 100.0, 1000.0, 10.0),
+                (100.0, 102.0, 100.0, 102.0, 2040.0, 20.0),
+                (102.0, 103.0, 101.0, 101.0, 0.0, 0.0)]
+        for i, bar in enumerate(bars):
+            engine.add_bar(1_770_000_000_000 + i * 1000, *bar)
+        features = engine.features()
+        self.assertEqual(engine.snapshot_ms, 1_770_000_003_000)
+        self.assertAlmostEqual(features['binance_ret1s_x100'], (101 / 102 - 1) * 10000)
+        self.assertIsNone(features['binance_ret5s_x100'])
+        self.assertAlmostEqual(features['binance_volume_5s'], 3040.0)
+        self.assertAlmostEqual(features['binance_volma_30s'], 3040.0 / 3)
+        self.assertEqual(features['binance_volume_spike'], 0.0)
+        self.assertAlmostEqual(features['binance_vwap_30s'], 3040.0 / 30.0)
+        # true ranges: 2 (first bar), 2, 2
+        self.assertAlmostEqual(features['binance_atr_5s'], 2.0)
+
+    def test_asof_ignores_stale_features(self):
+        features = iter([(1000, 'a'), (2000, 'b'), (3000, 'c')])
+        matched = list(features_asof(features, [500, 1000, 2500, 4999, 5001, 9000], max_age_ms=2000))
+        self.assertEqual(matched, [(500, None), (1000, 'a'), (2500, 'b'), (4999, 'c'), (5001, None), (9000, None)])
+
+
+class BackfillFeaturesTests(CacheDirMixin, TestCase):
+    START = 1_770_000_000_000
+
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        # aggTrades: id, price, qty, first_id, last_id, time, is_buyer_maker, best_match
+        self.path = os.path.join(tmp.name, 'BTCUSDT-aggTrades-2026-02-01.csv')
+        with open(self.path, 'w') as f:
+            for i, (ts, price, qty) in enumerate(synthetic_trades(500, start_ms=self.START)):
+                f.write(f'{i},{price},{qty},{i},{i},{ts},True,True\n')
+        self.last_trade_ms = ts
+        self.market = Market.objects.create(slug='btc-updown-15m-1770000000')
+
+    def test_ticks_past_the_dump_are_left_alone(self):
+        inside = [self.START + 3_000, self.last_trade_ms - 500]
+        after = [self.last_trade_ms + 5_000, self.last_trade_ms + 60_000]
+        add_ticks(self.market, inside + after, binance_vwap_30s=-1.0)
+
+        out = io.StringIO()
+        call_command('backfill_features', self.path, '--overwrite', stdout=out)
+        self.assertIn('Backfilled 2 of 4 ticks (2 without features', out.getvalue())
+
+        ticks = list(self.market.ticks.order_by('timestamp_ms'))
+        for tick in ticks[:2]:
+            self.assertGreater(tick.binance_vwap_30s, 70_000)
+            self.assertIsNotNone(tick.binance_volume_5s)
+        for tick in ticks[2:]:
+            self.assertEqual(tick.binance_vwap_30s, -1.0)
+            self.assertIsNone(tick.binance_volume_5s)
+
+    def test_backfill_clears_the_column_cache(self):
+        add_ticks(self.market, [self.START + 3_000])
+        TickColumns.cached()
+        self.assertEqual(len(self.cached_files()), 1)
+        call_command('backfill_features', self.path, stdout=io.StringIO())
+        self.assertEqual(self.cached_files(), [])
+
+
+class BacktestTests(CacheDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.rising = add_market('btc-updown-15m-1770000000', 1)
+        self.falling = add_market('btc-updown-15m-1770000900', -1)
+
+    def test_columns_from_db(self):
+        columns = TickColumns.from_db()
+        self.assertEqual(columns.slugs, [self.rising.slug, self.falling.slug])
+        self.assertEqual(columns.offsets.tolist(), [0, 50, 100])
+        self.assertEqual(columns.sides, ['', ''])
+        slug, cols, books = columns.market(1)
+        self.assertEqual(slug, self.falling.slug)
+        self.assertEqual(cols['oracle_btc_price'][-1], 51.0)
+        self.assertEqual(books['up_asks'][0, 0].tolist(), [0.5, 50.0])
+        self.assertTrue(np.isnan(books['up_asks'][0, 1, 0]))
+
+    def test_save_and_load(self):
+        columns = TickColumns.from_db()
+        path = os.path.join(self.cache_dir, 'columns.npz')
+        columns.save(path)
+        loaded = TickColumns.load(path)
+        self.assertEqual(loaded.slugs, columns.slugs)
+        self.assertEqual(loaded.sides, columns.sides)
+        np.testing.assert_array_equal(loaded.columns['lag'], columns.columns['lag'])
+        np.testing.assert_array_equal(loaded.books['down_bids'], columns.books['down_bids'])
+
+    def test_cache_hit_and_invalidation(self):
+        TickColumns.cached()
+        first = self.cached_files()
+        TickColumns.cached()
+        self.assertEqual(self.cached_files(), first)
+
+        # a new tick and a new label each replace the file of the market set
+        add_ticks(self.rising, [1_770_000_100_000], oracle_btc_price=200.0)
+        self.assertEqual(TickColumns.cached().tick_count, 101)
+        second = self.cached_files()
+        self.assertEqual(len(second), 1)
+        self.assertNotEqual(second, first)
+        Market.objects.filter(pk=self.falling.pk).update(resolved_side='down')
+        self.assertEqual(TickColumns.cached().sides, ['', 'down'])
+        self.assertEqual(len(self.cached_files()), 1)
+        self.assertNotEqual(self.cached_files(), second)
+
+        # another market set gets its own file
+        TickColumns.cached(Market.objects.filter(pk=self.rising.pk))
+        self.assertEqual(len(self.cached_files()), 2)
+
+    def test_cache_evicts_least_recently_used(self):
+        one = Market.objects.filter(pk=self.rising.pk)
+        two = Market.objects.filter(pk=self.falling.pk)
+        TickColumns.cached(one)
+        path_one = os.path.join(self.cache_dir, self.cached_files()[0])
+        TickColumns.cached(two)
+        path_two = next(os.path.join(self.cache_dir, f) for f in self.cached_files()
+                        if f != os.path.basename(path_one))
+        size = os.path.getsize(path_one)
+        now = time.time()
+        os.utime(path_one, (now - 20, now - 20))
+        os.utime(path_two, (now - 10, now - 10))
+
+        # a hit makes `one` the most recently used
+        TickColumns.cached(one)
+        # both markets take about 2 * size: only `two` has to go
+        TickColumns.cached(Market.objects.all(), max_bytes=size * 3.5)
+        self.assertTrue(os.path.exists(path_one))
+        self.assertFalse(os.path.exists(path_two))
+        self.assertEqual(len(self.cached_files()), 2)
+
+    def test_walk_book(self):
+        book = np.array([[0.5, 10.0], [np.nan, np.nan], [0.6, 20.0], [0.7, 5.0], [np.nan, np.nan]])
+        self.assertEqual(walk_book(book, 15.0), (15.0, 0.5 * 10 + 0.6 * 5))
+        filled, cost = walk_book(book, 100.0)
+        self.assertEqual(filled, 35.0)
+        self.assertAlmostEqual(cost, 5 + 12 + 3.5)
+
+    def test_replay_fills_and_settles(self):
+        slug, cols, books = TickColumns.from_db().market(0)
+        market = MarketReplay(slug, cols, books, fee_rate=0.01)
+        market.i = 3
+        self.assertEqual(market.buy('up', 80.0), 50.0)
+        self.assertEqual(market.sell('up', 20.0), 20.0)
+        self.assertAlmostEqual(market.cash, -25.0 * 1.01 + 9.0 * 0.99)
+        result = market.settle()
+        # not labelled: the oracle rose, so Up won
+        self.assertEqual(result['resolved_side'], 'up')
+        self.assertAlmostEqual(result['pnl'], market.cash + 30.0)
+        self.assertEqual(result['fills'], 2)
+
+    def test_settle_trusts_the_label(self):
+        slug, cols, books = TickColumns.from_db().market(0)
+        market = MarketReplay(slug, cols, books, resolved_side='down')
+        market.buy('up', 10.0)
+        self.assertEqual(market.settle()['pnl'], -5.0)
+
+    def test_threshold_strategy(self):
+        result = run_backtest(ThresholdStrategy(field='lag', threshold=2.0), TickColumns.cached())
+        # lag starts at -3: Down is bought once per market, 50 shares at 0.50
+        self.assertEqual([m['final_down'] for m in result.markets], [50.0, 50.0])
+        self.assertEqual([m['pnl'] for m in result.markets], [-25.0, 25.0])
+        summary = result.summary
+        self.assertEqual((summary['traded'], summary['wins'], summary['pnl'], summary['cost']), (2, 1, 0.0, 50.0))
+        self.assertEqual(result.tick_count, 100)
+
+
+class SweepTests(CacheDirMixin, TestCase):
+    GRID = {'threshold': [1.0, 2.0, 3.5], 'max_seconds': [900, 880]}
+
+    def setUp(self):
+        super().setUp()
+        add_market('btc-updown-15m-1770000000', 1)
+        add_market('btc-updown-15m-1770000900', -1)
+        self.columns = TickColumns.cached()
+
+    def results(self, rows):
+        # everything but the timings
+        return [(params, {k: v for k, v in s.items() if k not in ('elapsed', 'ticks_per_sec')}) for params, s in rows]
+
+    def test_expand_grid(self):
+        self.assertEqual(expand_grid({'a': [1, 2], 'b': [3]}), [{'a': 1, 'b': 3}, {'a': 2, 'b': 3}])
+        self.assertEqual(len(expand_grid(self.GRID)), 6)
+
+    def test_workers_match_serial_run(self):
+        serial, _ = run_sweep(self.columns, self.GRID, base={'field': 'lag'}, processes=1)
+        parallel, _ = run_sweep(self.columns, self.GRID, base={'field': 'lag'}, processes=2)
+        self.assertEqual(self.results(serial), self.results(parallel))
+        self.assertEqual([params for params, _ in serial], expand_grid(self.GRID))
+        # |lag| never reaches 3.5: nothing traded
+        for params, summary in serial:
+            expected = 0 if params['threshold'] > 3 else 2
+            self.assertEqual(summary['traded'], expected, params)
+        direct = run_backtest(ThresholdStrategy(field='lag', threshold=2.0, max_seconds=880), self.columns)
+        self.assertEqual(serial[3][1]['pnl'], direct.summary['pnl'])
+
+    def test_save_sweep(self):
+        rows, elapsed = run_sweep(self.columns, self.GRID, base={'field': 'lag'}, processes=1)
+        run = save_sweep(self.columns, self.GRID, rows, elapsed, base={'field': 'lag'})
+        self.assertEqual((run.market_count, run.tick_count, run.field), (2, 100, 'lag'))
+        self.assertEqual(run.results.count(), 6)
+        self.assertEqual(run.results.first().pnl, max(s['pnl'] for _, s in rows))
+
+
+def delayed_prices(n, delay_steps, step_ms=250, seed=3, start_ms=1_770_000_000_000):
+    """(timestamps, oracle, binance): the oracle repeats Binance `delay_steps` grid points later."""
+    rng = np.random.default_rng(seed)
+    binance = 76_000.0 * np.exp(np.cumsum(rng.normal(0, 1e-4, n + delay_steps)))
+    timestamps = start_ms + np.arange(n) * step_ms
+    return timestamps, binance[:n], binance[delay_steps:]
+
+
+class LagTests(TestCase):
+    def test_cross_correlation_finds_shift(self):
+        rng = np.random.default_rng(0)
+        a = rng.normal(size=500)
+        shifts, corr = cross_correlation(a[5:], a[:-5], 20)
+        self.assertEqual(len(shifts), 41)
+        self.assertEqual(shifts[np.argmax(corr)], 5)
+        self.assertGreater(corr.max(), 0.99)
+
+    def test_recovers_oracle_delay(self):
+        timestamps, oracle, binance = delayed_prices(2000, 8)
+        result = analyze_series(timestamps, oracle, binance, lag=oracle - binance)
+        self.assertEqual(result['best_delay_ms'], 2000.0)
+        self.assertGreater(result['peak_corr'], 0.99)
+        self.assertEqual(len(result['curve']), 2 * 30_000 // 250 + 1)
+        self.assertAlmostEqual(result['lag_mean'], float(np.mean(oracle - binance)))
+
+    def test_not_enough_overlap(self):
+        nan = float('nan')
+        self.assertIsNone(analyze_series([0, 250, 500], [1.0, nan, nan], [nan, 1.0, 1.0]))
+
+    def test_refresh_only_changed_markets(self):
+        timestamps, oracle, binance = delayed_prices(400, 4, step_ms=1000)
+        market = Market.objects.create(slug='btc-updown-15m-1770000000')
+        add_ticks(market, timestamps.tolist(),
+                  oracle_btc_price=lambda i: float(oracle[i]), binance_btc_price=lambda i: float(binance[i]))
+        self.assertEqual(refresh_lag_analyses(), 1)
+        self.assertEqual(refresh_lag_analyses(), 0)
+        analysis = analyze_market(market, step_ms=1000)
+        self.assertEqual((analysis.tick_count, analysis.best_delay_ms), (400, 4000.0))
+
+        summary = aggregate_lag([analysis])
+        self.assertEqual((summary['markets'], summary['best_delay_ms']), (1, 4000.0))
+        self.assertEqual(sum(summary['hist_counts']), 1)
+
+
+class SimilarityTests(TestCase):
+    def test_trajectory_on_uniform_grid(self):
+        seconds = np.arange(900, -1, -1, dtype=np.float64)
+        path = trajectory(seconds, seconds * 2)
+        self.assertEqual(len(path), EMBED_POINTS)
+        self.assertEqual((path[0], path[-1]), (1800.0, 0.0))
+        self.assertIsNone(trajectory([900, 899], [1.0, float('nan')]))
+
+    def test_embedding_is_relative_to_strike(self):
+        seconds = np.array([900.0, 450.0, 0.0])
+        vectors = embed_ticks(seconds, [100.0, 101.0, 102.0], [0.5, 0.6, 0.7], strike=100.0)
+        self.assertAlmostEqual(float(vectors['binance'][-1]), 2.0, places=5)
+        self.assertAlmostEqual(float(vectors['microprice'][-1]), 0.2, places=5)
+        self.assertEqual(vectors['binance'].dtype, np.float32)
+
+    def test_approximate_search_matches_exact(self):
+        rng = np.random.default_rng(0)
+        vectors = np.cumsum(rng.normal(size=(2000, EMBED_POINTS)), axis=1).astype(np.float32)
+        index = SimilarityIndex([f'm{i}' for i in range(len(vectors))], vectors)
+        exact = index.search('m7', k=5)
+        self.assertEqual(len(exact), 5)
+        self.assertNotIn('m7', [slug for slug, _ in exact])
+        self.assertEqual([d for _, d in exact], sorted(d for _, d in exact))
+        brute = np.sqrt(((vectors - vectors[7]) ** 2).mean(axis=1))
+        brute[7] = np.inf
+        self.assertEqual([slug for slug, _ in exact], [f'm{i}' for i in np.argsort(brute)[:5]])
+        # LSH narrows the candidates but never returns a farther market as the nearest
+        approximate = index.search('m7', k=5, approximate=True)
+        self.assertEqual(len(approximate), 5)
+        self.assertGreaterEqual(approximate[0][1], exact[0][1] - 1e-6)
+        self.assertEqual(index.search('missing'), [])
+
+    def test_index_from_stored_embeddings(self):
+        for n, direction in enumerate([1, 1.1, -1]):
+            market = Market.objects.create(slug=f'btc-updown-15m-{1770000000 + n * 900}')
+            add_ticks(market, [1_770_000_000_000 + i * 1000 for i in range(100)],
+                      seconds_till_end=lambda i: 900 - i * 9,
+                      oracle_btc_price=100.0, binance_btc_price=lambda i: 100.0 + direction * i)
+        self.assertEqual(refresh_embeddings(), 3)
+        self.assertEqual(refresh_embeddings(), 0)
+        index = get_index('binance')
+        self.assertEqual(len(index), 3)
+        self.assertIs(get_index('binance'), index)
+        nearest = index.search('btc-updown-15m-1770000000', k=1)
+        self.assertEqual(nearest[0][0], 'btc-updown-15m-1770000900')
+        self.assertEqual(len(get_index('microprice')), 0)
+
+
+def feed_row(slug, ts, **extra):
+    """A feed row as LineDecoder produces it."""
+    row = {
+        'market_slug': slug, 'timestamp_ms': str(ts), 'seconds_till_end': '500',
+        'timestamp_et': datetime.fromtimestamp(ts / 1000).strftime('%Y-%m-%d %H:%M:%S.%f'),
+    }
+    row.update(extra)
+    return row
+
+
+# flush closes obsolete connections, which a TestCase transaction would not survive
+class RecorderTests(TransactionTestCase):
+    SLUG = 'btc-updown-15m-1770000000'
+
+    def setUp(self):
+        self.recorder = TickRecorder('127.0.0.1', 0, log=lambda message: None)
+        self.addCleanup(self.recorder.db.shutdown)
+
+    def stored(self):
+        return list(MarketTick.objects.order_by('id').values_list('timestamp_ms', flat=True))
+
+    def test_decoder(self):
+        decoder = LineDecoder()
+        with self.assertRaises(ValueError):
+            decoder.decode('a,1000')
+        self.assertIsNone(decoder.decode('market_slug,timestamp_ms\n'))
+        self.assertEqual(decoder.decode('a,1000'), {'market_slug': 'a', 'timestamp_ms': '1000'})
+        self.assertEqual(decoder.decode('{"market_slug": "b"}'), {'market_slug': 'b'})
+        self.assertIsNone(decoder.decode('  '))
+
+    def test_row_without_timestamp_rejected_mid_batch(self):
+        batch = [(0, feed_row(self.SLUG, 1000)), (0, feed_row(self.SLUG, 2000, timestamp_ms='')),
+                 (0, feed_row(self.SLUG, 3000, timestamp_et='garbage')), (0, feed_row(self.SLUG, 4000))]
+        self.recorder.flush(batch)
+        self.assertEqual(self.stored(), [1000, 4000])
+        self.assertEqual((self.recorder.stats.rejected, self.recorder.stats.written), (2, 2))
+
+    def test_duplicates_after_reconnect(self):
+        rows = [feed_row(self.SLUG, ts) for ts in (1000, 2000, 2000, 3000)]
+        self.recorder.flush([(0, None)] + [(0, row) for row in rows[:3]])
+        # the replay starts over and continues past the stored ticks
+        self.recorder.flush([(0, None)] + [(0, row) for row in rows])
+        self.assertEqual(self.stored(), [1000, 2000, 2000, 3000])
+        self.assertEqual(self.recorder.stats.duplicates, 3)
+
+        # a fresh recorder reads the last stamp from the database
+        recorder = TickRecorder('127.0.0.1', 0, log=lambda message: None)
+        self.addCleanup(recorder.db.shutdown)
+        recorder.flush([(0, row) for row in rows] + [(0, feed_row(self.SLUG, 3000))])
+        self.assertEqual(self.stored(), [1000, 2000, 2000, 3000, 3000])
+
+
+class OutcomeTests(TestCase):
+    def test_parse_slug(self):
+        start, end, minutes = parse_slug('btc-updown-15m-1770000000')
+        self.assertEqual((start.timestamp(), end.timestamp(), minutes), (1770000000, 1770000900, 15))
+        self.assertEqual(parse_slug('no-window'), (None, None, None))
+
+    def test_label_finished_market(self):
+        market = label_market(add_market('btc-updown-15m-1770000000', -1))
+        self.assertEqual((market.strike, market.final_price, market.resolved_side), (100.0, 51.0, 'down'))
+        self.assertEqual(market.max_abs_lag, 3.0)
+
+    def test_partial_market_not_labelled(self):
+        market = Market.objects.create(slug='btc-updown-15m-1770000000')
+        # the recording stops 850 seconds before the end
+        add_ticks(market, [1_770_000_000_000 + i * 1000 for i in range(50)],
+                  oracle_btc_price=lambda i: 100.0 + i, **BOOK)
+        label_market(market)
+        market.refresh_from_db()
+        self.assertEqual((market.strike, market.final_price, market.resolved_side), (100.0, None, ''))
+
+        # backtests of the unlabelled market do not guess the outcome either
+        slug, cols, books = TickColumns.from_db().market(0)
+        replay = MarketReplay(slug, cols, books)
+        replay.buy('up', 10.0)
+        result = replay.settle()
+        self.assertIsNone(result['resolved_side'])
+        # marked to the last best bid
+        self.assertAlmostEqual(result['pnl'], -5.0 + 10 * 0.45)
+
+    def test_running_market_not_labelled(self):
+        start = int(time.time()) - 60
+        market = add_market(f'btc-updown-15m-{start}', 1, start_ms=start * 1000)
+        self.assertEqual(label_market(market).resolved_side, '')
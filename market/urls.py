@@ -8,5 +8,9 @@ urlpatterns = [
     path('upload', views.upload_csv, name='upload_csv'),
     path('files/', views.files_list, name='files_list'),
     path('files/<slug:slug>/', views.file_detail, name='file_detail'),
+    path('files/<slug:slug>/similar/', views.similar_markets, name='similar_markets'),
     path('files/<slug:slug>/delete/', views.file_delete, name='file_delete'),
+    path('sweeps/', views.sweeps_list, name='sweeps_list'),
+    path('sweeps/<int:pk>/', views.sweep_detail, name='sweep_detail'),
+    path('lag/', views.lag_overview, name='lag_overview'),
 ]
\ No newline at end of file
@@ -1,15 +1,19 @@
 import csv
 import io
+import time
 from datetime import datetime
 
 from django.core.paginator import Paginator
 from django.db import transaction
-from django.db.models import Count
+from django.db.models import Count, Max
 from django.http import HttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.decorators.http import require_POST, require_GET
 
-from .models import Market, MarketTick
+from .lag import aggregate_lag, analyze_market
+from .models import LagAnalysis, Market, MarketTick, SweepRun
+from .outcome import label_market
+from .similarity import CHANNELS, embed_market, get_index
 
 
 def index(request):
@@ -24,6 +28,8 @@ def files_list(request):
     order = request.GET.get('order', 'desc')
     status = request.GET.get('status', 'all')
     has_comment = request.GET.get('has_comment', 'false')
+    side = request.GET.get('side', 'all')
+    min_lag = request.GET.get('min_lag', '').strip()
     page_number = request.GET.get('page', 1)
 
     markets = Market.objects.annotate(tick_count=Count('ticks'))
@@ -37,8 +43,21 @@ def files_list(request):
     if has_comment == 'true':
         markets = markets.exclude(comment='')
 
+    if side in ('up', 'down'):
+        markets = markets.filter(resolved_side=side)
+    elif side == 'unresolved':
+        markets = markets.filter(resolved_side='')
+
+    if min_lag:
+        try:
+            markets = markets.filter(max_abs_lag__gte=float(min_lag))
+        except ValueError:
+            min_lag = ''
+
     if sort == 'ticks':
         order_field = 'tick_count'
+    elif sort == 'start':
+        order_field = 'start_time'
     else:
         order_field = 'created_at'
 
@@ -57,6 +76,8 @@ def files_list(request):
         'order': order,
         'status': status,
         'has_comment': has_comment,
+        'side': side,
+        'min_lag': min_lag,
     }
 
     if request.headers.get('HX-Request'):
@@ -97,11 +118,36 @@ def file_detail(request, slug):
         'tick_fields': tick_fields,
         'timestamp_filter': timestamp_filter,
         'total_count': market.ticks.count(),
+        'lag_analysis': LagAnalysis.objects.filter(market=market).first(),
     }
 
     return render(request, 'market/file_detail.html', context)
 
 
+@require_GET
+def similar_markets(request, slug):
+    """Nearest markets by trajectory embedding (HTMX panel)."""
+    market = get_object_or_404(Market, slug=slug)
+    channel = request.GET.get('channel', 'binance')
+    if channel not in CHANNELS:
+        channel = 'binance'
+    approximate = request.GET.get('approx') == 'true'
+
+    started = time.perf_counter()
+    matches = get_index(channel).search(market.slug, k=5, approximate=approximate)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    context = {
+        'market': market,
+        'channel': channel,
+        'channels': [(name, label) for name, (_, label) in CHANNELS.items()],
+        'approximate': approximate,
+        'matches': matches,
+        'elapsed_ms': elapsed_ms,
+    }
+    return render(request, 'market/partials/similar_markets.html', context)
+
+
 @require_POST
 def file_delete(request, slug):
     """Delete a Market and all its ticks."""
@@ -116,6 +162,71 @@ def file_delete(request, slug):
     return redirect('market:files_list')
 
 
+@require_GET
+def sweeps_list(request):
+    """List parameter sweep runs."""
+    runs = SweepRun.objects.annotate(
+        result_count=Count('results'),
+        best_pnl=Max('results__pnl'),
+    )
+
+    paginator = Paginator(runs, 20)
+    page_obj = paginator.get_page(request.GET.get('page', 1))
+
+    return render(request, 'market/sweeps.html', {'page_obj': page_obj})
+
+
+SWEEP_SORT_FIELDS = ['pnl', 'roi', 'win_rate', 'traded', 'wins', 'cost']
+
+
+@require_GET
+def sweep_detail(request, pk):
+    """Sortable result table of one sweep run."""
+    run = get_object_or_404(SweepRun, pk=pk)
+    param_names = list(run.grid)
+
+    sort = request.GET.get('sort', 'pnl')
+    order = request.GET.get('order', 'desc')
+    if sort not in SWEEP_SORT_FIELDS and sort not in param_names:
+        sort = 'pnl'
+
+    order_field = sort if sort in SWEEP_SORT_FIELDS else f'params__{sort}'
+    if order == 'desc':
+        order_field = f'-{order_field}'
+
+    results = run.results.order_by(order_field, 'id')
+    paginator = Paginator(results, 100)
+    page_obj = paginator.get_page(request.GET.get('page', 1))
+
+    context = {
+        'run': run,
+        'page_obj': page_obj,
+        'param_names': param_names,
+        'metric_names': SWEEP_SORT_FIELDS,
+        'sort': sort,
+        'order': order,
+    }
+
+    if request.headers.get('HX-Request'):
+        return render(request, 'market/partials/sweep_table.html', context)
+
+    return render(request, 'market/sweep_detail.html', context)
+
+
+@require_GET
+def lag_overview(request):
+    """Oracle vs Binance cross-correlation across all analyzed markets."""
+    analyses = list(
+        LagAnalysis.objects.select_related('market').order_by('-market__created_at')
+    )
+
+    context = {
+        'analyses': analyses,
+        'aggregate': aggregate_lag(analyses),
+    }
+    return render(request, 'market/lag.html', context)
+
+
 @require_POST
 def upload_csv(request):
     files = request.FILES.getlist('files')
@@ -161,6 +272,10 @@ def process_csv_file(uploaded_file):
         with transaction.atomic():
             MarketTick.objects.bulk_create(ticks, batch_size=5000, ignore_conflicts=True)
 
+        label_market(market)
+        analyze_market(market)
+        embed_market(market)
+
         return {
             'filename': filename,
             'success': True,
@@ -1,14 +1,26 @@
 import sys
+import os
+import re
+import csv
 import json
+import time
+import argparse
 import datetime
-import openpyxl
-from openpyxl import Workbook
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from pathlib import Path
 import requests
 import matplotlib.pyplot as plt
 import numpy as np
 import matplotlib.patheffects as pe
 import matplotlib.ticker as ticker
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from proxy_wallet.client import PolymarketClient, default_cache
+from proxy_wallet.reports import CUMULATIVE_HEADER, EXPOSURE_HEADER, TRADE_HEADER, write_xlsx
+from proxy_wallet.tradefile import TradeFileError, collect_trades, iter_trades
+
 
 sys.stdout.reconfigure(encoding='utf-8')
 
@@ -22,10 +34,10 @@ STYLES = {
     ("Sell", "Down"):("#d40000", "o", "Sell NO")    # strong red
 }
 
-SEARCH_URL = "https://gamma-api.polymarket.com/public-search"
-TRADES_URL = "https://data-api.polymarket.com/trades"
 DEFAULT_TRADE_FILE = "trades.json"
 DEFAULT_REPORT_FILE = "report_path"
+DEFAULT_CHART_FILE = "chart.png"
+DEFAULT_EXCEL_FILE = "report.xlsx"
 PRICE_RESOLUTION_THRESHOLD = 0.5
 
 # ---------------------------------------------------
@@ -140,15 +152,15 @@ def write_stats_report(
     lines.append("Idx | Time                | Type | Side | Price(c) |   Shares   |    Cost($)")
     lines.append("----+---------------------+------+-----+----------+------------+------------")
 
-    for i, t in enumerate(trades):
-        dt_str = datetime.datetime.fromtimestamp(t['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
-        lines.append(
-            f"{i+1:3d} | {dt_str} | {t['type']:<4} | {t['side']:<4} | "
-            f"{t['price']:8.2f} | {t['shares']:10.2f} | $ {t['cost']:9.2f}"
-        )
-
+    # Trade rows are written as they are formatted, not collected first
     with open(report_path, "w", encoding='utf-8') as f:
         f.write("\n".join(lines))
+        for i, t in enumerate(trades):
+            dt_str = datetime.datetime.fromtimestamp(t['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
+            f.write(
+                f"\n{i+1:3d} | {dt_str} | {t['type']:<4} | {t['side']:<4} | "
+                f"{t['price']:8.2f} | {t['shares']:10.2f} | $ {t['cost']:9.2f}"
+            )
 
 
 def write_stats_report_to_excel(
@@ -182,29 +194,36 @@ def write_stats_report_to_excel(
     prices,
     trades,
 ):
-    # Create a new workbook and get the active sheet
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Trades Report"
-
-    # Add header row for Excel sheet
-    ws.append(["Idx", "Time", "Type", "Side", "Price(c)", "Shares", "Cost($)"])
-
-    # Iterate through trades and add them to the Excel sheet
-    for i, t in enumerate(trades):
-        dt_str = datetime.datetime.fromtimestamp(t['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
-        ws.append([
-            i + 1,  # Idx
-            dt_str,  # Time
-            t['type'],  # Type
-            t['side'],  # Side
-            t['price'],  # Price
-            t['shares'],  # Shares
-            t['cost']  # Cost
-        ])
-
-    # Save the workbook to the specified path
-    wb.save(report_path)
+    def time_str(t):
+        return datetime.datetime.fromtimestamp(t['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
+
+    def trade_rows():
+        for i, t in enumerate(trades):
+            yield [i + 1, time_str(t), t['type'], t['side'], t['price'], t['shares'], t['cost']]
+
+    def exposure_rows():
+        for i, t in enumerate(trades):
+            yield [i + 1, time_str(t), float(yes_curve[i]), float(no_curve[i]), float(net_curve[i]),
+                   float(yes_sh_curve[i]), float(no_sh_curve[i]), float(net_sh_curve[i])]
+
+    def cumulative_rows():
+        yes_sh = no_sh = yes_cost = no_cost = 0.0
+        for i, t in enumerate(trades):
+            if t['type'] == "Buy":
+                if t['side'] == "Up":
+                    yes_sh += t['shares']
+                    yes_cost += t['cost']
+                else:
+                    no_sh += t['shares']
+                    no_cost += t['cost']
+            yield [i + 1, time_str(t), yes_sh, no_sh, yes_cost, no_cost]
+
+    # Write-only workbook: rows go straight to disk, sheets are generated lazily
+    write_xlsx(report_path, [
+        ("Trades Report", TRADE_HEADER, trade_rows()),
+        ("Exposure", EXPOSURE_HEADER, exposure_rows()),
+        ("Cumulative", CUMULATIVE_HEADER, cumulative_rows()),
+    ])
 
     print(f"Report saved to {report_path}")
 
@@ -213,58 +232,26 @@ def write_stats_report_to_excel(
 # ---------------------------------------------------
 # DATA FETCHING
 # ---------------------------------------------------
-def search_market(query):
+def search_market(query, client=None):
     """Return (event, market) for the first matching search result."""
+    client = client or PolymarketClient(cache=default_cache())
     try:
-        resp = requests.get(SEARCH_URL, params={"q": query}, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
+        results = client.search_markets(query)
     except requests.RequestException as exc:
         print(f"Error searching market: {exc}")
         return None, None
 
-    events = data.get("events", []) if isinstance(data, dict) else []
-    for event in events:
-        markets = event.get("markets") or []
-        if markets:
-            return event, markets[0]
-    return None, None
-
+    return results[0] if results else (None, None)
 
-def fetch_trades(condition_id, user_address, page_limit=500):
-    """Fetch all trades for a condition/user with simple pagination."""
-    all_trades = []
-    offset = 0
 
-    while True:
-        params = {
-            "limit": page_limit,
-            "offset": offset,
-            "takerOnly": "false",
-            "market": condition_id,
-            "user": user_address,
-        }
-        try:
-            resp = requests.get(TRADES_URL, params=params, timeout=15)
-            resp.raise_for_status()
-            data = resp.json()
-        except requests.RequestException as exc:
-            print(f"Error fetching trades: {exc}")
-            return []
-
-        if isinstance(data, dict):
-            batch = data.get("trades", [])
-        elif isinstance(data, list):
-            batch = data
-        else:
-            batch = []
-
-        all_trades.extend(batch)
-        if len(batch) < page_limit:
-            break
-        offset += page_limit
-
-    return all_trades
+def fetch_trades(condition_id, user_address, client=None):
+    """Fetch all trades for a condition/user (pages are fetched concurrently)."""
+    client = client or PolymarketClient(cache=default_cache())
+    try:
+        return client.fetch_trades(condition_id, user_address)
+    except requests.RequestException as exc:
+        print(f"Error fetching trades: {exc}")
+        return []
 
 
 def prompt_resolved_side(current=None):
@@ -319,27 +306,32 @@ def main():
     json_file = sys.argv[2] if len(sys.argv) > 2 else None
 
     if json_file:
+        # JSON array, NDJSON or gzip of either, streamed straight into the compact array
         try:
-            with open(json_file, "r") as f:
-                raw_data = json.load(f)
+            with open(json_file, "rb") as f:
+                trades, first, latest = collect_trades(iter_trades(f))
         except FileNotFoundError:
             print(f"Error: File '{json_file}' not found.")
             return
-        except json.JSONDecodeError:
+        except TradeFileError as e:
+            print(f"Error: {e}.")
+            return
+        except (ValueError, EOFError, OSError):
             print(f"Error: File '{json_file}' is not valid JSON.")
             return
-        if not raw_data:
+        if not len(trades):
             print("No trades found.")
             return
-        market_title = raw_data[0].get("title", "Unknown Market")
-        condition_id = raw_data[0].get("conditionId", "")
+        market_title = first.get("title", "Unknown Market")
+        condition_id = first.get("conditionId", "")
     else:
         market_query = input("Enter market name to search: ").strip()
         if not market_query:
             print("Market name is required.")
             return
 
-        event, market = search_market(market_query)
+        client = PolymarketClient(cache=default_cache())
+        event, market = search_market(market_query, client)
         if not market:
             print("No market found for that query.")
             return
@@ -358,7 +350,7 @@ def main():
             print("User address is required.")
             return
 
-        raw_data = fetch_trades(condition_id, user_address)
+        raw_data = fetch_trades(condition_id, user_address, client)
         if not raw_data:
             print("No trades returned for that user/market.")
             return
@@ -367,49 +359,62 @@ def main():
             json.dump(raw_data, f, indent=2)
         print(f"Saved {len(raw_data)} trades to {DEFAULT_TRADE_FILE}")
 
-    # Sort by timestamp
-    raw_data.sort(key=lambda x: x.get("timestamp", 0))
+        trades, first, latest = collect_trades(raw_data)
+        del raw_data
 
-    # Parse trades
-    parsed = []
-    target_market = market_title or raw_data[0].get("title", "Unknown Market")
+    target_market = market_title or first.get("title", "Unknown Market")
+
+    resolved_side = decide_resolved_side(resolved_arg, latest)
+    if not resolved_side:
+        return
 
-    # Decide resolved side: explicit > inferred > prompt
-    resolved_side = None
+    write_outputs(trades, target_market, resolved_side)
+
+
+def decide_resolved_side(resolved_arg, latest, interactive=True):
+    """Explicit > inferred from the latest trade > prompt (interactive only); None when undecided."""
     if resolved_arg in {"YES", "NO"}:
-        resolved_side = resolved_arg
-    else:
-        inferred, latest = infer_resolved_side_from_trades(raw_data)
-        if inferred:
-            resolved_side = inferred
-            price = float(latest.get("price", 0))
-            outcome = latest.get("outcome", "")
-            ts = latest.get("timestamp", 0)
-            print(f"Inferred resolved side: {resolved_side} (latest trade outcome {outcome} at price {price:.2f}, ts {ts})")
-        else:
-            if resolved_arg == "AUTO":
-                print("Could not infer resolved side automatically.")
-                return
-            resolved_side = prompt_resolved_side(None)
-            if not resolved_side:
-                print("Resolved side is required.")
-                return
-
-    for item in raw_data:
-        entry = {}
-        raw_side = item.get("side", "BUY").upper()
-        entry["type"] = "Buy" if raw_side == "BUY" else "Sell"
-        entry["market"] = item.get("title", "")
-        entry["side"] = item.get("outcome", "Up") 
-        entry["price"] = float(item.get("price", 0)) * 100.0  # Convert to cents
-        entry["shares"] = float(item.get("size", 0))
-        entry["cost"] = float(item.get("price", 0)) * entry["shares"]
-        entry["timestamp"] = int(item.get("timestamp", 0))
-        parsed.append(entry)
+        return resolved_arg
+
+    inferred, latest = infer_resolved_side_from_trades([latest] if latest else [])
+    if inferred:
+        price = float(latest.get("price", 0))
+        outcome = latest.get("outcome", "")
+        ts = latest.get("timestamp", 0)
+        print(f"Inferred resolved side: {inferred} (latest trade outcome {outcome} at price {price:.2f}, ts {ts})")
+        return inferred
+
+    if resolved_arg == "AUTO" or not interactive:
+        print("Could not infer resolved side automatically.")
+        return None
+    resolved_side = prompt_resolved_side(None)
+    if not resolved_side:
+        print("Resolved side is required.")
+    return resolved_side
+
+
+def write_outputs(trades, target_market, resolved_side, out_dir="."):
+    """Chart, text report and Excel report of a TRADE_DTYPE array, written into `out_dir`."""
+    chart_path = os.path.join(out_dir, DEFAULT_CHART_FILE)
+    report_path = os.path.join(out_dir, DEFAULT_REPORT_FILE)
+    excel_path = os.path.join(out_dir, DEFAULT_EXCEL_FILE)
+
+    # Parse trades (already sorted by timestamp)
+    parsed = []
+    for ts, is_buy, is_yes, price, shares, cost in zip(*(trades[name].tolist() for name in trades.dtype.names)):
+        parsed.append({
+            "type": "Buy" if is_buy else "Sell",
+            "market": target_market,
+            "side": "Up" if is_yes else "Down",
+            "price": price,  # cents
+            "shares": shares,
+            "cost": cost,
+            "timestamp": ts,
+        })
 
     if not parsed:
         print("No entries found.")
-        return
+        return 0
 
     prices = [e["price"] for e in parsed]
 
@@ -791,11 +796,11 @@ def main():
         axis.set_xlim(*xlim_range)
 
     plt.tight_layout()
-    plt.savefig("chart.png", dpi=200, bbox_inches="tight")
+    plt.savefig(chart_path, dpi=200, bbox_inches="tight")
     plt.close('all')
 
     write_stats_report(
-        DEFAULT_REPORT_FILE,
+        report_path,
         target_market,
         resolved_side,
         len(parsed),
@@ -826,10 +831,10 @@ def main():
         parsed,
     )
 
-    print("Chart saved as chart.png")
+    print(f"Chart saved as {chart_path}")
 
     write_stats_report_to_excel(
-        "report.xlsx",
+        excel_path,
         target_market,
         resolved_side,
         len(parsed),
@@ -860,10 +865,192 @@ def main():
         parsed,  # предполагается, что parsed — это список с сделками
     )
 
-    print(f"Stats report saved as {DEFAULT_REPORT_FILE}")
+    print(f"Stats report saved as {report_path}")
 
-    # print(f"Stats report saved as {DEFAULT_REPORT_FILE}")
+    return len(parsed)
+
+
+# ---------------------------------------------------
+# BATCH MODE
+# ---------------------------------------------------
+# python main.py batch manifest.csv [--out DIR] [--workers N]
+#
+# Manifest: CSV with a header row and the columns
+#   market         search query or condition id (0x + 64 hex)
+#   wallet         user address
+#   resolved_side  YES / NO / AUTO (optional, AUTO = infer from the latest trade)
+# Every row becomes a job directory under --out with trades.json, the chart,
+# both reports, log.txt and job.json; summary.csv lists all jobs.
+
+CONDITION_ID_RE = re.compile(r"^0x[0-9a-fA-F]{64}$")
+SUMMARY_FIELDS = [
+    "job", "status", "market", "wallet", "condition_id", "market_title", "resolved_side",
+    "trades", "fetch_s", "analysis_s", "seconds", "error", "dir",
+]
+
+_worker_client = None
+
+
+def worker_client():
+    """One client (and cache connection) per worker process."""
+    global _worker_client
+    if _worker_client is None:
+        _worker_client = PolymarketClient(cache=default_cache())
+    return _worker_client
+
+
+def slugify(value, length=40):
+    return re.sub(r"[^a-zA-Z0-9]+", "-", value).strip("-")[:length] or "job"
+
+
+def read_manifest(path):
+    """Manifest rows as job dicts; raises ValueError naming the bad line."""
+    jobs = []
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        lines = (line for line in f if line.strip() and not line.lstrip().startswith("#"))
+        reader = csv.DictReader(lines)
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+        for n, row in enumerate(reader, 2):
+            market = (row.get("market") or "").strip()
+            wallet = (row.get("wallet") or "").strip()
+            side = (row.get("resolved_side") or "").strip() or "AUTO"
+            if not market or not wallet:
+                raise ValueError(f"row {n}: market and wallet are required")
+            if normalize_resolved_arg(side) is None:
+                raise ValueError(f"row {n}: resolved_side must be YES, NO or AUTO, got {side!r}")
+            jobs.append({"market": market, "wallet": wallet, "resolved_side": normalize_resolved_arg(side)})
+    return jobs
+
+
+def run_job(index, job, out_root):
+    """Fetch and report one manifest row; returns its summary row (never raises)."""
+    started = time.perf_counter()
+    job_dir = os.path.join(out_root, f"{index:04d}-{slugify(job['wallet'], 12)}-{slugify(job['market'])}")
+    os.makedirs(job_dir, exist_ok=True)
+    result = {
+        "job": index, "status": "failed", "market": job["market"], "wallet": job["wallet"],
+        "condition_id": "", "market_title": "", "resolved_side": "", "trades": 0,
+        "fetch_s": 0.0, "analysis_s": 0.0, "seconds": 0.0, "error": "", "dir": job_dir,
+    }
+
+    with open(os.path.join(job_dir, "log.txt"), "w", encoding="utf-8") as log, redirect_stdout(log):
+        try:
+            client = worker_client()
+            market_title = None
+            if CONDITION_ID_RE.match(job["market"]):
+                condition_id = job["market"]
+            else:
+                results = client.search_markets(job["market"])
+                if not results:
+                    raise LookupError("no market found for that query")
+                event, market = results[0]
+                condition_id = market.get("conditionId") or ""
+                market_title = market.get("question") or market.get("title") or event.get("title")
+                print(f"Found market: {market_title}")
+            result["condition_id"] = condition_id
+
+            raw_data = client.fetch_trades(condition_id, job["wallet"])
+            with open(os.path.join(job_dir, DEFAULT_TRADE_FILE), "w") as f:
+                json.dump(raw_data, f)
+            print(f"Saved {len(raw_data)} trades to {DEFAULT_TRADE_FILE}")
+            trades, first, latest = collect_trades(raw_data)
+            del raw_data
+            result["fetch_s"] = time.perf_counter() - started
+
+            if not len(trades):
+                result["status"] = "empty"
+            else:
+                result["market_title"] = market_title or first.get("title", "Unknown Market")
+                resolved_side = decide_resolved_side(job["resolved_side"], latest, interactive=False)
+                if not resolved_side:
+                    raise ValueError("could not infer resolved side")
+                result["resolved_side"] = resolved_side
+
+                analysis_started = time.perf_counter()
+                result["trades"] = write_outputs(trades, result["market_title"], resolved_side, job_dir)
+                result["analysis_s"] = time.perf_counter() - analysis_started
+                result["status"] = "ok"
+        except Exception as exc:
+            result["error"] = f"{type(exc).__name__}: {exc}"
+            traceback.print_exc(file=log)
+
+    result["seconds"] = time.perf_counter() - started
+    with open(os.path.join(job_dir, "job.json"), "w") as f:
+        json.dump(result, f, indent=2)
+    return result
+
+
+def print_batch_summary(results, elapsed, workers, out_root):
+    counts = {status: sum(r["status"] == status for r in results) for status in ("ok", "empty", "failed")}
+    done = [r for r in results if r["status"] == "ok"]
+    trades = sum(r["trades"] for r in results)
+
+    print("")
+    print(f"Jobs: {len(results)} (ok {counts['ok']}, empty {counts['empty']}, failed {counts['failed']}) "
+          f"in {elapsed:.1f}s with {workers} workers")
+    print(f"Throughput: {len(results) / elapsed:.2f} jobs/s, {trades / elapsed:,.0f} trades/s ({trades:,} trades)")
+    if done:
+        print(f"Per job (ok): fetch {sum(r['fetch_s'] for r in done) / len(done):.2f}s, "
+              f"analysis {sum(r['analysis_s'] for r in done) / len(done):.2f}s mean")
+        slowest = max(done, key=lambda r: r["seconds"])
+        print(f"Slowest: job {slowest['job']} ({slowest['trades']:,} trades) {slowest['seconds']:.1f}s")
+    for r in results:
+        if r["status"] == "failed":
+            print(f"  failed job {r['job']}: {r['market']} / {r['wallet']}: {r['error']}")
+    print(f"Outputs in {out_root} (summary.csv)")
+
+
+def batch_main(argv):
+    parser = argparse.ArgumentParser(prog="main.py batch", description="Reports for every row of a manifest.")
+    parser.add_argument("manifest", help="CSV with market, wallet and optional resolved_side columns")
+    parser.add_argument("--out", default="batch_out", help="Root directory for the per-job outputs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    args = parser.parse_args(argv)
+
+    try:
+        jobs = read_manifest(args.manifest)
+    except (OSError, ValueError) as exc:
+        print(f"Error: manifest {args.manifest}: {exc}")
+        return 2
+    if not jobs:
+        print("Manifest has no jobs.")
+        return 2
+
+    # Workers render charts without a display
+    plt.switch_backend("Agg")
+    os.makedirs(args.out, exist_ok=True)
+    workers = max(1, min(args.workers, len(jobs)))
+    print(f"Running {len(jobs)} jobs with {workers} workers into {args.out}")
+
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_job, i, job, args.out): (i, job) for i, job in enumerate(jobs, 1)}
+        for future in as_completed(futures):
+            try:
+                r = future.result()
+            except Exception as exc:
+                # The worker process itself died
+                i, job = futures[future]
+                r = {field: "" for field in SUMMARY_FIELDS}
+                r.update(job=i, status="failed", market=job["market"], wallet=job["wallet"],
+                         trades=0, fetch_s=0.0, analysis_s=0.0, seconds=0.0, error=f"{type(exc).__name__}: {exc}")
+            results.append(r)
+            print(f"[{len(results)}/{len(jobs)}] {r['status']:<6} job {r['job']} {r['wallet'][:12]} "
+                  f"{(r['market_title'] or r['market'])[:40]} {r['trades']} trades {r['seconds']:.1f}s {r['error']}")
+    elapsed = time.perf_counter() - started
+
+    results.sort(key=lambda r: r["job"])
+    with open(os.path.join(args.out, "summary.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+    print_batch_summary(results, elapsed, workers, args.out)
+    return 0 if all(r["status"] != "failed" for r in results) else 1
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        sys.exit(batch_main(sys.argv[2:]))
     main()
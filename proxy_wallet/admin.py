@@ -1,3 +1,48 @@
 from django.contrib import admin
+from .models import CatalogEvent, CatalogMarket, Trade, WalletAnalysis, WalletLedger, WalletTradeSet
 
-# Register your models here.
+
+@admin.register(WalletTradeSet)
+class WalletTradeSetAdmin(admin.ModelAdmin):
+    list_display = ['market_title', 'user_address', 'source', 'resolved_side', 'trade_count', 'updated_at']
+    list_filter = ['source', 'resolved_side']
+    search_fields = ['market_title', 'user_address', 'condition_id']
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(Trade)
+class TradeAdmin(admin.ModelAdmin):
+    list_display = ['trade_set', 'timestamp', 'side', 'outcome', 'price', 'size', 'transaction_hash']
+    list_filter = ['side', 'outcome']
+    search_fields = ['proxy_wallet', 'condition_id', 'transaction_hash']
+
+
+@admin.register(WalletAnalysis)
+class WalletAnalysisAdmin(admin.ModelAdmin):
+    list_display = ['trade_set', 'resolved_side', 'trade_count', 'computed_at']
+    readonly_fields = ['computed_at']
+    exclude = ['data']
+
+
+@admin.register(WalletLedger)
+class WalletLedgerAdmin(admin.ModelAdmin):
+    list_display = ['trade_set', 'trade_count', 'updated_at']
+    readonly_fields = ['updated_at']
+    exclude = ['series']
+
+
+@admin.register(CatalogEvent)
+class CatalogEventAdmin(admin.ModelAdmin):
+    list_display = ['title', 'slug', 'closed', 'end_date', 'synced_at']
+    list_filter = ['closed']
+    search_fields = ['title', 'slug', 'event_id']
+    readonly_fields = ['synced_at']
+
+
+@admin.register(CatalogMarket)
+class CatalogMarketAdmin(admin.ModelAdmin):
+    list_display = ['question', 'condition_id', 'closed', 'resolved_side', 'end_date', 'synced_at']
+    list_filter = ['closed', 'resolved_side']
+    search_fields = ['question', 'slug', 'condition_id']
+    raw_id_fields = ['event']
+    readonly_fields = ['synced_at']
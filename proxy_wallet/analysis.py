@@ -0,0 +1,168 @@
+"""Persisted analysis results in a compact columnar encoding.
+
+Per-trade columns (timestamps, prices, sizes and the exposure curves) are
+stored as float32/uint32 arrays back to back in one blob; trade_feed turns
+a zoom range of it into time buckets (or single trades) for the
+interactive chart.
+"""
+import numpy as np
+
+from .models import WalletAnalysis
+
+
+# name -> little-endian dtype; 4-byte columns first so every typed array is aligned
+ANALYSIS_COLUMNS = (
+    ('timestamp', '<u4'),
+    ('price', '<f4'),          # cents
+    ('shares', '<f4'),
+    ('cost', '<f4'),
+    ('yes_curve', '<f4'),      # $ exposure
+    ('no_curve', '<f4'),
+    ('yes_sh_curve', '<f4'),   # share exposure
+    ('no_sh_curve', '<f4'),
+    ('flags', 'u1'),           # bit 0: buy, bit 1: YES (Up)
+)
+FLAG_BUY = 1
+FLAG_YES = 2
+
+
+def pack_columns(trades, metrics):
+    """Trade array (TRADE_DTYPE) + metrics -> bytes."""
+    flags = trades['is_buy'].astype(np.uint8) * FLAG_BUY + trades['is_yes'].astype(np.uint8) * FLAG_YES
+    source = {
+        'timestamp': trades['timestamp'],
+        'price': trades['price'],
+        'shares': trades['shares'],
+        'cost': trades['cost'],
+        'flags': flags,
+    }
+    return b''.join(
+        np.ascontiguousarray(source[name] if name in source else metrics[name], dtype=dtype).tobytes()
+        for name, dtype in ANALYSIS_COLUMNS
+    )
+
+
+def unpack_columns(blob, n):
+    """bytes -> {column: array} for n trades."""
+    out, offset = {}, 0
+    for name, dtype in ANALYSIS_COLUMNS:
+        dtype = np.dtype(dtype)
+        out[name] = np.frombuffer(blob, dtype=dtype, count=n, offset=offset)
+        offset += n * dtype.itemsize
+    return out
+
+
+def summary_of(metrics):
+    """Only the scalar metrics (what the page renders up front)."""
+    return {k: v for k, v in metrics.items() if not isinstance(v, np.ndarray)}
+
+
+def save_analysis(trade_set, trades, metrics, resolved_side):
+    analysis, _ = WalletAnalysis.objects.update_or_create(
+        trade_set=trade_set,
+        defaults={
+            'resolved_side': resolved_side,
+            'trade_count': len(trades),
+            'summary': summary_of(metrics),
+            'data': pack_columns(trades, metrics),
+        },
+    )
+    return analysis
+
+
+# Interactive chart feed: at most ~FEED_POINTS buckets per view; a range with
+# no more than FEED_MAX_TRADES trades is sent trade by trade
+FEED_POINTS = 400
+FEED_MAX_TRADES = 1500
+BUCKET_STEPS = (1, 2, 5, 10, 15, 30, 60, 120, 300, 600, 900, 1800, 3600, 7200, 21600, 43200, 86400)
+
+
+def bucket_seconds(span, points=FEED_POINTS):
+    """Smallest 'round' bucket that splits `span` seconds into <= points buckets."""
+    for step in BUCKET_STEPS:
+        if span / step <= points:
+            return step
+    return int(np.ceil(span / points / 86400)) * 86400
+
+
+def rounded(values, digits=4):
+    return np.round(values.astype(np.float64), digits).tolist()
+
+
+def side_buckets(bucket_ids, price, shares, cost):
+    """OHLC price + summed shares/cost per bucket of one side (inputs in time order)."""
+    if not len(bucket_ids):
+        return np.array([], dtype=np.int64), {}
+    starts = np.flatnonzero(np.r_[True, bucket_ids[1:] != bucket_ids[:-1]])
+    ends = np.r_[starts[1:], len(bucket_ids)]
+    return bucket_ids[starts], {
+        'o': price[starts] / 100,
+        'h': np.maximum.reduceat(price, starts) / 100,
+        'l': np.minimum.reduceat(price, starts) / 100,
+        'c': price[ends - 1] / 100,
+        'shares': np.add.reduceat(shares.astype(np.float64), starts),
+        'cost': np.add.reduceat(cost.astype(np.float64), starts),
+        'n': (ends - starts).astype(np.float64),
+    }
+
+
+def trade_feed(columns, start=None, end=None, points=FEED_POINTS, max_trades=FEED_MAX_TRADES):
+    """JSON-ready view of the trades in [start, end] (unix seconds).
+
+    Dense ranges are bucketed by time (per-side OHLC, shares, cost, count and
+    the share exposure at the end of each bucket); sparse ones come back as
+    individual trades.
+    """
+    ts = columns['timestamp']
+    n = len(ts)
+    first, last = (int(ts[0]), int(ts[-1])) if n else (0, 0)
+    start = first if start is None else max(int(start), first)
+    end = last if end is None else min(int(np.ceil(end)), last)
+    lo = np.searchsorted(ts, start, side='left')
+    hi = np.searchsorted(ts, end, side='right')
+    feed = {'range': [first, last], 'start': start, 'end': end, 'count': int(max(hi - lo, 0))}
+
+    sl = slice(lo, hi)
+    t = ts[sl].astype(np.int64)
+    price, shares, cost = columns['price'][sl], columns['shares'][sl], columns['cost'][sl]
+    flags = columns['flags'][sl]
+    yes_sh, no_sh = columns['yes_sh_curve'][sl], columns['no_sh_curve'][sl]
+    is_yes = (flags & FLAG_YES) != 0
+
+    if hi - lo <= max_trades:
+        feed['bucket'] = 0
+        feed['trades'] = {
+            't': t.tolist(),
+            'price': rounded(price / 100),
+            'shares': rounded(shares, 2),
+            'cost': rounded(cost),
+            'up': is_yes.tolist(),
+            'buy': ((flags & FLAG_BUY) != 0).tolist(),
+            'yes_sh': rounded(yes_sh, 2),
+            'no_sh': rounded(no_sh, 2),
+        }
+        return feed
+
+    bucket = bucket_seconds(max(end - start, 1), points)
+    ids = (t - start) // bucket
+    all_ids = np.unique(ids)
+    last_in_bucket = np.searchsorted(ids, all_ids, side='right') - 1
+
+    feed['bucket'] = bucket
+    feed['buckets'] = {
+        't': ((start + all_ids * bucket) * 1000).tolist(),
+        'yes_sh': rounded(yes_sh[last_in_bucket], 2),
+        'no_sh': rounded(no_sh[last_in_bucket], 2),
+    }
+    for name, mask in (('up', is_yes), ('down', ~is_yes)):
+        side_ids, stats = side_buckets(ids[mask], price[mask], shares[mask], cost[mask])
+        # Выравнивание на общую сетку бакетов: None где у стороны не было сделок
+        position = np.searchsorted(all_ids, side_ids)
+        out = {}
+        for key, values in stats.items():
+            column = [None] * len(all_ids)
+            for p, v in zip(position.tolist(), rounded(values)):
+                column[p] = v
+            out[key] = column
+        feed['buckets'][name] = out
+    return feed
@@ -0,0 +1,122 @@
+"""Batch analysis of many wallets on one market (leaderboard).
+
+Trades of every wallet are fetched on a thread pool (one sequential pager
+per wallet, up to WALLET_BATCH_WORKERS wallets at once) and the vectorized
+metrics run on the same pool. Only the database writes happen on the calling
+thread. No charts are rendered here: a row gets its chart when it is opened.
+"""
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+
+from .client import PolymarketClient
+from .trades import store_trade_set
+
+
+ADDRESS_RE = re.compile(r'0x[0-9a-fA-F]{40}')
+
+
+def parse_wallet_list(text):
+    """Wallet addresses in `text` (any separators), lowercased, first occurrence order."""
+    seen = {}
+    for match in ADDRESS_RE.findall(text or ''):
+        seen.setdefault(match.lower(), None)
+    return list(seen)
+
+
+def batch_client(shared, workers):
+    """Client for a batch: pages of one wallet in sequence, wallets in parallel."""
+    return PolymarketClient(
+        search_url=shared.search_url, trades_url=shared.trades_url, markets_url=shared.markets_url,
+        max_workers=1, page_limit=shared.page_limit, timeout=shared.timeout,
+        cache=shared.cache, offline=shared.offline,
+        search_ttl=shared.search_ttl, trades_ttl=shared.trades_ttl,
+        pool_size=workers,
+    )
+
+
+def fetch_wallet(client, condition_id, address):
+    """(address, raw trades, error message or None)."""
+    try:
+        return address, client.fetch_trades(condition_id, address), None
+    except requests.RequestException as exc:
+        return address, [], str(exc)
+
+
+def wallet_row(address, raw_trades, resolved_side):
+    """Leaderboard row of one wallet (metrics only, nothing is stored)."""
+    from .views import calculate_metrics, parse_trades, trades_array
+
+    trades = trades_array(parse_trades(raw_trades))
+    metrics = calculate_metrics(trades, resolved_side)
+    return {
+        'address': address,
+        'trade_count': metrics['trade_count'],
+        'pnl': round(metrics['current_pnl'], 2),
+        'pnl_pct': round(metrics['current_pnl_pct'], 1),
+        'volume': round(float(trades['cost'].sum()), 2),
+        'peak_exposure': round(float(metrics['net_curve'].max()), 2),
+        'remaining_yes': round(metrics['remaining_yes'], 2),
+        'remaining_no': round(metrics['remaining_no'], 2),
+    }
+
+
+def run_batch(client, condition_id, addresses, resolved_side=None, workers=None):
+    """Fetch, store and analyze every wallet; returns (rows, failed, resolved_side).
+
+    rows are sorted by PnL (best first) and carry the trade_set_id to open;
+    failed is a list of {'address', 'error'} for wallets with no usable trades.
+    Without `resolved_side` it is inferred from the latest trade of the market
+    across all wallets; only an inferred side is stored on the shared trade sets.
+    """
+    from .views import infer_resolved_side_from_trades
+
+    chosen = resolved_side
+    workers = max(1, workers or settings.WALLET_BATCH_WORKERS)
+    client = batch_client(client, workers)
+    failed, fetched = [], {}
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='wallet-batch') as pool:
+            for address, raw_trades, error in pool.map(
+                lambda a: fetch_wallet(client, condition_id, a), addresses,
+            ):
+                if error:
+                    failed.append({'address': address, 'error': error})
+                elif not raw_trades:
+                    failed.append({'address': address, 'error': 'No trades found'})
+                else:
+                    fetched[address] = raw_trades
+
+            if not resolved_side:
+                latest = [max(t, key=lambda x: x.get('timestamp', 0)) for t in fetched.values()]
+                resolved_side, _ = infer_resolved_side_from_trades(latest)
+
+            rows = list(pool.map(
+                lambda item: wallet_row(item[0], item[1], resolved_side), fetched.items(),
+            ))
+    finally:
+        client.close()
+
+    for row in rows:
+        trade_set = store_trade_set(fetched[row['address']], condition_id, row['address'], source='api')
+        if not chosen and resolved_side and trade_set.resolved_side != resolved_side:
+            trade_set.resolved_side = resolved_side
+            trade_set.save(update_fields=['resolved_side'])
+        row['trade_set_id'] = trade_set.pk
+        row['market_title'] = trade_set.market_title
+
+    rows.sort(key=lambda r: r['pnl'], reverse=True)
+    return rows, failed, resolved_side or ''
+
+
+def batch_totals(rows):
+    """Sums over the leaderboard."""
+    return {
+        'wallets': len(rows),
+        'pnl': round(sum(r['pnl'] for r in rows), 2),
+        'volume': round(sum(r['volume'] for r in rows), 2),
+        'trade_count': sum(r['trade_count'] for r in rows),
+        'winners': sum(1 for r in rows if r['pnl'] > 0),
+    }
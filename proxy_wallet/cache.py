@@ -0,0 +1,135 @@
+"""Persistent response cache for the Polymarket APIs (SQLite, one file).
+
+Entries are keyed by endpoint + sorted query parameters and carry their own
+expiry (None = never expires). The file is bounded by ``max_bytes``; the
+least recently used entries are evicted first. Expired entries are kept
+until evicted so offline mode can still serve them.
+
+The total size is tracked in memory and re-read from the file every
+``RESYNC_WRITES`` writes and before evicting, since other processes may
+write to the same file.
+"""
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+RESYNC_WRITES = 1000
+
+
+def cache_key(url, params):
+    return url + '?' + '&'.join(f'{k}={params[k]}' for k in sorted(params))
+
+
+class ResponseCache:
+    def __init__(self, path, max_bytes=256 * 1024 * 1024):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                expires REAL,
+                accessed REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+            CREATE TABLE IF NOT EXISTS resolved_markets (
+                condition_id TEXT PRIMARY KEY
+            );
+        ''')
+        self._db.commit()
+        self._size = self._stored_size()
+        self._writes = 0
+
+    def _stored_size(self):
+        return self._db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+    def get(self, key, allow_expired=False):
+        """Cached JSON for `key`, or None on a miss / expired entry."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                'SELECT body, expires FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or (not allow_expired and row[1] is not None and row[1] < now):
+                self.misses += 1
+                return None
+            self._db.execute('UPDATE responses SET accessed = ? WHERE key = ?', (now, key))
+            self._db.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key, data, ttl):
+        """Store `data` for `ttl` seconds (None = forever)."""
+        body = json.dumps(data, separators=(',', ':')).encode()
+        now = time.time()
+        expires = None if ttl is None else now + ttl
+        with self._lock:
+            old = self._db.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            self._db.execute(
+                'INSERT OR REPLACE INTO responses (key, body, size, created, expires, accessed) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, body, len(body), now, expires, now),
+            )
+            self._size += len(body) - (old[0] if old else 0)
+            self._writes += 1
+            if self._writes >= RESYNC_WRITES:
+                self._size = self._stored_size()
+                self._writes = 0
+            if self._size > self.max_bytes:
+                self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        self._size = self._stored_size()
+        if self._size <= self.max_bytes:
+            return
+        # Free down to 90% so eviction does not run on every insert
+        target = self._size - self.max_bytes * 0.9
+        victims, freed = [], 0
+        for key, size in self._db.execute('SELECT key, size FROM responses ORDER BY accessed'):
+            victims.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        self._db.executemany('DELETE FROM responses WHERE key = ?', victims)
+        self._size -= freed
+
+    def mark_resolved(self, condition_id):
+        with self._lock:
+            self._db.execute(
+                'INSERT OR IGNORE INTO resolved_markets (condition_id) VALUES (?)', (condition_id,)
+            )
+            self._db.commit()
+
+    def is_resolved(self, condition_id):
+        with self._lock:
+            return self._db.execute(
+                'SELECT 1 FROM resolved_markets WHERE condition_id = ?', (condition_id,)
+            ).fetchone() is not None
+
+    def stats(self):
+        with self._lock:
+            count, size = self._db.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses'
+            ).fetchone()
+        return {'entries': count, 'bytes': size, 'hits': self.hits, 'misses': self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._db.execute('DELETE FROM responses')
+            self._db.commit()
+            self._size = 0
@@ -0,0 +1,258 @@
+"""Local catalog of Polymarket events and markets with a full-text index.
+
+Events (with their markets) are upserted in bulk from the gamma /events
+endpoint, a local dump, or any public-search payload the app already got.
+On SQLite the market question, event title and slug are indexed in an FTS5
+table keyed by CatalogMarket.id, so a search is one MATCH query ranked by
+bm25 (open markets first) instead of a round trip to public-search. Other
+databases, or SQLite builds without FTS5, fall back to icontains filters.
+
+The index is maintained by hand: every upserted market has its index row
+replaced in the same transaction, and ``rebuild_index`` recreates it all.
+"""
+import datetime as dt
+import itertools
+import re
+
+from django.db import OperationalError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .client import market_outcome
+from .models import CatalogEvent, CatalogMarket
+from .tradefile import iter_json_values, text_chunks
+
+
+FTS_TABLE = 'proxy_wallet_catalog_fts'
+FTS_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "question, event_title, slug, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+# bm25 column weights: question, event title, slug
+FTS_WEIGHTS = (10.0, 5.0, 1.0)
+
+SYNC_BATCH = 500         # events per transaction
+INDEX_BATCH = 500        # market ids per index statement
+SEARCH_LIMIT = 50
+
+CONDITION_ID_RE = re.compile(r'0x[0-9a-fA-F]{64}')
+# in nearly every question ("Will ... by ...?"); ranking all their matches is slow
+STOP_WORDS = frozenset('a an and be by in of on or the to will'.split())
+
+EVENT_FIELDS = ['slug', 'title', 'start_date', 'end_date', 'closed', 'synced_at']
+MARKET_FIELDS = ['event', 'question', 'slug', 'start_date', 'end_date', 'closed', 'resolved_side', 'synced_at']
+
+
+# index
+
+def create_index(conn=connection):
+    """Create the FTS5 table; False when the database cannot have one."""
+    if conn.vendor != 'sqlite':
+        return False
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(FTS_DDL)
+    except OperationalError:
+        # SQLite built without FTS5
+        return False
+    return True
+
+
+def drop_index(conn=connection):
+    if conn.vendor == 'sqlite':
+        with conn.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def fts_available(conn=connection):
+    if conn.vendor != 'sqlite':
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+def index_sql(where=''):
+    markets, events = CatalogMarket._meta.db_table, CatalogEvent._meta.db_table
+    return (
+        f"INSERT INTO {FTS_TABLE} (rowid, question, event_title, slug) "
+        f"SELECT m.id, m.question, COALESCE(e.title, ''), m.slug "
+        f"FROM {markets} m LEFT JOIN {events} e ON e.id = m.event_id {where}"
+    )
+
+
+def index_markets(market_ids):
+    """Replace the index rows of these markets (no-op without FTS5)."""
+    if not market_ids or not fts_available():
+        return
+    with connection.cursor() as cursor:
+        for start in range(0, len(market_ids), INDEX_BATCH):
+            chunk = market_ids[start:start + INDEX_BATCH]
+            marks = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({marks})', chunk)
+            cursor.execute(index_sql(f'WHERE m.id IN ({marks})'), chunk)
+
+
+def rebuild_index():
+    """Recreate the whole index from the catalog tables; False without FTS5."""
+    drop_index()
+    if not create_index():
+        return False
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(index_sql())
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    return True
+
+
+# sync
+
+def clip(value, length):
+    return str(value or '')[:length]
+
+
+def parse_when(value):
+    """Gamma date / datetime string -> aware datetime, None when missing or malformed."""
+    if not value:
+        return None
+    value = str(value)
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = dt.datetime.combine(day, dt.time()) if day else None
+    except ValueError:
+        return None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt.timezone.utc)
+    return parsed
+
+
+def event_key(event):
+    return clip(event.get('id') or event.get('slug'), 100)
+
+
+def store_events(events):
+    """Upsert one batch of gamma events with their markets; returns (events, markets) stored."""
+    rows, markets = {}, {}
+    for event in events:
+        key = event_key(event)
+        if key:
+            rows[key] = CatalogEvent(
+                event_id=key,
+                slug=clip(event.get('slug'), 300),
+                title=clip(event.get('title'), 500),
+                start_date=parse_when(event.get('startDate')),
+                end_date=parse_when(event.get('endDate')),
+                closed=bool(event.get('closed')),
+            )
+        for market in event.get('markets') or []:
+            condition_id = clip(market.get('conditionId'), 100)
+            if not condition_id:
+                continue
+            try:
+                resolved_side = market_outcome(market)
+            except (TypeError, ValueError):
+                resolved_side = ''
+            markets[condition_id] = (key, CatalogMarket(
+                condition_id=condition_id,
+                question=clip(market.get('question') or market.get('title'), 500),
+                slug=clip(market.get('slug'), 300),
+                start_date=parse_when(market.get('startDate')),
+                end_date=parse_when(market.get('endDate')),
+                closed=bool(market.get('closed')),
+                resolved_side=resolved_side,
+            ))
+    if not rows and not markets:
+        return 0, 0
+
+    with transaction.atomic():
+        CatalogEvent.objects.bulk_create(
+            rows.values(), update_conflicts=True, unique_fields=['event_id'], update_fields=EVENT_FIELDS,
+        )
+        # bulk_create does not return ids of updated rows
+        event_ids = dict(CatalogEvent.objects.filter(event_id__in=list(rows)).values_list('event_id', 'id'))
+        for key, market in markets.values():
+            market.event_id = event_ids.get(key)
+        CatalogMarket.objects.bulk_create(
+            [market for _, market in markets.values()],
+            update_conflicts=True, unique_fields=['condition_id'], update_fields=MARKET_FIELDS,
+        )
+        condition_ids, market_ids = list(markets), []
+        for start in range(0, len(condition_ids), INDEX_BATCH):
+            chunk = condition_ids[start:start + INDEX_BATCH]
+            market_ids.extend(CatalogMarket.objects.filter(condition_id__in=chunk).values_list('id', flat=True))
+        index_markets(market_ids)
+    return len(rows), len(markets)
+
+
+def sync_catalog(events, batch_size=SYNC_BATCH, log=None):
+    """Upsert any iterable of events, batch_size per transaction; returns (events, markets)."""
+    events = iter(events)
+    total_events = total_markets = 0
+    while batch := list(itertools.islice(events, batch_size)):
+        stored_events, stored_markets = store_events(batch)
+        total_events += stored_events
+        total_markets += stored_markets
+        if log is not None:
+            log(f'{total_events} events, {total_markets} markets')
+    return total_events, total_markets
+
+
+def iter_dump_events(fileobj):
+    """Events of a local dump: a JSON array / NDJSON (optionally gzipped) of gamma
+    events, public-search payloads ({"events": [...]}) or bare markets."""
+    for value in iter_json_values(text_chunks(fileobj)):
+        if not isinstance(value, dict):
+            raise ValueError('Catalog dump must contain events or markets')
+        if 'events' in value:
+            yield from value.get('events') or []
+        elif 'markets' in value or 'conditionId' not in value:
+            yield value
+        else:
+            # a market on its own, without its event
+            yield {'markets': [value]}
+
+
+# search
+
+def fts_match(query):
+    """User text -> FTS5 query: every word as a prefix, all of them required.
+
+    Stop words are dropped unless the query has nothing else.
+    """
+    words = re.findall(r'\w+', query.lower())
+    words = [word for word in words if word not in STOP_WORDS] or words
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_catalog(query, limit=SEARCH_LIMIT):
+    """CatalogMarkets matching `query`, best first; None while the catalog is empty."""
+    if not CatalogMarket.objects.exists():
+        return None
+    query = query.strip()
+    markets = CatalogMarket.objects.select_related('event')
+
+    if CONDITION_ID_RE.fullmatch(query):
+        return list(markets.filter(condition_id=query.lower()))
+
+    if fts_available():
+        match = fts_match(query)
+        if not match:
+            return []
+        table = CatalogMarket._meta.db_table
+        weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT f.rowid FROM {FTS_TABLE} f JOIN {table} m ON m.id = f.rowid '
+                f'WHERE {FTS_TABLE} MATCH %s ORDER BY m.closed, bm25({FTS_TABLE}, {weights}) LIMIT %s',
+                [match, limit],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        found = markets.in_bulk(ids)
+        return [found[pk] for pk in ids if pk in found]
+
+    # no FTS5: every word in the question or the event title
+    for word in query.split():
+        markets = markets.filter(Q(question__icontains=word) | Q(event__title__icontains=word))
+    return list(markets.order_by('closed', '-end_date')[:limit])
@@ -0,0 +1,115 @@
+"""Content-addressed cache of rendered analysis charts.
+
+A chart is keyed by a hash of the trade array, resolved side, market title
+and CHART_RENDERER_VERSION, so an identical analysis is never rendered
+twice. PNGs live under CHART_CACHE_DIR (two-level fan-out); reads bump the
+file mtime and the least recently used files are deleted once the
+directory grows past CHART_CACHE_MAX_BYTES.
+"""
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+
+from django.conf import settings
+
+
+# Bump whenever generate_chart output changes
+CHART_RENDERER_VERSION = 2
+
+KEY_RE = re.compile(r'[0-9a-f]{32}')
+
+
+def chart_key(trades, resolved_side, market_title, version=CHART_RENDERER_VERSION):
+    """Hash of everything the chart depends on (trades is a TRADE_DTYPE array)."""
+    digest = hashlib.sha256()
+    digest.update(f'v{version}|{resolved_side}|{market_title}|'.encode())
+    digest.update(trades.tobytes())
+    return digest.hexdigest()[:32]
+
+
+class ChartCache:
+    def __init__(self, directory, max_bytes):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def path(self, key):
+        if not KEY_RE.fullmatch(key or ''):
+            raise ValueError(f'Invalid chart key: {key!r}')
+        return self.directory / key[:2] / f'{key}.png'
+
+    def get(self, key):
+        """Path of a cached chart (and mark it recently used), None on a miss."""
+        try:
+            path = self.path(key)
+            os.utime(path)
+        except (ValueError, FileNotFoundError):
+            return None
+        return path
+
+    def get_or_render(self, key, render):
+        """Cached chart path; on a miss render(path) writes the PNG first."""
+        path = self.get(key)
+        if path is not None:
+            return path
+
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(suffix='.png', dir=path.parent)
+        os.close(fd)
+        try:
+            render(tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep=None):
+        """Delete least recently used charts until the cache fits in 90% of max_bytes."""
+        with self._lock:
+            files = []
+            total = 0
+            for path in self.directory.glob('*/*.png'):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+            if total <= self.max_bytes:
+                return 0
+
+            target = self.max_bytes * 0.9
+            removed = 0
+            for _, size, path in sorted(files, key=lambda f: f[0]):
+                if total <= target:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+            return removed
+
+    def stats(self):
+        sizes = [p.stat().st_size for p in self.directory.glob('*/*.png')]
+        return {'charts': len(sizes), 'bytes': sum(sizes)}
+
+
+_cache = None
+
+
+def get_chart_cache():
+    global _cache
+    if _cache is None:
+        _cache = ChartCache(settings.CHART_CACHE_DIR, settings.CHART_CACHE_MAX_BYTES)
+    return _cache
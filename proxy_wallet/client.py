@@ -0,0 +1,290 @@
+"""HTTP client for the Polymarket search and trades APIs.
+
+Plain ``requests`` with no Django imports, so ``projects/main.py`` can use it
+too. One pooled Session is shared by all calls; trade pages are fetched
+concurrently up to ``max_workers`` and paging stops at the first short page.
+
+Base URLs can be overridden with POLYMARKET_SEARCH_URL / POLYMARKET_TRADES_URL /
+POLYMARKET_MARKETS_URL / POLYMARKET_EVENTS_URL, or all at once with POLYMARKET_API_URL (e.g. the
+local stand-in server of ``manage.py mock_polymarket``).
+
+With a ``ResponseCache`` every GET is answered from disk while fresh: search
+results for POLYMARKET_SEARCH_TTL seconds, trade pages for
+POLYMARKET_TRADES_TTL, and trade pages of resolved (closed) markets forever.
+Offline mode (POLYMARKET_OFFLINE=1) never touches the network and serves
+expired entries too.
+"""
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .cache import ResponseCache, cache_key
+
+
+# One base URL for all endpoints, e.g. the mock_polymarket server
+API_URL = os.getenv('POLYMARKET_API_URL', '').rstrip('/')
+SEARCH_URL = os.getenv('POLYMARKET_SEARCH_URL', f'{API_URL}/public-search' if API_URL else 'https://gamma-api.polymarket.com/public-search')
+TRADES_URL = os.getenv('POLYMARKET_TRADES_URL', f'{API_URL}/trades' if API_URL else 'https://data-api.polymarket.com/trades')
+MARKETS_URL = os.getenv('POLYMARKET_MARKETS_URL', f'{API_URL}/markets' if API_URL else 'https://gamma-api.polymarket.com/markets')
+EVENTS_URL = os.getenv('POLYMARKET_EVENTS_URL', f'{API_URL}/events' if API_URL else 'https://gamma-api.polymarket.com/events')
+PAGE_LIMIT = 500
+EVENTS_PAGE_LIMIT = 500
+MAX_WORKERS = int(os.getenv('POLYMARKET_FETCH_WORKERS', '4'))
+
+CACHE_PATH = os.getenv(
+    'POLYMARKET_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'var', 'api_cache.sqlite3'),
+)
+CACHE_MAX_BYTES = int(os.getenv('POLYMARKET_CACHE_MAX_MB', '256')) * 1024 * 1024
+SEARCH_TTL = int(os.getenv('POLYMARKET_SEARCH_TTL', '600'))
+TRADES_TTL = int(os.getenv('POLYMARKET_TRADES_TTL', '60'))
+OFFLINE = os.getenv('POLYMARKET_OFFLINE', '') in ('1', 'true', 'yes')
+
+
+class CacheMiss(requests.RequestException):
+    """Offline mode and the response is not cached."""
+
+
+def default_cache():
+    return ResponseCache(CACHE_PATH, max_bytes=CACHE_MAX_BYTES)
+
+
+def trades_from_payload(data):
+    """The trades endpoint returns either a list or {"trades": [...]}."""
+    if isinstance(data, dict):
+        return data.get('trades', [])
+    if isinstance(data, list):
+        return data
+    return []
+
+
+def market_outcome(market):
+    """'YES' | 'NO' for a closed gamma market, '' when open or the API does not say."""
+    if not market.get('closed'):
+        return ''
+    prices = market.get('outcomePrices') or []
+    if isinstance(prices, str):
+        prices = json.loads(prices)
+    if len(prices) == 2 and float(prices[0]) != float(prices[1]):
+        # outcome 0 is YES / Up
+        return 'YES' if float(prices[0]) > float(prices[1]) else 'NO'
+    return ''
+
+
+class PolymarketClient:
+    def __init__(self, search_url=SEARCH_URL, trades_url=TRADES_URL, markets_url=MARKETS_URL, events_url=EVENTS_URL,
+                 max_workers=MAX_WORKERS, page_limit=PAGE_LIMIT,
+                 timeout=15, retries=3, cache=None, offline=OFFLINE,
+                 search_ttl=SEARCH_TTL, trades_ttl=TRADES_TTL, pool_size=None):
+        self.search_url = search_url
+        self.trades_url = trades_url
+        self.markets_url = markets_url
+        self.events_url = events_url
+        self.max_workers = max(1, max_workers)
+        self.page_limit = page_limit
+        self.timeout = timeout
+        self.cache = cache
+        self.offline = offline
+        self.search_ttl = search_ttl
+        self.trades_ttl = trades_ttl
+        if offline and cache is None:
+            raise ValueError('Offline mode needs a cache')
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            # Callers running several fetches at once need more than max_workers
+            pool_maxsize=max(pool_size or 0, self.max_workers),
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=('GET',),
+            ),
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get_json(self, url, params, timeout=None, ttl=0, fresh=False):
+        """GET as JSON through the cache; ttl=0 skips caching, None caches forever.
+
+        fresh=True skips the cache lookup (unless offline) but still stores the result.
+        """
+        key = cache_key(url, params) if self.cache is not None else None
+        if key is not None and (self.offline or not fresh):
+            data = self.cache.get(key, allow_expired=self.offline)
+            if data is not None:
+                return data
+        if self.offline:
+            raise CacheMiss(f'Offline and not cached: {key}')
+
+        resp = self.session.get(url, params=params, timeout=timeout or self.timeout)
+        resp.raise_for_status()
+        data = resp.json()
+        if key is not None and ttl != 0:
+            self.cache.set(key, data, ttl)
+        return data
+
+    def mark_resolved(self, condition_id):
+        """Trade pages of this market will be cached forever from now on."""
+        if self.cache is not None and condition_id:
+            self.cache.mark_resolved(condition_id)
+
+    def search(self, query):
+        """Raw public-search payload."""
+        data = self.get_json(self.search_url, {'q': query}, timeout=10, ttl=self.search_ttl)
+        events = data.get('events', []) if isinstance(data, dict) else []
+        for event in events:
+            for market in event.get('markets') or []:
+                if market.get('closed'):
+                    self.mark_resolved(market.get('conditionId'))
+        return data
+
+    def search_markets(self, query):
+        """(event, market) pairs of a search, in API order."""
+        data = self.search(query)
+        events = data.get('events', []) if isinstance(data, dict) else []
+        return [(event, market) for event in events for market in (event.get('markets') or [])]
+
+    def market_outcomes(self, condition_ids, chunk=50):
+        """{condition_id: 'YES' | 'NO'} for the markets among `condition_ids` that are closed.
+
+        The side is '' when the API does not say which outcome won. Closed
+        markets are marked resolved as a side effect.
+        """
+        ids = [cid for cid in condition_ids if cid]
+        outcomes = {}
+        for start in range(0, len(ids), chunk):
+            params = {'condition_ids': ids[start:start + chunk], 'limit': chunk}
+            data = self.get_json(self.markets_url, params, timeout=10, ttl=self.search_ttl)
+            for market in data if isinstance(data, list) else []:
+                if not market.get('closed'):
+                    continue
+                condition_id = market.get('conditionId')
+                self.mark_resolved(condition_id)
+                outcomes[condition_id] = market_outcome(market)
+        return outcomes
+
+    def fetch_events(self, offset=0, limit=EVENTS_PAGE_LIMIT, closed=None):
+        """One page of gamma events (with their markets), oldest id first; never cached."""
+        params = {'limit': limit, 'offset': offset, 'order': 'id', 'ascending': 'true'}
+        if closed is not None:
+            params['closed'] = 'true' if closed else 'false'
+        data = self.get_json(self.events_url, params, timeout=30)
+        return data if isinstance(data, list) else []
+
+    def iter_events(self, closed=None, max_pages=None, limit=EVENTS_PAGE_LIMIT):
+        """Every event page by page, until a short page (or max_pages)."""
+        offset, pages = 0, 0
+        while max_pages is None or pages < max_pages:
+            events = self.fetch_events(offset, limit, closed)
+            yield from events
+            pages += 1
+            if len(events) < limit:
+                break
+            offset += limit
+
+    def fetch_page(self, condition_id, user_address, offset, limit=None, taker_only=False, fresh=False):
+        params = {
+            'limit': limit or self.page_limit,
+            'offset': offset,
+            'takerOnly': 'true' if taker_only else 'false',
+            'user': user_address,
+        }
+        # No condition_id: trades of the wallet across all markets
+        if condition_id:
+            params['market'] = condition_id
+        ttl = None if condition_id and self.is_resolved(condition_id) else self.trades_ttl
+        return trades_from_payload(self.get_json(self.trades_url, params, ttl=ttl, fresh=fresh))
+
+    def fetch_trades(self, condition_id, user_address, max_pages=None):
+        """All trades of a user in a market.
+
+        Up to ``max_workers`` pages are in flight at once; once a short page
+        is seen no further offsets are requested and pages past it are
+        dropped. Raises requests.RequestException on failure.
+        """
+        limit = self.page_limit
+        if self.max_workers == 1:
+            trades, offset = [], 0
+            while max_pages is None or offset // limit < max_pages:
+                batch = self.fetch_page(condition_id, user_address, offset)
+                trades.extend(batch)
+                if len(batch) < limit:
+                    break
+                offset += limit
+            return trades
+
+        pages = {}
+        last_page = max_pages - 1 if max_pages else None  # index of the final page once known
+        next_page = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = {}
+
+            def submit_more():
+                nonlocal next_page
+                while len(pending) < self.max_workers and (last_page is None or next_page <= last_page):
+                    future = pool.submit(self.fetch_page, condition_id, user_address, next_page * limit)
+                    pending[future] = next_page
+                    next_page += 1
+
+            submit_more()
+            try:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        page = pending.pop(future)
+                        batch = future.result()
+                        pages[page] = batch
+                        if len(batch) < limit and (last_page is None or page < last_page):
+                            last_page = page
+                    submit_more()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+        trades = []
+        for page in sorted(pages):
+            if last_page is not None and page > last_page:
+                break
+            trades.extend(pages[page])
+        return trades
+
+    def fetch_wallet_trades(self, user_address, max_pages=None):
+        """All trades of a user across every market."""
+        return self.fetch_trades(None, user_address, max_pages=max_pages)
+
+    def is_resolved(self, condition_id):
+        """Market was seen closed in a search (needs a cache)."""
+        return self.cache is not None and self.cache.is_resolved(condition_id)
+
+    def fetch_trades_since(self, condition_id, user_address, since):
+        """Trades with timestamp >= `since`, newest pages only.
+
+        The API returns trades newest first, so paging stops at the first
+        page that reaches back past `since` (usually the first one).
+        Pages are always fetched fresh.
+        """
+        trades, offset = [], 0
+        while True:
+            batch = self.fetch_page(condition_id, user_address, offset, fresh=True)
+            trades.extend(t for t in batch if int(t.get('timestamp') or 0) >= since)
+            if len(batch) < self.page_limit:
+                break
+            if min(int(t.get('timestamp') or 0) for t in batch) < since:
+                break
+            offset += self.page_limit
+        return trades
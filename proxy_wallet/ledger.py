@@ -0,0 +1,231 @@
+"""FIFO position ledger with incremental realized / unrealized PnL.
+
+Every buy opens a lot (shares, price) on its outcome; sells close the oldest
+lots first and realize proceeds minus the FIFO cost of the shares sold. Each
+lot is pushed and popped once, so a trade costs O(1) amortized. Open shares
+and the cost basis of open lots are kept as running totals, so unrealized PnL
+(open shares marked at the last traded price of their outcome, or 1 minus the
+other outcome's price, as in calculate_metrics) is O(1) as well.
+
+Sells of shares with no open lot (minted or bought before the history starts)
+are realized at zero cost and counted in `unmatched`.
+
+The ledger state is JSON-serializable, and WalletLedger stores it together
+with the per-trade series. A refresh only applies the trades added since the
+last update.
+"""
+from collections import deque
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+
+from .analysis import bucket_seconds, rounded
+from .models import WalletLedger
+
+
+# one record per applied trade
+LEDGER_POINT = np.dtype([
+    ('timestamp', '<u4'),
+    ('realized', '<f8'),     # $
+    ('unrealized', '<f8'),   # $
+])
+
+EPSILON = 1e-9
+SIDES = ('yes', 'no')
+
+
+class PositionLedger:
+    def __init__(self):
+        self.lots = {side: deque() for side in SIDES}     # [shares, price $], oldest first
+        self.shares = dict.fromkeys(SIDES, 0.0)
+        self.basis = dict.fromkeys(SIDES, 0.0)           # cost of the open lots
+        self.last_price = dict.fromkeys(SIDES, 0.0)      # $, 0 = not traded yet
+        self.realized = 0.0
+        self.unmatched = 0.0
+        self.count = 0
+        self.last_timestamp = None
+        self.points = []                                 # not yet flushed LEDGER_POINT tuples
+
+    def apply(self, timestamp, is_buy, is_yes, price, shares):
+        """One trade; price in cents like TRADE_DTYPE."""
+        side = 'yes' if is_yes else 'no'
+        price = price / 100.0
+        if price:
+            self.last_price[side] = price
+
+        if is_buy:
+            self.lots[side].append([shares, price])
+            self.shares[side] += shares
+            self.basis[side] += shares * price
+        else:
+            self.sell(side, shares, price)
+
+        self.count += 1
+        self.last_timestamp = timestamp
+        self.points.append((timestamp, self.realized, self.unrealized()))
+
+    def sell(self, side, shares, price):
+        lots = self.lots[side]
+        remaining = shares
+        while remaining > EPSILON and lots:
+            lot = lots[0]
+            take = min(lot[0], remaining)
+            self.realized += take * (price - lot[1])
+            self.basis[side] -= take * lot[1]
+            self.shares[side] -= take
+            lot[0] -= take
+            remaining -= take
+            if lot[0] <= EPSILON:
+                lots.popleft()
+        if remaining > EPSILON:
+            self.realized += remaining * price
+            self.unmatched += remaining
+        if not lots:
+            # no drift once the side is flat
+            self.shares[side] = self.basis[side] = 0.0
+
+    def extend(self, trades):
+        """Apply a TRADE_DTYPE array (or rows of the same fields) in order."""
+        if isinstance(trades, np.ndarray):
+            trades = zip(*(trades[f].tolist() for f in ('timestamp', 'is_buy', 'is_yes', 'price', 'shares')))
+        for row in trades:
+            self.apply(*row)
+        return self
+
+    def mark(self, side):
+        other = 'no' if side == 'yes' else 'yes'
+        if self.last_price[side]:
+            return self.last_price[side]
+        if self.last_price[other]:
+            return 1.0 - self.last_price[other]
+        return 0.0
+
+    def unrealized(self):
+        return sum(self.shares[s] * self.mark(s) - self.basis[s] for s in SIDES)
+
+    def settled_pnl(self, resolved_side):
+        """Total PnL if the market resolves to `resolved_side` (winning shares pay $1)."""
+        winner = 'yes' if resolved_side == 'YES' else 'no'
+        return self.realized + self.shares[winner] - sum(self.basis.values())
+
+    def summary(self, resolved_side=None):
+        out = {
+            'trade_count': self.count,
+            'realized_pnl': self.realized,
+            'unrealized_pnl': self.unrealized(),
+            'unmatched_shares': self.unmatched,
+        }
+        for side in SIDES:
+            out[f'{side}_shares'] = self.shares[side]
+            out[f'{side}_basis'] = self.basis[side]
+            out[f'{side}_avg_cost'] = self.basis[side] / self.shares[side] if self.shares[side] > EPSILON else 0.0
+            out[f'{side}_lots'] = len(self.lots[side])
+            out[f'{side}_mark'] = self.mark(side)
+        out['total_pnl'] = out['realized_pnl'] + out['unrealized_pnl']
+        if resolved_side in ('YES', 'NO'):
+            out['settled_pnl'] = self.settled_pnl(resolved_side)
+        return out
+
+    def take_points(self):
+        """Series records added since the last call, as a LEDGER_POINT array."""
+        points = np.array(self.points, dtype=LEDGER_POINT)
+        self.points = []
+        return points
+
+    def state(self):
+        return {
+            'lots': {side: list(self.lots[side]) for side in SIDES},
+            'shares': self.shares,
+            'basis': self.basis,
+            'last_price': self.last_price,
+            'realized': self.realized,
+            'unmatched': self.unmatched,
+            'count': self.count,
+            'last_timestamp': self.last_timestamp,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        ledger = cls()
+        if not state:
+            return ledger
+        for side in SIDES:
+            ledger.lots[side] = deque([list(lot) for lot in state['lots'][side]])
+        ledger.shares = dict(state['shares'])
+        ledger.basis = dict(state['basis'])
+        ledger.last_price = dict(state['last_price'])
+        ledger.realized = state['realized']
+        ledger.unmatched = state['unmatched']
+        ledger.count = state['count']
+        ledger.last_timestamp = state['last_timestamp']
+        return ledger
+
+
+def ledger_series(blob):
+    """Stored series bytes -> LEDGER_POINT array."""
+    return np.frombuffer(blob, dtype=LEDGER_POINT)
+
+
+def sampled_series(points, max_points=400):
+    """Realized / unrealized at <= max_points bucket ends (last value per bucket), JSON-ready."""
+    if not len(points):
+        return {'t': [], 'realized': [], 'unrealized': []}
+    ts = points['timestamp'].astype(np.int64)
+    step = bucket_seconds(max(int(ts[-1] - ts[0]), 1), max_points)
+    grid = np.arange(ts[0] - ts[0] % step, ts[-1] + step, step) + step - 1
+    idx = np.searchsorted(ts, grid, side='right') - 1
+    return {
+        't': (np.minimum(grid, ts[-1]) * 1000).tolist(),
+        'realized': rounded(points['realized'][idx], 2),
+        'unrealized': rounded(points['unrealized'][idx], 2),
+    }
+
+
+def new_trade_rows(trade_set, last_timestamp=None, last_id=None):
+    """(id, timestamp, is_buy, is_yes, price c, shares) of trades after (last_timestamp, last_id)."""
+    trades = trade_set.trades.all()
+    if last_id is not None:
+        trades = trades.filter(Q(timestamp__gt=last_timestamp) | Q(timestamp=last_timestamp, id__gt=last_id))
+    rows = trades.order_by('timestamp', 'id').values_list(
+        'id', 'timestamp', 'side', 'outcome', 'price', 'size',
+    ).iterator(chunk_size=5000)
+    for pk, ts, side, outcome, price, size in rows:
+        # same normalization as parse_trades
+        yield pk, ts, side.upper() == 'BUY', outcome.strip().upper() not in {'NO', 'DOWN'}, price * 100.0, size
+
+
+def update_ledger(trade_set):
+    """Bring the stored ledger of a set up to date; returns (ledger, stored WalletLedger).
+
+    Only trades after the last applied one are replayed. When the stored
+    trades were replaced (a full re-fetch) the ledger is rebuilt.
+    """
+    record = WalletLedger.objects.filter(trade_set=trade_set).first()
+    if record is None:
+        record = WalletLedger(trade_set=trade_set)
+
+    ledger = PositionLedger.from_state(record.state)
+    total = trade_set.trades.count()
+    stale = record.last_trade_id is not None and (
+        record.trade_count > total
+        or not trade_set.trades.filter(pk=record.last_trade_id).exists()
+    )
+    if stale:
+        ledger, record.last_trade_id, record.series = PositionLedger(), None, b''
+
+    if ledger.count == total and record.pk is not None and not stale:
+        return ledger, record
+
+    last_id = record.last_trade_id
+    for pk, *row in new_trade_rows(trade_set, ledger.last_timestamp, last_id):
+        ledger.apply(*row)
+        last_id = pk
+
+    with transaction.atomic():
+        record.series = bytes(record.series) + ledger.take_points().tobytes()
+        record.state = ledger.state()
+        record.last_trade_id = last_id
+        record.trade_count = ledger.count
+        record.save()
+    return ledger, record
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from proxy_wallet.views import calculate_metrics, generate_chart
+
+from .bench_metrics import synthetic_trades
+
+
+class Command(BaseCommand):
+    help = 'Benchmark generate_chart: detailed vs aggregated (LOD) rendering'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[200, 1_000, 5_000])
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--skip-detailed-above', type=int, default=20_000,
+                            help='Do not time the detailed path above this many trades')
+        parser.add_argument('--keep', action='store_true', help='Keep the PNGs and print their paths')
+
+    def render(self, parsed, metrics, lod):
+        fd, path = tempfile.mkstemp(suffix='.png', prefix='chart_')
+        os.close(fd)
+        started = time.perf_counter()
+        generate_chart(parsed, metrics, 'Benchmark', 'YES', path, lod=lod)
+        elapsed = time.perf_counter() - started
+        size = os.path.getsize(path)
+        if self.keep:
+            self.stdout.write(f'  {"lod" if lod else "detailed"}: {path}')
+        else:
+            os.remove(path)
+        return elapsed, size
+
+    def handle(self, *args, **options):
+        self.keep = options['keep']
+        self.stdout.write(f'{"trades":>10} {"detailed":>10} {"lod":>10} {"speedup":>8} {"png kB":>14}')
+        for n in options['sizes']:
+            parsed = synthetic_trades(n, options['seed'])
+            metrics = calculate_metrics(parsed, 'YES')
+
+            lod_time, lod_size = self.render(parsed, metrics, lod=True)
+            if n <= options['skip_detailed_above']:
+                detailed_time, detailed_size = self.render(parsed, metrics, lod=False)
+                speedup = self.style.SUCCESS(f'{detailed_time / lod_time:>7.1f}x')
+                detailed = f'{detailed_time:>9.2f}s'
+                sizes = f'{detailed_size // 1024:>6} /{lod_size // 1024:>6}'
+            else:
+                speedup, detailed, sizes = f'{"-":>8}', f'{"-":>10}', f'{"-":>6} /{lod_size // 1024:>6}'
+
+            self.stdout.write(f'{n:>10,} {detailed} {lod_time:>9.2f}s {speedup} {sizes}')
@@ -0,0 +1,282 @@
+import random
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from proxy_wallet.views import calculate_metrics, trades_array
+
+
+def loop_metrics(parsed, resolved_side):
+    """Previous per-trade implementation of calculate_metrics, kept as the baseline."""
+    prices = [e["price"] for e in parsed]
+    
+    # Exposure curves
+    yes_curve = []
+    no_curve = []
+    net_curve = []
+    yes_sh_curve = []
+    no_sh_curve = []
+    net_sh_curve = []
+    
+    yes_exp = no_exp = 0
+    yes_sh_exp = no_sh_exp = 0
+    
+    for e in parsed:
+        # Dollar exposure
+        if e["side"] == "Up":
+            yes_exp += e["cost"] if e["type"] == "Buy" else -e["cost"]
+        else:
+            no_exp += e["cost"] if e["type"] == "Buy" else -e["cost"]
+        
+        # Shares exposure
+        if e["side"] == "Up":
+            yes_sh_exp += e["shares"] if e["type"] == "Buy" else -e["shares"]
+        else:
+            no_sh_exp += e["shares"] if e["type"] == "Buy" else -e["shares"]
+        
+        yes_curve.append(yes_exp)
+        no_curve.append(no_exp)
+        net_curve.append(yes_exp + no_exp)
+        yes_sh_curve.append(yes_sh_exp)
+        no_sh_curve.append(no_sh_exp)
+        net_sh_curve.append(yes_sh_exp + no_sh_exp)
+    
+    # Final PNL
+    remaining_yes = yes_sh_curve[-1] if yes_sh_curve else 0
+    remaining_no = no_sh_curve[-1] if no_sh_curve else 0
+    # Buy stats for cost basis
+    yes_buys_cost = sum(e["cost"] for e in parsed if e["side"] == "Up" and e["type"] == "Buy")
+    yes_buys_sh = sum(e["shares"] for e in parsed if e["side"] == "Up" and e["type"] == "Buy")
+    no_buys_cost = sum(e["cost"] for e in parsed if e["side"] == "Down" and e["type"] == "Buy")
+    no_buys_sh = sum(e["shares"] for e in parsed if e["side"] == "Down" and e["type"] == "Buy")
+    
+    avg_price_yes = (yes_buys_cost / yes_buys_sh) if yes_buys_sh > 0 else 0
+    avg_price_no = (no_buys_cost / no_buys_sh) if no_buys_sh > 0 else 0
+    
+    # YES Outcome PnL (Cost of remaining shares + Lost capital from opposite side)
+    final_value_yes = remaining_yes * 1.0
+    cost_basis_yes = remaining_yes * avg_price_yes
+    pnl_yes = final_value_yes - cost_basis_yes - no_exp  # Assuming NO exposure is lost
+    # Note: If no_exp is negative (profit already taken on NO), it correctly adds to PnL
+    pnl_yes_pct = (pnl_yes / cost_basis_yes * 100) if cost_basis_yes > 0 else 0
+    
+    # NO Outcome PnL
+    final_value_no = remaining_no * 1.0
+    cost_basis_no = remaining_no * avg_price_no
+    pnl_no = final_value_no - cost_basis_no - yes_exp
+    pnl_no_pct = (pnl_no / cost_basis_no * 100) if cost_basis_no > 0 else 0
+    
+    # Use global total_spent for the main dashboard total metric
+    total_spent = net_curve[-1] if net_curve else 0
+    
+    # Current (Mark-to-Market) PnL
+    # Find latest price for YES (Up) and NO (Down)
+    last_up_price = 0
+    last_down_price = 0
+    for e in reversed(parsed):
+        if not last_up_price and e["side"] == "Up":
+            last_up_price = e["price"]
+        if not last_down_price and e["side"] == "Down":
+            last_down_price = e["price"]
+        if last_up_price and last_down_price:
+            break
+            
+    # If one side is missing, infer it (YES price + NO price = 100 cents)
+    if last_up_price and not last_down_price:
+        last_down_price = 100.0 - last_up_price
+    elif last_down_price and not last_up_price:
+        last_up_price = 100.0 - last_down_price
+        
+    current_value = (remaining_yes * (last_up_price/100.0)) + (remaining_no * (last_down_price/100.0))
+    current_pnl = current_value - total_spent
+    current_pnl_pct = (current_pnl / total_spent * 100) if total_spent > 0 else 0
+
+    # If resolved, OVERRIDE current metrics with the actual outcome
+    if resolved_side == "YES":
+        current_pnl = pnl_yes
+        current_pnl_pct = pnl_yes_pct
+        current_value = final_value_yes
+    elif resolved_side == "NO":
+        current_pnl = pnl_no
+        current_pnl_pct = pnl_no_pct
+        current_value = final_value_no
+    
+    # Buy/Sell totals
+    yes_buy_sh = yes_buy_cost = 0
+    yes_sell_sh = yes_sell_cost = 0
+    no_buy_sh = no_buy_cost = 0
+    no_sell_sh = no_sell_cost = 0
+    
+    raw_vol_yes = []
+    raw_vol_no = []
+    raw_cost_yes = []
+    raw_cost_no = []
+    
+    for e in parsed:
+        is_yes = (e["side"] == "Up")
+        is_buy = (e["type"] == "Buy")
+        
+        if is_buy:
+            if is_yes:
+                yes_buy_sh += e["shares"]
+                yes_buy_cost += e["cost"]
+                raw_vol_yes.append(e["shares"])
+                raw_vol_no.append(0)
+                raw_cost_yes.append(e["cost"])
+                raw_cost_no.append(0)
+            else:
+                no_buy_sh += e["shares"]
+                no_buy_cost += e["cost"]
+                raw_vol_yes.append(0)
+                raw_vol_no.append(e["shares"])
+                raw_cost_yes.append(0)
+                raw_cost_no.append(e["cost"])
+        else:
+            raw_vol_yes.append(0)
+            raw_vol_no.append(0)
+            raw_cost_yes.append(0)
+            raw_cost_no.append(0)
+            if is_yes:
+                yes_sell_sh += e["shares"]
+                yes_sell_cost += e["cost"]
+            else:
+                no_sell_sh += e["shares"]
+                no_sell_cost += e["cost"]
+    
+    cum_yes = np.cumsum(raw_vol_yes)
+    cum_no = np.cumsum(raw_vol_no)
+    cum_yes_cost = np.cumsum(raw_cost_yes)
+    cum_no_cost = np.cumsum(raw_cost_no)
+    
+    cum_yes_total = float(cum_yes[-1]) if len(cum_yes) > 0 else 0
+    cum_no_total = float(cum_no[-1]) if len(cum_no) > 0 else 0
+    cum_yes_cost_total = float(cum_yes_cost[-1]) if len(cum_yes_cost) > 0 else 0
+    cum_no_cost_total = float(cum_no_cost[-1]) if len(cum_no_cost) > 0 else 0
+    
+    # Peaks
+    if len(yes_curve) > 0:
+        yes_peak_idx = int(np.argmax(yes_curve))
+        no_peak_idx = int(np.argmax(no_curve))
+        yes_sh_peak_idx = int(np.argmax(yes_sh_curve))
+        no_sh_peak_idx = int(np.argmax(no_sh_curve))
+        
+        yes_peak_val = yes_curve[yes_peak_idx]
+        no_peak_val = no_curve[no_peak_idx]
+        yes_sh_peak_val = yes_sh_curve[yes_sh_peak_idx]
+        no_sh_peak_val = no_sh_curve[no_sh_peak_idx]
+    else:
+        yes_peak_idx = no_peak_idx = 0
+        yes_sh_peak_idx = no_sh_peak_idx = 0
+        yes_peak_val = no_peak_val = 0
+        yes_sh_peak_val = no_sh_peak_val = 0
+    
+    return {
+        'trade_count': len(parsed),
+        'remaining_yes': float(remaining_yes),
+        'remaining_no': float(remaining_no),
+        'final_value_yes': float(final_value_yes),
+        'final_value_no': float(final_value_no),
+        'total_spent': float(total_spent),
+        'current_value': float(current_value),
+        'current_pnl': float(current_pnl),
+        'current_pnl_pct': float(current_pnl_pct),
+        'pnl_yes': float(pnl_yes),
+        'pnl_yes_pct': float(pnl_yes_pct),
+        'pnl_no': float(pnl_no),
+        'pnl_no_pct': float(pnl_no_pct),
+        'yes_buy_sh': float(yes_buy_sh),
+        'yes_buy_cost': float(yes_buy_cost),
+        'yes_sell_sh': float(yes_sell_sh),
+        'yes_sell_cost': float(yes_sell_cost),
+        'no_buy_sh': float(no_buy_sh),
+        'no_buy_cost': float(no_buy_cost),
+        'no_sell_sh': float(no_sell_sh),
+        'no_sell_cost': float(no_sell_cost),
+        'cum_yes_total': float(cum_yes_total),
+        'cum_no_total': float(cum_no_total),
+        'cum_yes_cost_total': float(cum_yes_cost_total),
+        'cum_no_cost_total': float(cum_no_cost_total),
+        'yes_peak_idx': yes_peak_idx,
+        'no_peak_idx': no_peak_idx,
+        'yes_sh_peak_idx': yes_sh_peak_idx,
+        'no_sh_peak_idx': no_sh_peak_idx,
+        'yes_peak_val': float(yes_peak_val),
+        'no_peak_val': float(no_peak_val),
+        'yes_sh_peak_val': float(yes_sh_peak_val),
+        'no_sh_peak_val': float(no_sh_peak_val),
+        'yes_curve': [float(x) for x in yes_curve],
+        'no_curve': [float(x) for x in no_curve],
+        'net_curve': [float(x) for x in net_curve],
+        'yes_sh_curve': [float(x) for x in yes_sh_curve],
+        'no_sh_curve': [float(x) for x in no_sh_curve],
+        'net_sh_curve': [float(x) for x in net_sh_curve],
+        'prices': [float(x) for x in prices],
+        'cum_yes': cum_yes.tolist(),
+        'cum_no': cum_no.tolist(),
+        'cum_yes_cost': cum_yes_cost.tolist(),
+        'cum_no_cost': cum_no_cost.tolist(),
+    }
+
+
+def synthetic_trades(n, seed=42):
+    """Parsed trades (parse_trades format) of a random-walk market."""
+    rng = random.Random(seed)
+    ts = 1_770_000_000
+    price = 50.0
+    parsed = []
+    for _ in range(n):
+        ts += rng.randint(0, 3)
+        price = min(99.0, max(1.0, price + rng.gauss(0, 0.5)))
+        side = 'Up' if rng.random() < 0.5 else 'Down'
+        p = price if side == 'Up' else 100.0 - price
+        shares = round(rng.expovariate(1 / 20), 2)
+        parsed.append({
+            'type': 'Buy' if rng.random() < 0.7 else 'Sell',
+            'market': 'Synthetic',
+            'side': side,
+            'price': p,
+            'shares': shares,
+            'cost': p / 100.0 * shares,
+            'timestamp': ts,
+        })
+    return parsed
+
+
+def best_of(func, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+class Command(BaseCommand):
+    help = 'Benchmark calculate_metrics against the per-trade loop baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"trades":>10} {"loop":>10} {"vector":>10} {"+array":>10} {"speedup":>8}')
+        for n in options['sizes']:
+            parsed = synthetic_trades(n, options['seed'])
+            repeat = options['repeat']
+
+            loop_time, expected = best_of(lambda: loop_metrics(parsed, 'YES'), repeat)
+            array_time, trades = best_of(lambda: trades_array(parsed), repeat)
+            vector_time, metrics = best_of(lambda: calculate_metrics(trades, 'YES'), repeat)
+
+            for key, value in expected.items():
+                if not np.allclose(value, metrics[key], rtol=1e-9, atol=1e-6):
+                    self.stderr.write(self.style.ERROR(f'{n}: mismatch in {key}'))
+
+            self.stdout.write(
+                f'{n:>10,} {loop_time * 1000:>8.1f}ms {vector_time * 1000:>8.1f}ms '
+                f'{(vector_time + array_time) * 1000:>8.1f}ms '
+                + self.style.SUCCESS(f'{loop_time / (vector_time + array_time):>7.1f}x')
+            )
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from proxy_wallet.client import PAGE_LIMIT
+from proxy_wallet.mockapi import FixtureStore, MockPolymarket, SyntheticData, serve_mock_api
+
+
+class Command(BaseCommand):
+    help = 'Serve recorded fixtures and synthetic trade histories as a local Polymarket API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default=settings.POLYMARKET_MOCK_HOST)
+        parser.add_argument('--port', type=int, default=settings.POLYMARKET_MOCK_PORT)
+        parser.add_argument('--fixtures', default=str(settings.POLYMARKET_FIXTURES_DIR),
+                            help='Fixture directory (see record_fixtures); missing is fine')
+        parser.add_argument('--synthetic', type=int, default=0, metavar='TRADES',
+                            help='Synthetic trades per wallet and market for anything not recorded, 0 = off')
+        parser.add_argument('--synthetic-markets', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--latency', type=float, default=0.0, help='Milliseconds added to every response')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Extra random milliseconds, uniform 0..jitter')
+        parser.add_argument('--max-page-size', type=int, default=PAGE_LIMIT, help='Cap on the trades limit parameter')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Share of responses failing with 503')
+
+    def handle(self, *args, **options):
+        synthetic = None
+        if options['synthetic'] > 0:
+            synthetic = SyntheticData(options['synthetic'], options['synthetic_markets'], seed=options['seed'])
+        api = MockPolymarket(
+            fixtures=FixtureStore(options['fixtures']),
+            synthetic=synthetic,
+            latency=options['latency'] / 1000,
+            jitter=options['jitter'] / 1000,
+            max_page_size=options['max_page_size'],
+            error_rate=options['error_rate'],
+            seed=options['seed'],
+        )
+        try:
+            serve_mock_api(api, options['host'], options['port'], log=self.stdout.write,
+                           verbose=options['verbosity'] > 1)
+        except KeyboardInterrupt:
+            self.stdout.write('stopped')
@@ -0,0 +1,35 @@
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from proxy_wallet.client import PolymarketClient
+from proxy_wallet.mockapi import FixtureStore, record_fixtures
+
+
+class Command(BaseCommand):
+    help = 'Record live Polymarket responses as fixtures for mock_polymarket'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--out', default=str(settings.POLYMARKET_FIXTURES_DIR))
+        parser.add_argument('--search', action='append', default=[], metavar='QUERY')
+        parser.add_argument('--trades', nargs=2, action='append', default=[], metavar=('CONDITION_ID', 'USER'),
+                            help='Trades of one wallet in one market')
+        parser.add_argument('--wallet', action='append', default=[], metavar='USER',
+                            help='Trades of a wallet across all markets')
+
+    def handle(self, *args, **options):
+        if not (options['search'] or options['trades'] or options['wallet']):
+            raise CommandError('Nothing to record: pass --search, --trades and/or --wallet')
+        store = FixtureStore(options['out'])
+        try:
+            with PolymarketClient() as client:
+                record_fixtures(
+                    client, store,
+                    queries=options['search'],
+                    pairs=options['trades'],
+                    wallets=options['wallet'],
+                    log=self.stdout.write,
+                )
+        except requests.RequestException as exc:
+            raise CommandError(f'API error: {exc}')
+        self.stdout.write(self.style.SUCCESS(f'fixtures in {store.directory}'))
@@ -0,0 +1,62 @@
+import time
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from proxy_wallet.catalog import SYNC_BATCH, iter_dump_events, rebuild_index, sync_catalog
+from proxy_wallet.client import EVENTS_PAGE_LIMIT, PolymarketClient
+from proxy_wallet.models import CatalogEvent, CatalogMarket
+
+
+class Command(BaseCommand):
+    help = 'Sync the local market catalog from the gamma /events API or local dumps and update its search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dump', action='append', default=[], metavar='PATH',
+                            help='JSON / NDJSON (optionally gzipped) of events, search payloads or markets; '
+                                 'replaces the API')
+        parser.add_argument('--status', choices=['open', 'closed', 'all'], default='open',
+                            help='Which events to fetch from the API (open is enough for periodic refreshes)')
+        parser.add_argument('--max-pages', type=int, default=None)
+        parser.add_argument('--page-size', type=int, default=EVENTS_PAGE_LIMIT)
+        parser.add_argument('--batch-size', type=int, default=SYNC_BATCH, help='Events per transaction')
+        parser.add_argument('--rebuild-index', action='store_true', help='Recreate the full-text index afterwards')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        totals = [0, 0]
+
+        def sync(events):
+            stored = sync_catalog(events, batch_size=options['batch_size'], log=self.stdout.write)
+            totals[0] += stored[0]
+            totals[1] += stored[1]
+
+        try:
+            if options['dump']:
+                for path in options['dump']:
+                    with open(path, 'rb') as f:
+                        sync(iter_dump_events(f))
+            else:
+                closed = {'open': False, 'closed': True, 'all': None}[options['status']]
+                with PolymarketClient() as client:
+                    sync(client.iter_events(closed=closed, max_pages=options['max_pages'], limit=options['page_size']))
+        except KeyboardInterrupt:
+            # batches stored so far are committed
+            self.stdout.write('stopped')
+        except requests.RequestException as exc:
+            raise CommandError(f'API error: {exc}')
+        except OSError as exc:
+            raise CommandError(f'Cannot read dump: {exc}')
+        except ValueError as exc:
+            raise CommandError(f'Invalid dump: {exc}')
+
+        if options['rebuild_index']:
+            if rebuild_index():
+                self.stdout.write('index rebuilt')
+            else:
+                self.stdout.write(self.style.WARNING('no FTS5 on this database, searches use icontains'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'synced {totals[0]} events, {totals[1]} markets in {time.perf_counter() - started:.1f}s; '
+            f'catalog has {CatalogEvent.objects.count()} events, {CatalogMarket.objects.count()} markets'
+        ))
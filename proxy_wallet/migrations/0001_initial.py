@@ -0,0 +1,54 @@
+# Generated by Django 6.0.1 on 2026-10-19 14:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletTradeSet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('condition_id', models.CharField(blank=True, max_length=100)),
+                ('user_address', models.CharField(blank=True, max_length=100)),
+                ('market_title', models.CharField(blank=True, max_length=500)),
+                ('source', models.CharField(choices=[('api', 'API'), ('upload', 'Upload')], default='api', max_length=10)),
+                ('resolved_side', models.CharField(blank=True, choices=[('YES', 'YES'), ('NO', 'NO')], max_length=3)),
+                ('trade_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-updated_at'],
+                'indexes': [models.Index(fields=['user_address', 'condition_id'], name='proxy_walle_user_ad_bf3768_idx'), models.Index(fields=['condition_id'], name='proxy_walle_conditi_a1604b_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Trade',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('proxy_wallet', models.CharField(blank=True, max_length=100)),
+                ('condition_id', models.CharField(blank=True, max_length=100)),
+                ('asset', models.CharField(blank=True, max_length=100)),
+                ('side', models.CharField(max_length=4)),
+                ('outcome', models.CharField(blank=True, max_length=50)),
+                ('outcome_index', models.IntegerField(blank=True, null=True)),
+                ('price', models.FloatField()),
+                ('size', models.FloatField()),
+                ('timestamp', models.BigIntegerField()),
+                ('transaction_hash', models.CharField(blank=True, db_index=True, max_length=100)),
+                ('trade_set', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trades', to='proxy_wallet.wallettradeset')),
+            ],
+            options={
+                'ordering': ['timestamp', 'id'],
+                'indexes': [models.Index(fields=['proxy_wallet', 'condition_id', 'timestamp'], name='proxy_walle_proxy_w_ab21bf_idx'), models.Index(fields=['trade_set', 'timestamp'], name='proxy_walle_trade_s_27e806_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.1 on 2026-10-19 14:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proxy_wallet', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolved_side', models.CharField(blank=True, max_length=3)),
+                ('trade_count', models.IntegerField(default=0)),
+                ('summary', models.JSONField(default=dict)),
+                ('data', models.BinaryField()),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('trade_set', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='analysis', to='proxy_wallet.wallettradeset')),
+            ],
+        ),
+    ]
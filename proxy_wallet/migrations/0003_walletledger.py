@@ -0,0 +1,26 @@
+# Generated by Django 6.0.1 on 2026-10-19 15:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proxy_wallet', '0002_walletanalysis'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.JSONField(default=dict)),
+                ('last_trade_id', models.BigIntegerField(blank=True, null=True)),
+                ('trade_count', models.IntegerField(default=0)),
+                ('series', models.BinaryField(default=b'')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('trade_set', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ledger', to='proxy_wallet.wallettradeset')),
+            ],
+        ),
+    ]
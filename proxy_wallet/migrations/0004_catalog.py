@@ -0,0 +1,69 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:05
+
+import django.db.models.deletion
+from django.db import OperationalError, migrations, models
+
+
+# Frozen copy of catalog.FTS_DDL: migrations must not depend on the live module
+FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS proxy_wallet_catalog_fts USING fts5("
+    "question, event_title, slug, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+
+
+def create_fts_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(FTS_DDL)
+    except OperationalError:
+        # SQLite built without FTS5: search falls back to icontains
+        pass
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS proxy_wallet_catalog_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proxy_wallet', '0003_walletledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=100, unique=True)),
+                ('slug', models.CharField(blank=True, max_length=300)),
+                ('title', models.CharField(blank=True, max_length=500)),
+                ('start_date', models.DateTimeField(blank=True, null=True)),
+                ('end_date', models.DateTimeField(blank=True, null=True)),
+                ('closed', models.BooleanField(default=False)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CatalogMarket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('condition_id', models.CharField(max_length=100, unique=True)),
+                ('question', models.CharField(blank=True, max_length=500)),
+                ('slug', models.CharField(blank=True, max_length=300)),
+                ('start_date', models.DateTimeField(blank=True, null=True)),
+                ('end_date', models.DateTimeField(blank=True, null=True)),
+                ('closed', models.BooleanField(default=False)),
+                ('resolved_side', models.CharField(blank=True, max_length=3)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+                ('event', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='markets', to='proxy_wallet.catalogevent')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['closed', 'end_date'], name='proxy_walle_closed_dc1936_idx')],
+            },
+        ),
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
@@ -0,0 +1,386 @@
+"""Local stand-in for the Polymarket search, trades, markets and events APIs.
+
+No Django imports. The server answers the same paths and parameters the
+client uses (/public-search, /trades, /markets, /events), so pointing
+POLYMARKET_API_URL at it is enough for both the web app and
+``projects/main.py``.
+
+Data comes from recorded fixtures first:
+
+    <fixtures>/search/<query-slug>.json    public-search payload
+    <fixtures>/trades/<user>.json          every recorded trade of the wallet
+    <fixtures>/markets.json                {condition_id: gamma market}
+
+and, when SyntheticData is given, from deterministic synthetic data for
+everything not recorded: a fixed set of markets, every wallet holding the
+same number of trades in each (a random walk like bench_metrics).
+Synthetic histories are generated as NumPy columns once per (wallet, market),
+kept in a small LRU, and only the requested page is turned into dicts.
+
+Trades are served newest first and sliced by offset / limit, with limit
+capped at ``max_page_size`` like the real endpoint. Every response can be
+delayed (latency + uniform jitter) and a share of them can fail with 503 to
+exercise the client's retries. /events pages through the events of the
+recorded searches, then the synthetic ones (one per market).
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+
+SYNTHETIC_START = 1_770_000_000
+SYNTHETIC_CACHE = 8
+
+
+def query_slug(query):
+    slug = re.sub(r'[^a-z0-9]+', '-', query.lower()).strip('-')
+    return slug or hashlib.sha1(query.encode()).hexdigest()[:16]
+
+
+def trade_identity(trade):
+    return (trade.get('transactionHash'), trade.get('asset'), trade.get('side'),
+            trade.get('price'), trade.get('size'), trade.get('outcome'))
+
+
+def read_json(path, default):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+class FixtureStore:
+    """Recorded responses on disk; trades are loaded per wallet on first use."""
+
+    def __init__(self, directory):
+        self.directory = str(directory)
+        self.markets = read_json(os.path.join(self.directory, 'markets.json'), {})
+        self.trades = {}
+        self.lock = threading.Lock()
+
+    def search(self, query):
+        return read_json(os.path.join(self.directory, 'search', f'{query_slug(query)}.json'), None)
+
+    def events(self):
+        """Distinct events of all recorded searches, in file name order."""
+        directory = os.path.join(self.directory, 'search')
+        names = sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+        events = {}
+        for name in names:
+            payload = read_json(os.path.join(directory, name), {})
+            for event in payload.get('events', []) if isinstance(payload, dict) else []:
+                events.setdefault(event.get('id') or event.get('slug'), event)
+        return list(events.values())
+
+    def wallet_trades(self, user):
+        """Recorded trades of a wallet newest first, None when it was never recorded."""
+        user = user.lower()
+        with self.lock:
+            if user not in self.trades:
+                trades = read_json(os.path.join(self.directory, 'trades', f'{user}.json'), None)
+                if trades is not None:
+                    trades.sort(key=lambda t: int(t.get('timestamp') or 0), reverse=True)
+                self.trades[user] = trades
+            return self.trades[user]
+
+    # recording
+
+    def save_search(self, query, payload):
+        write_json(os.path.join(self.directory, 'search', f'{query_slug(query)}.json'), payload)
+        for event in payload.get('events', []) if isinstance(payload, dict) else []:
+            for market in event.get('markets') or []:
+                if market.get('conditionId'):
+                    self.markets.setdefault(market['conditionId'], market)
+
+    def add_trades(self, user, trades):
+        """Merge trades into the wallet's fixture; returns how many were new."""
+        user = user.lower()
+        path = os.path.join(self.directory, 'trades', f'{user}.json')
+        stored = read_json(path, [])
+        known = {trade_identity(t) for t in stored}
+        new = [t for t in trades if trade_identity(t) not in known]
+        stored.extend(new)
+        write_json(path, stored)
+        self.trades.pop(user, None)
+        return len(new)
+
+    def save_markets(self, markets):
+        for market in markets:
+            if market.get('conditionId'):
+                self.markets[market['conditionId']] = market
+        write_json(os.path.join(self.directory, 'markets.json'), self.markets)
+
+
+class SyntheticData:
+    """Deterministic markets and wallet histories of any size."""
+
+    def __init__(self, trades_per_market, markets=10, seed=42):
+        self.trades_per_market = trades_per_market
+        self.seed = seed
+        self.markets = OrderedDict()
+        for i in range(markets):
+            condition_id = '0x' + hashlib.sha256(f'{seed}:market:{i}'.encode()).hexdigest()
+            self.markets[condition_id] = {
+                'conditionId': condition_id,
+                'question': f'Synthetic market {i}',
+                'slug': f'synthetic-market-{i}',
+                'closed': i % 2 == 1,
+                # odd markets resolved, alternately YES and NO
+                'outcomePrices': json.dumps(['1', '0'] if i % 4 == 1 else ['0', '1'] if i % 2 else ['0.5', '0.5']),
+            }
+        self.columns = OrderedDict()
+        # room for every market of a wallet plus its merged order
+        self.cache_size = max(SYNTHETIC_CACHE, 2 * (markets + 1))
+        self.lock = threading.Lock()
+
+    def events(self):
+        """One event per market."""
+        return [
+            {'id': f'synthetic-{i}', 'title': m['question'], 'slug': m['slug'], 'closed': m['closed'], 'markets': [m]}
+            for i, m in enumerate(self.markets.values())
+        ]
+
+    def search(self, query, limit=20):
+        words = query.lower().split()
+        events = [e for e in self.events() if all(w in e['title'].lower() for w in words)]
+        return {'events': events[:limit]}
+
+    def cached(self, key, build):
+        with self.lock:
+            if key in self.columns:
+                self.columns.move_to_end(key)
+                return self.columns[key]
+        value = build()
+        with self.lock:
+            self.columns[key] = value
+            while len(self.columns) > self.cache_size:
+                self.columns.popitem(last=False)
+        return value
+
+    def history(self, user, condition_id):
+        """Columns of one wallet's trades in a market, oldest first (LRU cached)."""
+        def build():
+            digest = hashlib.sha256(f'{self.seed}:{user}:{condition_id}'.encode()).digest()
+            rng = np.random.default_rng(int.from_bytes(digest[:8], 'little'))
+            n = self.trades_per_market
+            is_yes = rng.random(n) < 0.5
+            walk = np.clip(50.0 + np.cumsum(rng.normal(0, 0.5, n)), 1.0, 99.0)
+            return {
+                'timestamp': SYNTHETIC_START + np.cumsum(rng.integers(0, 4, n)),
+                'price': np.round(np.where(is_yes, walk, 100.0 - walk) / 100.0, 4),
+                'is_yes': is_yes,
+                'is_buy': rng.random(n) < 0.7,
+                'size': np.round(rng.exponential(20, n), 2),
+            }
+
+        return self.cached((user, condition_id), build)
+
+    def wallet_order(self, user):
+        """(market index, trade index) of a wallet's trades across all markets, newest first."""
+        def build():
+            ids = list(self.markets)
+            timestamps = np.concatenate([self.history(user, cid)['timestamp'] for cid in ids])
+            market = np.repeat(np.arange(len(ids)), self.trades_per_market)
+            index = np.tile(np.arange(self.trades_per_market), len(ids))
+            order = np.argsort(timestamps, kind='stable')[::-1]
+            return market[order], index[order]
+
+        return self.cached((user, None), build)
+
+    def trade(self, user, condition_id, columns, i):
+        is_yes = bool(columns['is_yes'][i])
+        return {
+            'proxyWallet': user,
+            'side': 'BUY' if columns['is_buy'][i] else 'SELL',
+            'asset': f'{condition_id[:18]}-{int(not is_yes)}',
+            'conditionId': condition_id,
+            'size': float(columns['size'][i]),
+            'price': float(columns['price'][i]),
+            'timestamp': int(columns['timestamp'][i]),
+            'title': self.markets.get(condition_id, {}).get('question', 'Synthetic market'),
+            'outcome': 'Up' if is_yes else 'Down',
+            'outcomeIndex': int(not is_yes),
+            'transactionHash': '0x' + hashlib.sha256(f'{user}:{condition_id}:{i}'.encode()).hexdigest(),
+        }
+
+    def page(self, user, condition_id, offset, limit):
+        """Newest-first slice of a wallet's trades, in one market or across all of them."""
+        user = user.lower()
+        if condition_id:
+            columns = self.history(user, condition_id)
+            n = len(columns['timestamp'])
+            # newest first: position p is trade n-1-p
+            return [self.trade(user, condition_id, columns, n - 1 - p)
+                    for p in range(offset, min(offset + limit, n))]
+
+        market, index = self.wallet_order(user)
+        ids = list(self.markets)
+        return [self.trade(user, ids[m], self.history(user, ids[m]), i)
+                for m, i in zip(market[offset:offset + limit].tolist(), index[offset:offset + limit].tolist())]
+
+
+class MockPolymarket:
+    """Request routing shared by the HTTP handler; counts requests per endpoint."""
+
+    def __init__(self, fixtures=None, synthetic=None, latency=0.0, jitter=0.0,
+                 max_page_size=500, error_rate=0.0, seed=42):
+        self.fixtures = fixtures
+        self.synthetic = synthetic
+        self.latency = latency
+        self.jitter = jitter
+        self.max_page_size = max_page_size
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+    def delay(self):
+        with self.lock:
+            extra = self.random.uniform(0, self.jitter) if self.jitter else 0.0
+            failed = self.error_rate and self.random.random() < self.error_rate
+        if self.latency or extra:
+            time.sleep(self.latency + extra)
+        return failed
+
+    def search(self, params):
+        query = params.get('q', [''])[0]
+        payload = self.fixtures.search(query) if self.fixtures else None
+        if payload is None:
+            payload = self.synthetic.search(query) if self.synthetic else {'events': []}
+        return payload
+
+    def trades(self, params):
+        user = params.get('user', [''])[0]
+        market = params.get('market', [''])[0]
+        offset = max(0, int(params.get('offset', ['0'])[0]))
+        limit = max(1, min(int(params.get('limit', ['100'])[0]), self.max_page_size))
+
+        recorded = self.fixtures.wallet_trades(user) if self.fixtures and user else None
+        if recorded is not None:
+            trades = [t for t in recorded if t.get('conditionId') == market] if market else recorded
+            return trades[offset:offset + limit]
+        if self.synthetic and user:
+            return self.synthetic.page(user, market, offset, limit)
+        return []
+
+    def markets(self, params):
+        ids = [cid for value in params.get('condition_ids', []) for cid in value.split(',') if cid]
+        found = []
+        for cid in ids:
+            market = self.fixtures.markets.get(cid) if self.fixtures else None
+            if market is None and self.synthetic:
+                market = self.synthetic.markets.get(cid)
+            if market is not None:
+                found.append(market)
+        return found
+
+    def events(self, params):
+        offset = max(0, int(params.get('offset', ['0'])[0]))
+        limit = max(1, min(int(params.get('limit', ['100'])[0]), self.max_page_size))
+        closed = params.get('closed', [''])[0]
+        events = (self.fixtures.events() if self.fixtures else []) + (self.synthetic.events() if self.synthetic else [])
+        if closed in ('true', 'false'):
+            events = [e for e in events if bool(e.get('closed')) == (closed == 'true')]
+        return events[offset:offset + limit]
+
+    def handle(self, path, params):
+        """(status, payload) of one GET."""
+        routes = {'/public-search': self.search, '/trades': self.trades, '/markets': self.markets,
+                  '/events': self.events}
+        route = routes.get(path.rstrip('/'))
+        with self.lock:
+            self.stats[path] += 1
+        if route is None:
+            return 404, {'error': 'not found'}
+        if self.delay():
+            with self.lock:
+                self.stats['errors'] += 1
+            return 503, {'error': 'injected failure'}
+        try:
+            return 200, route(params)
+        except ValueError as exc:
+            return 400, {'error': str(exc)}
+
+
+def make_handler(api, log=None):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            status, payload = api.handle(url.path, parse_qs(url.query))
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            if log is not None:
+                log(f'{self.address_string()} {format % args}')
+
+    return Handler
+
+
+def serve_mock_api(api, host, port, log=print, verbose=False):
+    """Serve until interrupted; prints request counts on the way out."""
+    server = ThreadingHTTPServer((host, port), make_handler(api, log if verbose else None))
+    server.daemon_threads = True
+    log(f'mock Polymarket API on http://{host}:{port} '
+        f'(latency={api.latency * 1000:.0f}ms+{api.jitter * 1000:.0f}ms, page<={api.max_page_size}, '
+        f'errors={api.error_rate:.0%})')
+    log(f'  export POLYMARKET_API_URL=http://{host}:{port}')
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        log('requests: ' + ', '.join(f'{k}={v}' for k, v in sorted(api.stats.items())))
+
+
+def record_fixtures(client, store, queries=(), pairs=(), wallets=(), log=print):
+    """Fetch live responses through `client` and add them to `store`.
+
+    `pairs` are (condition_id, user) to record one market of a wallet,
+    `wallets` whole wallets. The markets of every recorded trade are looked
+    up too, so /markets can answer for them.
+    """
+    condition_ids = set()
+    for query in queries:
+        payload = client.search(query)
+        store.save_search(query, payload)
+        log(f'search "{query}": {sum(len(e.get("markets") or []) for e in payload.get("events", []))} markets')
+
+    jobs = [(cid, user) for cid, user in pairs] + [(None, user) for user in wallets]
+    for condition_id, user in jobs:
+        trades = client.fetch_trades(condition_id, user)
+        new = store.add_trades(user, trades)
+        condition_ids.update(t.get('conditionId') for t in trades if t.get('conditionId'))
+        log(f'trades {user} {condition_id or "(all markets)"}: {len(trades)} fetched, {new} new')
+
+    ids = sorted(condition_ids - set(store.markets))
+    markets = []
+    for start in range(0, len(ids), 50):
+        chunk = ids[start:start + 50]
+        data = client.get_json(client.markets_url, {'condition_ids': chunk, 'limit': len(chunk)}, timeout=10)
+        markets.extend(data if isinstance(data, list) else [])
+    store.save_markets(markets)
+    log(f'markets: {len(store.markets)} stored')
@@ -1,3 +1,118 @@
 from django.db import models
 
-# Create your models here.
+
+class WalletTradeSet(models.Model):
+    """Набор сделок кошелька по одному рынку (загрузка из API или JSON файла)"""
+    SOURCE_CHOICES = [
+        ('api', 'API'),
+        ('upload', 'Upload'),
+    ]
+    RESOLVED_CHOICES = [
+        ('YES', 'YES'),
+        ('NO', 'NO'),
+    ]
+
+    condition_id = models.CharField(max_length=100, blank=True)
+    user_address = models.CharField(max_length=100, blank=True)
+    market_title = models.CharField(max_length=500, blank=True)
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default='api')
+    resolved_side = models.CharField(max_length=3, choices=RESOLVED_CHOICES, blank=True)
+    trade_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-updated_at']
+        indexes = [
+            models.Index(fields=['user_address', 'condition_id']),
+            models.Index(fields=['condition_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_address or self.source} @ {self.market_title or self.condition_id}"
+
+
+class Trade(models.Model):
+    """Сделка Polymarket (поля data-api /trades)"""
+    trade_set = models.ForeignKey(WalletTradeSet, on_delete=models.CASCADE, related_name='trades')
+    proxy_wallet = models.CharField(max_length=100, blank=True)
+    condition_id = models.CharField(max_length=100, blank=True)
+    asset = models.CharField(max_length=100, blank=True)
+    side = models.CharField(max_length=4)                 # BUY / SELL
+    outcome = models.CharField(max_length=50, blank=True)  # Up / Down / Yes / No
+    outcome_index = models.IntegerField(null=True, blank=True)
+    price = models.FloatField()
+    size = models.FloatField()
+    timestamp = models.BigIntegerField()
+    transaction_hash = models.CharField(max_length=100, blank=True, db_index=True)
+
+    class Meta:
+        ordering = ['timestamp', 'id']
+        indexes = [
+            models.Index(fields=['proxy_wallet', 'condition_id', 'timestamp']),
+            models.Index(fields=['trade_set', 'timestamp']),
+        ]
+
+    def __str__(self):
+        return f"{self.side} {self.size} {self.outcome} @ {self.price}"
+
+
+class WalletAnalysis(models.Model):
+    """Результат анализа набора сделок: сводные метрики + упакованные массивы"""
+    trade_set = models.OneToOneField(WalletTradeSet, on_delete=models.CASCADE, related_name='analysis')
+    resolved_side = models.CharField(max_length=3, blank=True)
+    trade_count = models.IntegerField(default=0)
+    summary = models.JSONField(default=dict)       # скалярные метрики
+    data = models.BinaryField()                    # колонки ANALYSIS_COLUMNS подряд (little-endian)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Analysis of {self.trade_set}"
+
+
+class WalletLedger(models.Model):
+    """FIFO-леджер позиций набора сделок: состояние лотов + ряды PnL, дополняется инкрементально"""
+    trade_set = models.OneToOneField(WalletTradeSet, on_delete=models.CASCADE, related_name='ledger')
+    state = models.JSONField(default=dict)         # открытые лоты, realized, последние цены
+    last_trade_id = models.BigIntegerField(null=True, blank=True)  # последняя применённая сделка
+    trade_count = models.IntegerField(default=0)
+    series = models.BinaryField(default=b'')       # записи LEDGER_POINT подряд, по сделке на запись
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Ledger of {self.trade_set}"
+
+
+class CatalogEvent(models.Model):
+    """Событие Polymarket в локальном каталоге (gamma /events)"""
+    event_id = models.CharField(max_length=100, unique=True)   # id из gamma, иначе slug
+    slug = models.CharField(max_length=300, blank=True)
+    title = models.CharField(max_length=500, blank=True)
+    start_date = models.DateTimeField(null=True, blank=True)
+    end_date = models.DateTimeField(null=True, blank=True)
+    closed = models.BooleanField(default=False)
+    synced_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.title or self.slug or self.event_id
+
+
+class CatalogMarket(models.Model):
+    """Рынок в локальном каталоге; полнотекстовый поиск через FTS5-индекс (см. catalog.py)"""
+    event = models.ForeignKey(CatalogEvent, on_delete=models.CASCADE, related_name='markets', null=True, blank=True)
+    condition_id = models.CharField(max_length=100, unique=True)
+    question = models.CharField(max_length=500, blank=True)
+    slug = models.CharField(max_length=300, blank=True)
+    start_date = models.DateTimeField(null=True, blank=True)
+    end_date = models.DateTimeField(null=True, blank=True)
+    closed = models.BooleanField(default=False)
+    resolved_side = models.CharField(max_length=3, blank=True)  # YES / NO, пусто пока не закрыт
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['closed', 'end_date']),
+        ]
+
+    def __str__(self):
+        return self.question or self.condition_id
@@ -0,0 +1,168 @@
+"""Whole-wallet (portfolio) analysis across markets.
+
+All trades of the wallet come from one pass over the trades endpoint, are
+split by conditionId and every market goes through calculate_metrics on a
+thread pool. Markets the API reports as closed count as realized PnL at
+their outcome; the rest are marked to market at their last traded prices.
+
+The timeline adds the per-market curves up on a common time grid. A
+resolved market's exposure is released and its PnL realized at its last
+trade (the API does not give the resolution time).
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+from django.conf import settings
+
+from .analysis import bucket_seconds, rounded
+from .trades import store_trade_set
+
+
+def partition_by_market(raw_trades):
+    """{condition_id: trades oldest first}; trades without a conditionId are dropped."""
+    markets = {}
+    for item in sorted(raw_trades, key=lambda t: int(t.get('timestamp') or 0)):
+        condition_id = item.get('conditionId')
+        if condition_id:
+            markets.setdefault(condition_id, []).append(item)
+    return markets
+
+
+def filled_price(prices, mask):
+    """Last non-zero price among the masked trades at every trade (nan before the first)."""
+    idx = np.where(mask & (prices != 0), np.arange(len(prices)), -1)
+    idx = np.maximum.accumulate(idx) if len(idx) else idx
+    return np.where(idx >= 0, prices[np.maximum(idx, 0)], np.nan)
+
+
+def pnl_curve(trades, metrics):
+    """Mark-to-market PnL after every trade ($), same pricing as calculate_metrics."""
+    up = filled_price(trades['price'], trades['is_yes'])
+    down = filled_price(trades['price'], ~trades['is_yes'])
+    # One side never traded yet: YES + NO = 100 cents
+    up, down = np.where(np.isnan(up), 100.0 - down, up), np.where(np.isnan(down), 100.0 - up, down)
+    up, down = np.nan_to_num(up), np.nan_to_num(down)
+    value = metrics['yes_sh_curve'] * up / 100.0 + metrics['no_sh_curve'] * down / 100.0
+    return value - metrics['net_curve']
+
+
+def market_result(condition_id, raw_trades, outcome=None):
+    """Metrics of one market plus its curves for the timeline.
+
+    `outcome` is None for an open market, otherwise the winning side ('' when
+    unknown: it is then inferred from the trades like the single-market flow).
+    """
+    from .views import calculate_metrics, infer_resolved_side_from_trades, parse_trades, trades_array
+
+    resolved = outcome is not None
+    side = outcome or infer_resolved_side_from_trades(raw_trades)[0] or ''
+    trades = trades_array(parse_trades(raw_trades))
+    metrics = calculate_metrics(trades, side if resolved else None)
+    row = {
+        'condition_id': condition_id,
+        'market_title': raw_trades[0].get('title') or condition_id,
+        'status': 'resolved' if resolved else 'open',
+        'resolved_side': side,
+        'trade_count': metrics['trade_count'],
+        'pnl': round(metrics['current_pnl'], 2),
+        'pnl_pct': round(metrics['current_pnl_pct'], 1),
+        'volume': round(float(trades['cost'].sum()), 2),
+        'exposure': 0.0 if resolved else round(metrics['total_spent'], 2),
+        'peak_exposure': round(float(metrics['net_curve'].max()), 2),
+        'value': round(metrics['current_value'], 2),
+        'first_trade': int(trades['timestamp'][0]),
+        'last_trade': int(trades['timestamp'][-1]),
+    }
+    curves = {
+        'timestamp': trades['timestamp'],
+        'exposure': metrics['net_curve'],
+        'pnl': pnl_curve(trades, metrics),
+    }
+    return row, curves
+
+
+def step_values(ts, values, grid):
+    """Value of a step series (changes at `ts`) at every grid time, 0 before the first step."""
+    idx = np.searchsorted(ts, grid, side='right') - 1
+    return np.where(idx >= 0, values[np.maximum(idx, 0)], 0.0)
+
+
+def portfolio_timeline(rows, curves, points=400):
+    """Exposure, realized and unrealized PnL of the whole wallet over time."""
+    if not rows:
+        return {'t': [], 'exposure': [], 'realized': [], 'unrealized': [], 'bucket': 0}
+    start = min(r['first_trade'] for r in rows)
+    end = max(r['last_trade'] for r in rows)
+    step = bucket_seconds(max(end - start, 1), points)
+    grid = np.arange(start - start % step, end + step, step) + step - 1  # bucket ends
+
+    exposure = np.zeros(len(grid))
+    realized = np.zeros(len(grid))
+    unrealized = np.zeros(len(grid))
+    for row, curve in zip(rows, curves):
+        live = np.ones(len(grid), dtype=bool)
+        if row['status'] == 'resolved':
+            live = grid < row['last_trade']
+            realized += np.where(live, 0.0, row['pnl'])
+        exposure += np.where(live, step_values(curve['timestamp'], curve['exposure'], grid), 0.0)
+        unrealized += np.where(live, step_values(curve['timestamp'], curve['pnl'], grid), 0.0)
+
+    return {
+        't': (np.minimum(grid, end) * 1000).tolist(),
+        'exposure': rounded(exposure, 2),
+        'realized': rounded(realized, 2),
+        'unrealized': rounded(unrealized, 2),
+        'bucket': step,
+    }
+
+
+def portfolio_totals(rows):
+    realized = [r for r in rows if r['status'] == 'resolved']
+    open_rows = [r for r in rows if r['status'] == 'open']
+    totals = {
+        'markets': len(rows),
+        'resolved': len(realized),
+        'open': len(open_rows),
+        'trade_count': sum(r['trade_count'] for r in rows),
+        'volume': round(sum(r['volume'] for r in rows), 2),
+        'realized_pnl': round(sum(r['pnl'] for r in realized), 2),
+        'unrealized_pnl': round(sum(r['pnl'] for r in open_rows), 2),
+        'exposure': round(sum(r['exposure'] for r in open_rows), 2),
+    }
+    totals['total_pnl'] = round(totals['realized_pnl'] + totals['unrealized_pnl'], 2)
+    return totals
+
+
+def run_portfolio(client, user_address, workers=None):
+    """Fetch, split, store and analyze every market of a wallet.
+
+    Returns (rows sorted by PnL, totals, timeline); each row carries the
+    trade_set_id of the stored market for drill-down.
+    Raises requests.RequestException when the trades cannot be fetched.
+    """
+    workers = max(1, workers or settings.WALLET_BATCH_WORKERS)
+    markets = partition_by_market(client.fetch_wallet_trades(user_address))
+    try:
+        outcomes = client.market_outcomes(markets)
+    except (requests.RequestException, ValueError):
+        # Market lookup is best effort: markets seen closed in a search still count as resolved
+        outcomes = {cid: '' for cid in markets if client.is_resolved(cid)}
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='portfolio') as pool:
+        results = list(pool.map(
+            lambda item: market_result(item[0], item[1], outcomes.get(item[0])), markets.items(),
+        ))
+
+    rows = [row for row, _ in results]
+    timeline = portfolio_timeline(rows, [curve for _, curve in results])
+
+    for row in rows:
+        trade_set = store_trade_set(markets[row['condition_id']], row['condition_id'], user_address, source='api')
+        if row['resolved_side'] and trade_set.resolved_side != row['resolved_side']:
+            trade_set.resolved_side = row['resolved_side']
+            trade_set.save(update_fields=['resolved_side'])
+        row['trade_set_id'] = trade_set.pk
+
+    rows.sort(key=lambda r: r['pnl'], reverse=True)
+    return rows, portfolio_totals(rows), timeline
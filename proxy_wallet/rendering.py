@@ -0,0 +1,98 @@
+"""Chart rendering off the request thread.
+
+Charts are rendered by a small pool of worker processes (spawned, each runs
+django.setup() once), written into the ChartCache under their content key
+and served by view_chart once present. Jobs are deduplicated per key within
+this server process.
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from .charts import get_chart_cache
+
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pending = {}
+_failed = set()
+_lock = threading.Lock()
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def _render_job(key, parsed, metrics, market_title, resolved_side):
+    """Runs in a worker process."""
+    from .views import generate_chart
+
+    get_chart_cache().get_or_render(
+        key, lambda path: generate_chart(parsed, metrics, market_title, resolved_side, path),
+    )
+    return key
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.CHART_RENDER_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+        )
+    return _pool
+
+
+def _job_done(key, future):
+    global _pool
+    with _lock:
+        _pending.pop(key, None)
+        if future.cancelled():
+            # exception() would raise CancelledError here
+            _failed.add(key)
+            logger.error('Chart %s render was cancelled', key)
+            return
+        error = future.exception()
+        if error is not None:
+            _failed.add(key)
+            logger.error('Chart %s failed to render: %s', key, error)
+            if isinstance(error, BrokenProcessPool):
+                _pool = None
+
+
+def submit_chart(key, parsed, metrics, market_title, resolved_side):
+    """Queue the chart for rendering unless it is cached or already queued."""
+    if get_chart_cache().get(key) is not None:
+        return 'ready'
+
+    if settings.CHART_RENDER_WORKERS <= 0:
+        _render_job(key, parsed, metrics, market_title, resolved_side)
+        return 'ready'
+
+    with _lock:
+        if key in _pending:
+            return 'pending'
+        _failed.discard(key)
+        future = get_pool().submit(_render_job, key, parsed, metrics, market_title, resolved_side)
+        _pending[key] = future
+    future.add_done_callback(lambda f: _job_done(key, f))
+    return 'pending'
+
+
+def chart_status(key):
+    """'ready', 'pending', 'failed' or 'missing' (unknown to this process)."""
+    if get_chart_cache().get(key) is not None:
+        return 'ready'
+    with _lock:
+        if key in _pending:
+            return 'pending'
+        if key in _failed:
+            return 'failed'
+    return 'missing'
@@ -0,0 +1,205 @@
+"""Streaming wallet reports: TXT, CSV and XLSX.
+
+No Django imports, so ``projects/main.py`` can use the writers too. Rows are
+produced lazily from the trade array (TRADE_DTYPE) and the metric curves in
+chunks of ROW_CHUNK trades, so a report never exists as a whole in memory.
+XLSX goes through openpyxl's write-only mode, which spools every sheet to a
+temporary file instead of keeping cells around.
+"""
+import csv
+import datetime
+import io
+
+from openpyxl import Workbook
+
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# format -> content type
+REPORT_FORMATS = {
+    'txt': 'text/plain; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': XLSX_CONTENT_TYPE,
+}
+
+ROW_CHUNK = 10000
+TEXT_CHUNK = 64 * 1024
+
+TRADE_HEADER = ['Idx', 'Time', 'Type', 'Side', 'Price(c)', 'Shares', 'Cost($)']
+EXPOSURE_HEADER = ['Idx', 'Time', 'YES ($)', 'NO ($)', 'NET ($)', 'YES (sh)', 'NO (sh)', 'NET (sh)']
+CUMULATIVE_HEADER = ['Idx', 'Time', 'YES buys (sh)', 'NO buys (sh)', 'YES buys ($)', 'NO buys ($)']
+
+
+def format_time(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def iter_columns(columns, n, chunk=ROW_CHUNK):
+    """Row tuples of equally long arrays, converted to Python values chunk by chunk."""
+    for start in range(0, n, chunk):
+        yield from zip(*(column[start:start + chunk].tolist() for column in columns))
+
+
+def trade_rows(trades):
+    """(idx, time, type, side, price, shares, cost) per trade."""
+    columns = (trades['timestamp'], trades['is_buy'], trades['is_yes'],
+               trades['price'], trades['shares'], trades['cost'])
+    for i, (ts, is_buy, is_yes, price, shares, cost) in enumerate(iter_columns(columns, len(trades))):
+        yield (i + 1, format_time(ts), 'Buy' if is_buy else 'Sell', 'Up' if is_yes else 'Down',
+               price, shares, cost)
+
+
+def exposure_rows(trades, metrics):
+    columns = (trades['timestamp'], metrics['yes_curve'], metrics['no_curve'], metrics['net_curve'],
+               metrics['yes_sh_curve'], metrics['no_sh_curve'], metrics['net_sh_curve'])
+    for i, (ts, *values) in enumerate(iter_columns(columns, len(trades))):
+        yield (i + 1, format_time(ts), *values)
+
+
+def cumulative_rows(trades, metrics):
+    columns = (trades['timestamp'], metrics['cum_yes'], metrics['cum_no'],
+               metrics['cum_yes_cost'], metrics['cum_no_cost'])
+    for i, (ts, *values) in enumerate(iter_columns(columns, len(trades))):
+        yield (i + 1, format_time(ts), *values)
+
+
+def last(curve):
+    return float(curve[-1]) if len(curve) else 0.0
+
+
+def summary_lines(market_title, resolved_side, trades, metrics):
+    """Report header: everything but the per-trade table."""
+    start_time = end_time = 'N/A'
+    if len(trades):
+        start_time = format_time(int(trades['timestamp'][0]))
+        end_time = format_time(int(trades['timestamp'][-1]))
+
+    prices = metrics['prices']
+    min_price = float(prices.min()) if len(prices) else 0
+    max_price = float(prices.max()) if len(prices) else 0
+
+    return [
+        f"MARKET: {market_title}",
+        f"RESOLUTION: {resolved_side}",
+        f"TRADES: {metrics['trade_count']}",
+        f"TIME RANGE: {start_time} to {end_time}",
+        f"PRICE RANGE: {min_price:.2f} - {max_price:.2f}",
+        f"CURRENT PNL (MtM): $ {metrics['current_pnl']:.2f} ({metrics['current_pnl_pct']:.2f}%)",
+        f"CURRENT VALUE:     $ {metrics['current_value']:.2f}",
+        "",
+        "--- Position at resolution ---",
+        f"Remaining YES shares: {metrics['remaining_yes']:.2f}",
+        f"Remaining NO shares:  {metrics['remaining_no']:.2f}",
+        f"Total spent (net exposure): $ {metrics['total_spent']:.2f}",
+        "",
+        f"IF RESOLVED YES:",
+        f"  Final value: $ {metrics['final_value_yes']:.2f}",
+        f"  PnL:         $ {metrics['pnl_yes']:.2f} ({metrics['pnl_yes_pct']:.2f}%)",
+        "",
+        f"IF RESOLVED NO:",
+        f"  Final value: $ {metrics['final_value_no']:.2f}",
+        f"  PnL:         $ {metrics['pnl_no']:.2f} ({metrics['pnl_no_pct']:.2f}%)",
+        "",
+        "--- Buy/Sell totals ---",
+        f"YES buys:  {metrics['yes_buy_sh']:.2f} sh / $ {metrics['yes_buy_cost']:.2f}",
+        f"YES sells: {metrics['yes_sell_sh']:.2f} sh / $ {metrics['yes_sell_cost']:.2f}",
+        f"NO buys:   {metrics['no_buy_sh']:.2f} sh / $ {metrics['no_buy_cost']:.2f}",
+        f"NO sells:  {metrics['no_sell_sh']:.2f} sh / $ {metrics['no_sell_cost']:.2f}",
+        "",
+        "--- Cumulative buys ---",
+        f"YES cumulative: {metrics['cum_yes_total']:.2f} sh / $ {metrics['cum_yes_cost_total']:.2f}",
+        f"NO cumulative:  {metrics['cum_no_total']:.2f} sh / $ {metrics['cum_no_cost_total']:.2f}",
+        "",
+        "--- Exposure peaks (trade index: earliest → latest) ---",
+        f"YES dollar peak: $ {metrics['yes_peak_val']:.2f} at trade #{metrics['yes_peak_idx'] + 1}",
+        f"NO dollar peak:  $ {metrics['no_peak_val']:.2f} at trade #{metrics['no_peak_idx'] + 1}",
+        f"YES share peak:  {metrics['yes_sh_peak_val']:.2f} sh at trade #{metrics['yes_sh_peak_idx'] + 1}",
+        f"NO share peak:   {metrics['no_sh_peak_val']:.2f} sh at trade #{metrics['no_sh_peak_idx'] + 1}",
+        "",
+        "--- Final exposure ---",
+        f"YES exposure: $ {last(metrics['yes_curve']):.2f} | {last(metrics['yes_sh_curve']):.2f} sh",
+        f"NO exposure:  $ {last(metrics['no_curve']):.2f} | {last(metrics['no_sh_curve']):.2f} sh",
+        f"NET exposure: $ {last(metrics['net_curve']):.2f} | {last(metrics['net_sh_curve']):.2f} sh",
+    ]
+
+
+def chunked(pieces, size=TEXT_CHUNK):
+    """Join small strings into chunks of about `size` characters."""
+    buffer, length = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def text_lines(market_title, resolved_side, trades, metrics):
+    yield from summary_lines(market_title, resolved_side, trades, metrics)
+    yield ""
+    yield "--- Trades (Sorted by Timestamp) ---"
+    yield "Idx | Time                | Type | Side | Price(c) |   Shares   |    Cost($)"
+    yield "----+---------------------+------+-----+----------+------------+------------"
+    for i, dt_str, kind, side, price, shares, cost in trade_rows(trades):
+        yield (
+            f"{i:3d} | {dt_str} | {kind:<4} | {side:<4} | "
+            f"{price:8.2f} | {shares:10.2f} | $ {cost:9.2f}"
+        )
+
+
+def iter_text_report(market_title, resolved_side, trades, metrics):
+    """Plain-text report in chunks (lines joined by newlines, no trailing one)."""
+    def pieces():
+        for i, line in enumerate(text_lines(market_title, resolved_side, trades, metrics)):
+            if i:
+                yield '\n'
+            yield line
+    return chunked(pieces())
+
+
+def iter_csv(header, rows):
+    """CSV text in chunks."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= TEXT_CHUNK:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_csv_report(trades, metrics):
+    """One row per trade: the trade, then its exposure and cumulative columns."""
+    rows = (
+        trade + exposure[2:] + cumulative[2:]
+        for trade, exposure, cumulative in zip(
+            trade_rows(trades), exposure_rows(trades, metrics), cumulative_rows(trades, metrics),
+        )
+    )
+    return iter_csv(TRADE_HEADER + EXPOSURE_HEADER[2:] + CUMULATIVE_HEADER[2:], rows)
+
+
+def write_xlsx(target, sheets):
+    """Write-only workbook; `sheets` is a list of (title, header, rows)."""
+    wb = Workbook(write_only=True)
+    for title, header, rows in sheets:
+        ws = wb.create_sheet(title)
+        ws.append(header)
+        for row in rows:
+            ws.append(row)
+    wb.save(target)
+
+
+def write_xlsx_report(target, market_title, resolved_side, trades, metrics):
+    summary = ([line] for line in summary_lines(market_title, resolved_side, trades, metrics))
+    write_xlsx(target, [
+        ('Summary', ['Report'], summary),
+        ('Trades', TRADE_HEADER, trade_rows(trades)),
+        ('Exposure', EXPOSURE_HEADER, exposure_rows(trades, metrics)),
+        ('Cumulative', CUMULATIVE_HEADER, cumulative_rows(trades, metrics)),
+    ])
@@ -1,3 +1,987 @@
-from django.test import TestCase
+import csv
+import datetime
+import gzip
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import requests
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from openpyxl import load_workbook
+
+from .analysis import bucket_seconds, pack_columns, save_analysis, summary_of, trade_feed, unpack_columns
+from .batch import batch_totals, parse_wallet_list, run_batch, wallet_row
+from .cache import ResponseCache
+from .catalog import FTS_DDL, fts_match, rebuild_index, search_catalog, store_events
+from .charts import ChartCache, chart_key
+from .client import CacheMiss, PolymarketClient
+from .ledger import PositionLedger
+from .management.commands.bench_metrics import loop_metrics, synthetic_trades
+from .mockapi import FixtureStore, MockPolymarket, SyntheticData, make_handler
+from .models import CatalogMarket, WalletTradeSet
+from .portfolio import filled_price, partition_by_market, portfolio_timeline, run_portfolio
+from .rendering import _job_done, chart_status, submit_chart
+from .reports import iter_csv_report, iter_text_report, write_xlsx_report
+from .tradefile import TRADE_DTYPE, TradeFileError, iter_json_values, iter_trades, text_chunks
+from .trades import load_raw_trades, store_trade_set
+from .views import calculate_metrics, parse_trades, trade_dicts, trade_set_array, trades_array
+
+
+class MockApiTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.synthetic = SyntheticData(25, markets=4)
+        self.markets = list(self.synthetic.markets)
+
+    def get(self, api, path, **params):
+        return api.handle(path, {k: [str(v)] for k, v in params.items()})
+
+    def test_trades_newest_first_and_paged(self):
+        api = MockPolymarket(synthetic=self.synthetic)
+        status, first = self.get(api, '/trades', user='0xabc', market=self.markets[0], limit=10)
+        _, rest = self.get(api, '/trades', user='0xabc', market=self.markets[0], limit=100, offset=10)
+        self.assertEqual(status, 200)
+        self.assertEqual((len(first), len(rest)), (10, 15))
+        timestamps = [t['timestamp'] for t in first + rest]
+        self.assertEqual(timestamps, sorted(timestamps, reverse=True))
+        self.assertEqual(len({t['transactionHash'] for t in first + rest}), 25)
+
+    def test_page_size_capped(self):
+        api = MockPolymarket(synthetic=self.synthetic, max_page_size=7)
+        _, trades = self.get(api, '/trades', user='0xabc', market=self.markets[0], limit=500)
+        self.assertEqual(len(trades), 7)
+
+    def test_wallet_trades_across_markets(self):
+        api = MockPolymarket(synthetic=self.synthetic)
+        _, trades = self.get(api, '/trades', user='0xabc', limit=500)
+        self.assertEqual(len(trades), 100)
+        self.assertEqual({t['conditionId'] for t in trades}, set(self.markets))
+
+    def test_synthetic_is_deterministic(self):
+        again = SyntheticData(25, markets=4)
+        self.assertEqual(self.synthetic.page('0xabc', self.markets[1], 0, 25),
+                         again.page('0xabc', self.markets[1], 0, 25))
+        self.assertNotEqual(self.synthetic.page('0xabc', self.markets[1], 0, 25),
+                            self.synthetic.page('0xdef', self.markets[1], 0, 25))
+
+    def test_errors_and_stats(self):
+        api = MockPolymarket(synthetic=self.synthetic, error_rate=1.0)
+        self.assertEqual(self.get(api, '/trades', user='0xabc')[0], 503)
+        self.assertEqual(self.get(api, '/nope')[0], 404)
+        self.assertEqual(api.stats['/trades'], 1)
+        self.assertEqual(api.stats['errors'], 1)
+
+    def test_events_paging_and_closed_filter(self):
+        api = MockPolymarket(synthetic=self.synthetic)
+        _, closed = self.get(api, '/events', closed='true', limit=10)
+        _, page = self.get(api, '/events', limit=3, offset=3)
+        self.assertEqual([e['slug'] for e in closed], ['synthetic-market-1', 'synthetic-market-3'])
+        self.assertEqual([e['slug'] for e in page], ['synthetic-market-3'])
+
+    def test_fixtures_before_synthetic(self):
+        store = FixtureStore(self.tmp.name)
+        recorded = [{'transactionHash': '0x1', 'conditionId': self.markets[0], 'timestamp': 5, 'size': 1, 'price': 0.5},
+                    {'transactionHash': '0x2', 'conditionId': self.markets[1], 'timestamp': 9, 'size': 2, 'price': 0.4}]
+        self.assertEqual(store.add_trades('0xABC', recorded), 2)
+        # the same trades again are not stored twice
+        self.assertEqual(store.add_trades('0xabc', recorded), 0)
+        store.save_search('Bitcoin up', {'events': [{'id': 'e1', 'markets': [{'conditionId': '0xm'}]}]})
+        # written out at the end of record_fixtures
+        store.save_markets([])
+
+        api = MockPolymarket(fixtures=FixtureStore(self.tmp.name), synthetic=self.synthetic)
+        _, trades = self.get(api, '/trades', user='0xabc')
+        self.assertEqual([t['transactionHash'] for t in trades], ['0x2', '0x1'])
+        _, trades = self.get(api, '/trades', user='0xabc', market=self.markets[0])
+        self.assertEqual([t['transactionHash'] for t in trades], ['0x1'])
+        # other wallets fall through to synthetic data
+        self.assertEqual(len(self.get(api, '/trades', user='0xdef', market=self.markets[0])[1]), 25)
+        self.assertEqual(self.get(api, '/public-search', q='bitcoin UP')[1]['events'][0]['id'], 'e1')
+        self.assertEqual(self.get(api, '/markets', condition_ids='0xm')[1], [{'conditionId': '0xm'}])
+
+
+class ResponseCacheTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = f'{tmp.name}/cache.sqlite3'
+
+    def cache(self, **kwargs):
+        cache = ResponseCache(self.path, **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_get_set_and_expiry(self):
+        cache = self.cache()
+        cache.set('a', {'x': [1, 2]}, None)
+        cache.set('b', [], -1)
+        self.assertEqual(cache.get('a'), {'x': [1, 2]})
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('b', allow_expired=True), [])
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_running_size(self):
+        cache = self.cache()
+        cache.set('a', 'x' * 100, None)
+        cache.set('a', 'x' * 10, None)
+        cache.set('b', 'x' * 50, None)
+        self.assertEqual(cache._size, cache.stats()['bytes'])
+        cache.clear()
+        self.assertEqual(cache._size, 0)
+
+    def test_evicts_least_recently_used(self):
+        cache = self.cache(max_bytes=1000)
+        for i in range(8):
+            cache.set(f'k{i}', 'x' * 98, None)
+        cache.get('k0')
+        cache.set('k8', 'x' * 298, None)
+        # down to 90% of max_bytes, oldest first but k0 was just read
+        self.assertIsNotNone(cache.get('k0'))
+        self.assertIsNone(cache.get('k1'))
+        self.assertLessEqual(cache.stats()['bytes'], 900)
+        self.assertEqual(cache._size, cache.stats()['bytes'])
+
+    def test_other_writers_counted_before_evicting(self):
+        cache = self.cache(max_bytes=1000)
+        cache.set('mine', 'x' * 98, None)
+        other = self.cache(max_bytes=10 ** 9)
+        for i in range(9):
+            other.set(f'k{i}', 'x' * 98, None)
+        cache.set('more', 'x' * 98, None)
+        # not seen until the total is read back from the file
+        self.assertEqual(cache.stats()['bytes'], 1100)
+        with mock.patch('proxy_wallet.cache.RESYNC_WRITES', 3):
+            cache.set('last', 'x' * 98, None)
+        self.assertLessEqual(cache.stats()['bytes'], 900)
+
+
+class FlakyMock(MockPolymarket):
+    """Fails the next `failures` requests with 503."""
+
+    failures = 0
+
+    def delay(self):
+        with self.lock:
+            if self.failures:
+                self.failures -= 1
+                return True
+        return False
+
+
+class MockServerMixin:
+    """A FlakyMock API on a local HTTP server for the whole test class."""
+
+    TRADES = 25     # per wallet and market
+    MARKETS = 4
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.api = FlakyMock(synthetic=SyntheticData(cls.TRADES, markets=cls.MARKETS))
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(cls.api))
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f'http://127.0.0.1:{cls.server.server_address[1]}'
+        cls.markets = list(cls.api.synthetic.markets)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.api.stats.clear()
+        self.api.failures = 0
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def api_client(self, **kwargs):
+        kwargs.setdefault('page_limit', 10)
+        client = PolymarketClient(
+            search_url=f'{self.base}/public-search', trades_url=f'{self.base}/trades',
+            markets_url=f'{self.base}/markets', events_url=f'{self.base}/events', **kwargs,
+        )
+        self.addCleanup(client.close)
+        return client
+
+
+class ClientTests(MockServerMixin, SimpleTestCase):
+    def cache(self):
+        cache = ResponseCache(f'{self.tmp.name}/cache.sqlite3')
+        self.addCleanup(cache.close)
+        return cache
+
+    def expected(self, condition_id, user='0xabc'):
+        return self.api.synthetic.page(user, condition_id, 0, self.TRADES)
+
+    def test_paging_sequential(self):
+        trades = self.api_client(max_workers=1).fetch_trades(self.markets[0], '0xabc')
+        self.assertEqual(trades, self.expected(self.markets[0]))
+        # 10 + 10 + 5, the short page ends the paging
+        self.assertEqual(self.api.stats['/trades'], 3)
+
+    def test_paging_concurrent(self):
+        trades = self.api_client(max_workers=4).fetch_trades(self.markets[0], '0xabc')
+        self.assertEqual(trades, self.expected(self.markets[0]))
+
+    def test_paging_exact_multiple(self):
+        trades = self.api_client(max_workers=1, page_limit=5).fetch_trades(self.markets[1], '0xabc')
+        self.assertEqual(len(trades), self.TRADES)
+        # the empty sixth page is what ends it
+        self.assertEqual(self.api.stats['/trades'], 6)
+
+    def test_max_pages(self):
+        trades = self.api_client(max_workers=2).fetch_trades(self.markets[0], '0xabc', max_pages=2)
+        self.assertEqual(trades, self.expected(self.markets[0])[:20])
+
+    def test_wallet_trades_across_markets(self):
+        trades = self.api_client(max_workers=3).fetch_wallet_trades('0xabc')
+        self.assertEqual(len(trades), self.TRADES * len(self.markets))
+        timestamps = [t['timestamp'] for t in trades]
+        self.assertEqual(timestamps, sorted(timestamps, reverse=True))
+
+    def test_retry_after_503(self):
+        self.api.failures = 1
+        trades = self.api_client(max_workers=1).fetch_trades(self.markets[0], '0xabc')
+        self.assertEqual(trades, self.expected(self.markets[0]))
+        self.assertEqual(self.api.stats['errors'], 1)
+        self.assertEqual(self.api.stats['/trades'], 4)
+
+    def test_retries_exhausted(self):
+        self.api.failures = 10
+        with self.assertRaises(requests.RequestException):
+            self.api_client(max_workers=1, retries=1).fetch_trades(self.markets[0], '0xabc')
+
+    def test_cache_hits(self):
+        cache = self.cache()
+        client = self.api_client(max_workers=1, cache=cache)
+        first = client.fetch_trades(self.markets[0], '0xabc')
+        requests_made = self.api.stats['/trades']
+        self.assertEqual(client.fetch_trades(self.markets[0], '0xabc'), first)
+        self.assertEqual(self.api.stats['/trades'], requests_made)
+        self.assertEqual(cache.hits, requests_made)
+
+    def test_fresh_skips_cache(self):
+        client = self.api_client(max_workers=1, cache=self.cache())
+        client.fetch_page(self.markets[0], '0xabc', 0)
+        client.fetch_page(self.markets[0], '0xabc', 0, fresh=True)
+        self.assertEqual(self.api.stats['/trades'], 2)
+
+    def test_resolved_market_cached_forever(self):
+        cache = self.cache()
+        # trades_ttl=0: pages of open markets are not cached at all
+        client = self.api_client(max_workers=1, cache=cache, trades_ttl=0)
+        client.fetch_trades(self.markets[1], '0xabc')
+        client.fetch_trades(self.markets[1], '0xabc')
+        self.assertEqual(self.api.stats['/trades'], 6)
+
+        # market 1 is closed; the search marks it resolved
+        client.search('Synthetic market 1')
+        self.assertTrue(client.is_resolved(self.markets[1]))
+        client.fetch_trades(self.markets[1], '0xabc')
+        client.fetch_trades(self.markets[1], '0xabc')
+        self.assertEqual(self.api.stats['/trades'], 9)
+
+    def test_offline(self):
+        cache = self.cache()
+        self.api_client(max_workers=1, cache=cache).fetch_trades(self.markets[0], '0xabc')
+        offline = self.api_client(max_workers=1, cache=cache, offline=True)
+        self.api.stats.clear()
+        self.assertEqual(offline.fetch_trades(self.markets[0], '0xabc'), self.expected(self.markets[0]))
+        with self.assertRaises(CacheMiss):
+            offline.fetch_trades(self.markets[2], '0xabc')
+        self.assertEqual(self.api.stats['/trades'], 0)
+
+    def test_market_outcomes(self):
+        outcomes = self.api_client().market_outcomes(self.markets)
+        # odd markets are closed, alternately YES and NO
+        self.assertEqual(outcomes, {self.markets[1]: 'YES', self.markets[3]: 'NO'})
+
+
+@override_settings(CHART_RENDER_WORKERS=0)
+class AnalysisTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch('proxy_wallet.charts._cache', ChartCache(tmp.name, 10 ** 9))
+        self.cache = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        synthetic = SyntheticData(40, markets=1)
+        raw = synthetic.page('0xabc', next(iter(synthetic.markets)), 0, 40)
+        self.trade_set = store_trade_set(reversed(raw))
+        self.trade_set.resolved_side = 'YES'
+        self.trade_set.save()
+        session = self.client.session
+        session['trade_set_id'] = self.trade_set.pk
+        session.save()
+
+    def test_array_matches_parsed_trades(self):
+        parsed = parse_trades(load_raw_trades(self.trade_set))
+        trades = trade_set_array(self.trade_set)
+        np.testing.assert_array_equal(trades, trades_array(parsed))
+        self.assertEqual(trade_dicts(trades), [{k: v for k, v in e.items() if k != 'market'} for e in parsed])
+
+    def test_generate_analysis_renders_chart(self):
+        response = self.client.get(reverse('proxy_wallet:generate_analysis'))
+        self.assertEqual(response.status_code, 200)
+        trades = trade_set_array(self.trade_set)
+        key = chart_key(trades, 'YES', self.trade_set.market_title)
+        self.assertEqual(self.client.session['chart_key'], key)
+        self.assertIsNotNone(self.cache.get(key))
+        metrics = calculate_metrics(trades, 'YES')
+        self.assertEqual(response.context['metrics'], summary_of(metrics))
+
+        response = self.client.get(reverse('proxy_wallet:view_chart'), {'v': key})
+        self.assertEqual((response.status_code, response['Content-Type']), (200, 'image/png'))
+
+
+class MetricsTests(SimpleTestCase):
+    def assertMatchesLoop(self, parsed, resolved_side):
+        expected = loop_metrics(parsed, resolved_side)
+        metrics = calculate_metrics(trades_array(parsed), resolved_side)
+        self.assertEqual(set(metrics), set(expected))
+        for key, value in expected.items():
+            if key.endswith('_idx') or key == 'trade_count':
+                self.assertEqual(metrics[key], value, key)
+            else:
+                np.testing.assert_allclose(metrics[key], value, rtol=1e-9, atol=1e-9, err_msg=key)
+
+    def test_matches_loop_implementation(self):
+        parsed = synthetic_trades(5000, seed=7)
+        for resolved_side in ('YES', 'NO', ''):
+            self.assertMatchesLoop(parsed, resolved_side)
+
+    def test_one_sided_and_empty(self):
+        parsed = [e for e in synthetic_trades(500, seed=3) if e['side'] == 'Down']
+        self.assertMatchesLoop(parsed, '')
+        self.assertMatchesLoop(parsed[:1], 'YES')
+        self.assertMatchesLoop([], 'NO')
+
+    def test_accepts_parsed_dicts(self):
+        parsed = synthetic_trades(100)
+        self.assertEqual(calculate_metrics(parsed, 'YES')['current_pnl'],
+                         calculate_metrics(trades_array(parsed), 'YES')['current_pnl'])
+
+
+class AnalysisStorageTests(TestCase):
+    def test_pack_roundtrip(self):
+        trades = trades_array(synthetic_trades(300))
+        metrics = calculate_metrics(trades, 'YES')
+        blob = pack_columns(trades, metrics)
+        self.assertEqual(len(blob), 300 * (8 * 4 + 1))
+        columns = unpack_columns(blob, 300)
+        np.testing.assert_array_equal(columns['timestamp'], trades['timestamp'])
+        np.testing.assert_allclose(columns['yes_sh_curve'], metrics['yes_sh_curve'], rtol=1e-6)
+        np.testing.assert_allclose(columns['price'], trades['price'], rtol=1e-6)
+        np.testing.assert_array_equal((columns['flags'] & 1) != 0, trades['is_buy'])
+        np.testing.assert_array_equal((columns['flags'] & 2) != 0, trades['is_yes'])
+
+    def test_save_analysis_keeps_only_scalars_in_summary(self):
+        trade_set = store_trade_set([{'conditionId': '0xm', 'proxyWallet': '0xabc', 'title': 'T',
+                                      'side': 'BUY', 'outcome': 'Up', 'price': 0.4, 'size': 10, 'timestamp': 5}])
+        trades = trade_set_array(trade_set)
+        metrics = calculate_metrics(trades, 'YES')
+        analysis = save_analysis(trade_set, trades, metrics, 'YES')
+        analysis.refresh_from_db()
+        self.assertEqual(analysis.summary['trade_count'], 1)
+        self.assertNotIn('yes_curve', analysis.summary)
+        self.assertEqual(unpack_columns(bytes(analysis.data), 1)['cost'].tolist(), [np.float32(4.0)])
+
+
+class ChartCacheTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = tmp.name
+
+    def write(self, size):
+        def render(path):
+            self.renders += 1
+            with open(path, 'wb') as f:
+                f.write(b'x' * size)
+        return render
+
+    def test_key(self):
+        trades = trades_array(synthetic_trades(10))
+        key = chart_key(trades, 'YES', 'T')
+        self.assertRegex(key, r'^[0-9a-f]{32}$')
+        self.assertEqual(chart_key(trades.copy(), 'YES', 'T'), key)
+        self.assertNotEqual(chart_key(trades, 'NO', 'T'), key)
+        self.assertNotEqual(chart_key(trades[:-1], 'YES', 'T'), key)
+        self.assertNotEqual(chart_key(trades, 'YES', 'T', version=0), key)
+
+    def test_get_or_render_once(self):
+        cache = ChartCache(self.directory, 10 ** 6)
+        self.renders = 0
+        key = 'ab' * 16
+        path = cache.get_or_render(key, self.write(100))
+        self.assertEqual(cache.get_or_render(key, self.write(100)), path)
+        self.assertEqual(self.renders, 1)
+        self.assertEqual(path.parent.name, 'ab')
+        self.assertIsNone(cache.get('../' + key))
+        self.assertIsNone(cache.get('cd' * 16))
+
+    def test_failed_render_leaves_nothing(self):
+        cache = ChartCache(self.directory, 10 ** 6)
+
+        def fail(path):
+            raise RuntimeError('boom')
+
+        with self.assertRaises(RuntimeError):
+            cache.get_or_render('ab' * 16, fail)
+        self.assertEqual(cache.stats(), {'charts': 0, 'bytes': 0})
+
+    def test_evicts_least_recently_used(self):
+        cache = ChartCache(self.directory, 1000)
+        self.renders = 0
+        keys = [f'{i:032x}' for i in range(3)]
+        paths = [cache.get_or_render(key, self.write(400)) for key in keys[:2]]
+        now = time.time()
+        os.utime(paths[0], (now - 20, now - 20))
+        os.utime(paths[1], (now - 10, now - 10))
+        # reading the older chart makes the other one the eviction candidate
+        cache.get(keys[0])
+        cache.get_or_render(keys[2], self.write(400))
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get(keys[2]))
+
+
+class RenderingTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch('proxy_wallet.charts._cache', ChartCache(tmp.name, 10 ** 9))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cancelled_job_marked_failed(self):
+        future = Future()
+        future.cancel()
+        with self.assertLogs('proxy_wallet.rendering', 'ERROR'):
+            _job_done('a' * 32, future)
+        self.assertEqual(chart_status('a' * 32), 'failed')
+
+    def test_failed_and_finished_jobs(self):
+        future = Future()
+        future.set_exception(RuntimeError('boom'))
+        with self.assertLogs('proxy_wallet.rendering', 'ERROR'):
+            _job_done('b' * 32, future)
+        self.assertEqual(chart_status('b' * 32), 'failed')
+
+        future = Future()
+        future.set_result('c' * 32)
+        _job_done('c' * 32, future)
+        self.assertEqual(chart_status('c' * 32), 'missing')
+
+    @override_settings(CHART_RENDER_WORKERS=0)
+    def test_inline_render(self):
+        parsed = synthetic_trades(50)
+        trades = trades_array(parsed)
+        metrics = calculate_metrics(trades, 'YES')
+        key = chart_key(trades, 'YES', 'T')
+        self.assertEqual(submit_chart(key, trades, metrics, 'T', 'YES'), 'ready')
+        self.assertEqual(chart_status(key), 'ready')
+
+
+class TradeFeedTests(SimpleTestCase):
+    def setUp(self):
+        self.trades = trades_array(synthetic_trades(3000))
+        metrics = calculate_metrics(self.trades, 'YES')
+        self.columns = unpack_columns(pack_columns(self.trades, metrics), len(self.trades))
+        self.ts = self.trades['timestamp']
+
+    def test_bucket_seconds(self):
+        self.assertEqual(bucket_seconds(400), 1)
+        self.assertEqual(bucket_seconds(401), 2)
+        self.assertEqual(bucket_seconds(3600), 10)
+        self.assertEqual(bucket_seconds(86400 * 1000), 86400 * 3)
+
+    def test_sparse_range_sent_trade_by_trade(self):
+        start, end = int(self.ts[100]), int(self.ts[200])
+        feed = trade_feed(self.columns, start, end)
+        inside = (self.ts >= start) & (self.ts <= end)
+        self.assertEqual((feed['bucket'], feed['count']), (0, int(inside.sum())))
+        self.assertEqual(feed['trades']['t'], self.ts[inside].tolist())
+        self.assertEqual(feed['trades']['up'], self.trades['is_yes'][inside].tolist())
+
+    def test_dense_range_bucketed(self):
+        feed = trade_feed(self.columns)
+        self.assertEqual(feed['range'], [int(self.ts[0]), int(self.ts[-1])])
+        self.assertEqual(feed['count'], 3000)
+        bucket = feed['bucket']
+        self.assertEqual(bucket, bucket_seconds(int(self.ts[-1] - self.ts[0])))
+        buckets = feed['buckets']
+        self.assertLessEqual(len(buckets['t']), 400)
+        # counts and volume add up to the trades of each side
+        up = self.trades['is_yes']
+        self.assertEqual(sum(n for n in buckets['up']['n'] if n), int(up.sum()))
+        self.assertEqual(sum(n for n in buckets['down']['n'] if n), int((~up).sum()))
+        self.assertAlmostEqual(sum(c for c in buckets['up']['cost'] if c), float(self.trades['cost'][up].sum()), places=2)
+        self.assertAlmostEqual(buckets['yes_sh'][-1], float(self.columns['yes_sh_curve'][-1]), places=2)
+
+        # OHLC of the first Up bucket
+        self.assertEqual(buckets['t'][0], int(self.ts[0]) * 1000)
+        prices = self.trades['price'][up & (self.ts - self.ts[0] < bucket)] / 100
+        self.assertAlmostEqual(buckets['up']['o'][0], prices[0], places=3)
+        self.assertAlmostEqual(buckets['up']['h'][0], prices.max(), places=3)
+        self.assertAlmostEqual(buckets['up']['c'][0], prices[-1], places=3)
+
+    def test_empty_range(self):
+        feed = trade_feed(self.columns, self.ts[-1] + 10, self.ts[-1] + 20)
+        self.assertEqual(feed['count'], 0)
+        self.assertEqual(feed['trades']['t'], [])
+
+
+class BatchTests(MockServerMixin, TestCase):
+    WALLETS = ['0x' + f'{i:x}' * 40 for i in range(1, 4)]
+
+    def test_parse_wallet_list(self):
+        text = f'{self.WALLETS[0].upper().replace("0X", "0x")}, junk 0x123\n{self.WALLETS[1]} {self.WALLETS[0]}'
+        self.assertEqual(parse_wallet_list(text), self.WALLETS[:2])
+
+    def test_leaderboard(self):
+        market = self.markets[1]
+        rows, failed, resolved_side = run_batch(self.api_client(), market, self.WALLETS, 'YES', workers=2)
+        self.assertEqual((failed, resolved_side), ([], 'YES'))
+        self.assertEqual([r['pnl'] for r in rows], sorted((r['pnl'] for r in rows), reverse=True))
+        for row in rows:
+            raw = self.api.synthetic.page(row['address'], market, 0, self.TRADES)
+            self.assertEqual(row, {**wallet_row(row['address'], raw, 'YES'),
+                                   'trade_set_id': row['trade_set_id'], 'market_title': row['market_title']})
+            trade_set = WalletTradeSet.objects.get(pk=row['trade_set_id'])
+            self.assertEqual((trade_set.trade_count, trade_set.resolved_side), (self.TRADES, ''))
+        totals = batch_totals(rows)
+        self.assertEqual((totals['wallets'], totals['trade_count']), (3, 3 * self.TRADES))
+
+    def test_failed_wallets_and_inferred_side(self):
+        self.api.failures = 100
+        rows, failed, _ = run_batch(self.api_client(), self.markets[1], self.WALLETS[:1], workers=1)
+        self.assertEqual((rows, [f['address'] for f in failed]), ([], self.WALLETS[:1]))
+
+        self.api.failures = 0
+        rows, failed, resolved_side = run_batch(self.api_client(), self.markets[1], self.WALLETS, workers=3)
+        self.assertIn(resolved_side, ('YES', 'NO'))
+        self.assertTrue(all(WalletTradeSet.objects.get(pk=r['trade_set_id']).resolved_side == resolved_side
+                            for r in rows))
+
+
+class PortfolioTests(MockServerMixin, TestCase):
+    WALLET = '0x' + 'a' * 40
+
+    def test_partition_and_filled_price(self):
+        raw = [{'conditionId': 'b', 'timestamp': 3}, {'conditionId': 'a', 'timestamp': 1},
+               {'timestamp': 2}, {'conditionId': 'b', 'timestamp': 0}]
+        markets = partition_by_market(raw)
+        self.assertEqual({k: [t['timestamp'] for t in v] for k, v in markets.items()}, {'a': [1], 'b': [0, 3]})
+
+        prices = np.array([10.0, 0.0, 30.0, 40.0])
+        filled = filled_price(prices, np.array([False, True, True, False]))
+        np.testing.assert_array_equal(filled, [np.nan, np.nan, 30.0, 30.0])
+
+    def test_portfolio(self):
+        rows, totals, timeline = run_portfolio(self.api_client(), self.WALLET, workers=2)
+        self.assertEqual(totals['markets'], self.MARKETS)
+        self.assertEqual(totals['trade_count'], self.MARKETS * self.TRADES)
+        # odd markets are closed: 1 resolved YES, 3 resolved NO
+        status = {r['condition_id']: (r['status'], r['resolved_side']) for r in rows}
+        self.assertEqual(status[self.markets[1]], ('resolved', 'YES'))
+        self.assertEqual(status[self.markets[3]], ('resolved', 'NO'))
+        self.assertEqual(status[self.markets[0]][0], 'open')
+        self.assertEqual(totals['total_pnl'], round(totals['realized_pnl'] + totals['unrealized_pnl'], 2))
+
+        # the realized PnL is in the timeline once the resolved markets have stopped trading
+        self.assertAlmostEqual(timeline['realized'][-1], totals['realized_pnl'], places=1)
+        self.assertAlmostEqual(timeline['unrealized'][-1], totals['unrealized_pnl'], places=1)
+        self.assertEqual(len(timeline['t']), len(timeline['exposure']))
+        self.assertEqual(WalletTradeSet.objects.filter(user_address=self.WALLET).count(), self.MARKETS)
+
+    def test_empty_timeline(self):
+        self.assertEqual(portfolio_timeline([], [])['t'], [])
+
+
+def list_text_report(market_title, resolved_side, parsed, metrics):
+    """The report as generate_text_report built it in one string, kept as the reference."""
+    start_time = "N/A"
+    end_time = "N/A"
+    if parsed:
+        start_time = datetime.datetime.fromtimestamp(parsed[0]['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
+        end_time = datetime.datetime.fromtimestamp(parsed[-1]['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
+
+    min_price = min(metrics['prices']) if metrics['prices'] else 0
+    max_price = max(metrics['prices']) if metrics['prices'] else 0
+
+    yes_curve = metrics['yes_curve']
+    no_curve = metrics['no_curve']
+    net_curve = metrics['net_curve']
+    yes_sh_curve = metrics['yes_sh_curve']
+    no_sh_curve = metrics['no_sh_curve']
+    net_sh_curve = metrics['net_sh_curve']
+
+    final_yes_exp = yes_curve[-1] if yes_curve else 0
+    final_yes_sh = yes_sh_curve[-1] if yes_sh_curve else 0
+    final_no_exp = no_curve[-1] if no_curve else 0
+    final_no_sh = no_sh_curve[-1] if no_sh_curve else 0
+    final_net_exp = net_curve[-1] if net_curve else 0
+    final_net_sh = net_sh_curve[-1] if net_sh_curve else 0
+
+    lines = [
+        f"MARKET: {market_title}",
+        f"RESOLUTION: {resolved_side}",
+        f"TRADES: {metrics['trade_count']}",
+        f"TIME RANGE: {start_time} to {end_time}",
+        f"PRICE RANGE: {min_price:.2f} - {max_price:.2f}",
+        f"CURRENT PNL (MtM): $ {metrics['current_pnl']:.2f} ({metrics['current_pnl_pct']:.2f}%)",
+        f"CURRENT VALUE:     $ {metrics['current_value']:.2f}",
+        "",
+        "--- Position at resolution ---",
+        f"Remaining YES shares: {metrics['remaining_yes']:.2f}",
+        f"Remaining NO shares:  {metrics['remaining_no']:.2f}",
+        f"Total spent (net exposure): $ {metrics['total_spent']:.2f}",
+        "",
+        f"IF RESOLVED YES:",
+        f"  Final value: $ {metrics['final_value_yes']:.2f}",
+        f"  PnL:         $ {metrics['pnl_yes']:.2f} ({metrics['pnl_yes_pct']:.2f}%)",
+        "",
+        f"IF RESOLVED NO:",
+        f"  Final value: $ {metrics['final_value_no']:.2f}",
+        f"  PnL:         $ {metrics['pnl_no']:.2f} ({metrics['pnl_no_pct']:.2f}%)",
+        "",
+        "--- Buy/Sell totals ---",
+        f"YES buys:  {metrics['yes_buy_sh']:.2f} sh / $ {metrics['yes_buy_cost']:.2f}",
+        f"YES sells: {metrics['yes_sell_sh']:.2f} sh / $ {metrics['yes_sell_cost']:.2f}",
+        f"NO buys:   {metrics['no_buy_sh']:.2f} sh / $ {metrics['no_buy_cost']:.2f}",
+        f"NO sells:  {metrics['no_sell_sh']:.2f} sh / $ {metrics['no_sell_cost']:.2f}",
+        "",
+        "--- Cumulative buys ---",
+        f"YES cumulative: {metrics['cum_yes_total']:.2f} sh / $ {metrics['cum_yes_cost_total']:.2f}",
+        f"NO cumulative:  {metrics['cum_no_total']:.2f} sh / $ {metrics['cum_no_cost_total']:.2f}",
+        "",
+        "--- Exposure peaks (trade index: earliest → latest) ---",
+        f"YES dollar peak: $ {metrics['yes_peak_val']:.2f} at trade #{metrics['yes_peak_idx'] + 1}",
+        f"NO dollar peak:  $ {metrics['no_peak_val']:.2f} at trade #{metrics['no_peak_idx'] + 1}",
+        f"YES share peak:  {metrics['yes_sh_peak_val']:.2f} sh at trade #{metrics['yes_sh_peak_idx'] + 1}",
+        f"NO share peak:   {metrics['no_sh_peak_val']:.2f} sh at trade #{metrics['no_sh_peak_idx'] + 1}",
+        "",
+        "--- Final exposure ---",
+        f"YES exposure: $ {final_yes_exp:.2f} | {final_yes_sh:.2f} sh",
+        f"NO exposure:  $ {final_no_exp:.2f} | {final_no_sh:.2f} sh",
+        f"NET exposure: $ {final_net_exp:.2f} | {final_net_sh:.2f} sh",
+        "",
+        "--- Trades (Sorted by Timestamp) ---",
+        "Idx | Time                | Type | Side | Price(c) |   Shares   |    Cost($)",
+        "----+---------------------+------+-----+----------+------------+------------"
+    ]
+
+    for i, t in enumerate(parsed):
+        dt_str = datetime.datetime.fromtimestamp(t['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
+        lines.append(
+            f"{i+1:3d} | {dt_str} | {t['type']:<4} | {t['side']:<4} | "
+            f"{t['price']:8.2f} | {t['shares']:10.2f} | $ {t['cost']:9.2f}"
+        )
+
+    return "\n".join(lines)
+
+
+class ReportTests(SimpleTestCase):
+    def setUp(self):
+        # more than ROW_CHUNK trades and TEXT_CHUNK characters
+        self.parsed = synthetic_trades(12_000, seed=5)
+        self.trades = trades_array(self.parsed)
+        self.metrics = calculate_metrics(self.trades, 'YES')
+
+    def test_text_report_byte_identical(self):
+        for parsed in (self.parsed, self.parsed[:1], []):
+            trades = trades_array(parsed)
+            streamed = ''.join(iter_text_report('Market', 'YES', trades, calculate_metrics(trades, 'YES')))
+            expected = list_text_report('Market', 'YES', parsed, loop_metrics(parsed, 'YES'))
+            self.assertEqual(streamed.encode('utf-8'), expected.encode('utf-8'))
+
+    def test_text_report_chunks(self):
+        chunks = list(iter_text_report('Market', 'YES', self.trades, self.metrics))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(c) < 2 * 64 * 1024 for c in chunks))
+
+    def test_csv_report(self):
+        rows = list(csv.reader(io.StringIO(''.join(iter_csv_report(self.trades, self.metrics)))))
+        self.assertEqual(len(rows), len(self.trades) + 1)
+        self.assertEqual(rows[0][:3], ['Idx', 'Time', 'Type'])
+        last = rows[-1]
+        self.assertEqual(int(last[0]), len(self.trades))
+        self.assertAlmostEqual(float(last[rows[0].index('NET ($)')]), float(self.metrics['net_curve'][-1]))
+
+    def test_xlsx_report(self):
+        target = io.BytesIO()
+        write_xlsx_report(target, 'Market', 'YES', self.trades[:100], calculate_metrics(self.trades[:100], 'YES'))
+        target.seek(0)
+        wb = load_workbook(target, read_only=True)
+        self.assertEqual(wb.sheetnames, ['Summary', 'Trades', 'Exposure', 'Cumulative'])
+        self.assertEqual(sum(1 for _ in wb['Trades'].iter_rows(values_only=True)), 101)
+        self.assertEqual(next(wb['Summary'].iter_rows(min_row=2, values_only=True)), ('MARKET: Market',))
+        wb.close()
+
+
+class LedgerTests(SimpleTestCase):
+    # (timestamp, is_buy, is_yes, price in cents, shares)
+    TRADES = [
+        (1, True, True, 40.0, 10.0),
+        (2, True, True, 60.0, 10.0),
+        (3, False, True, 50.0, 15.0),
+        (4, True, False, 45.0, 8.0),
+        (5, False, False, 30.0, 2.0),
+    ]
+
+    def test_fifo_partial_sell(self):
+        ledger = PositionLedger().extend(self.TRADES[:3])
+        # 10 @ 0.40 then 5 of the 0.60 lot, sold at 0.50
+        self.assertAlmostEqual(ledger.realized, 10 * 0.1 - 5 * 0.1)
+        self.assertAlmostEqual(ledger.shares['yes'], 5)
+        self.assertAlmostEqual(ledger.basis['yes'], 5 * 0.6)
+        self.assertEqual(len(ledger.lots['yes']), 1)
+        self.assertAlmostEqual(ledger.unrealized(), 5 * 0.5 - 5 * 0.6)
+        self.assertAlmostEqual(ledger.summary()['yes_avg_cost'], 0.6)
+
+    def test_settled_pnl(self):
+        ledger = PositionLedger().extend(self.TRADES)
+        # 6 NO left of the 0.45 lot after selling 2 at 0.30
+        realized = 0.5 + 2 * (0.30 - 0.45)
+        basis = 5 * 0.6 + 6 * 0.45
+        self.assertAlmostEqual(ledger.realized, realized)
+        self.assertAlmostEqual(ledger.settled_pnl('YES'), realized + 5 - basis)
+        self.assertAlmostEqual(ledger.settled_pnl('NO'), realized + 6 - basis)
+        self.assertAlmostEqual(ledger.summary('NO')['settled_pnl'], realized + 6 - basis)
+        self.assertNotIn('settled_pnl', ledger.summary())
+
+    def test_unmatched_sell(self):
+        ledger = PositionLedger()
+        ledger.apply(1, True, True, 20.0, 5.0)
+        ledger.apply(2, False, True, 50.0, 8.0)
+        # 5 against the lot, 3 with no lot at zero cost
+        self.assertAlmostEqual(ledger.realized, 5 * 0.3 + 3 * 0.5)
+        self.assertAlmostEqual(ledger.unmatched, 3)
+        self.assertEqual(ledger.shares['yes'], 0.0)
+        self.assertEqual(ledger.basis['yes'], 0.0)
+
+    def test_mark_from_other_side(self):
+        ledger = PositionLedger()
+        ledger.apply(1, True, False, 30.0, 10.0)
+        self.assertAlmostEqual(ledger.mark('no'), 0.3)
+        self.assertAlmostEqual(ledger.mark('yes'), 0.7)
+
+    def test_state_round_trip(self):
+        whole = PositionLedger().extend(self.TRADES)
+        part = PositionLedger().extend(self.TRADES[:2])
+        resumed = PositionLedger.from_state(json.loads(json.dumps(part.state())))
+        resumed.extend(self.TRADES[2:])
+        self.assertEqual(resumed.summary('YES'), whole.summary('YES'))
+        self.assertEqual(resumed.last_timestamp, 5)
+        self.assertEqual(PositionLedger.from_state(None).count, 0)
+
+    def test_array_matches_rows(self):
+        array = np.array([row + (row[3] * row[4] / 100,) for row in self.TRADES], dtype=TRADE_DTYPE)
+        from_array = PositionLedger().extend(array)
+        from_rows = PositionLedger().extend(self.TRADES)
+        self.assertEqual(from_array.summary(), from_rows.summary())
+        points = from_array.take_points()
+        self.assertEqual(len(points), len(self.TRADES))
+        self.assertAlmostEqual(points['realized'][-1], from_rows.realized)
+        self.assertEqual(len(from_array.take_points()), 0)
+
+
+def trade(i, **extra):
+    return {'timestamp': 1_770_000_000 + i, 'price': 0.5 + i / 1000, 'size': 12.25 * (i + 1), **extra}
+
+
+class TradeFileTests(SimpleTestCase):
+    def values(self, data, size):
+        return list(iter_json_values(text_chunks(io.BytesIO(data), size=size)))
+
+    def trades(self, data):
+        return list(iter_trades(io.BytesIO(data)))
+
+    def test_every_chunk_boundary(self):
+        trades = [trade(i) for i in range(5)]
+        for data in (json.dumps(trades).encode(), '\n'.join(json.dumps(t) for t in trades).encode()):
+            for size in range(1, len(data) + 1):
+                self.assertEqual(self.values(data, size), trades, f'chunk size {size}')
+
+    def test_numbers_split_across_chunks(self):
+        for size in range(1, 12):
+            self.assertEqual(self.values(b'12345 6.5e3\n-0.25', size), [12345, 6500.0, -0.25])
+            self.assertEqual(self.values(b'[12345, 6.5e3]', size), [12345, 6500.0])
+
+    def test_ndjson(self):
+        data = b'\n'.join(json.dumps(trade(i)).encode() for i in range(3)) + b'\n\n'
+        self.assertEqual(self.trades(data), [trade(i) for i in range(3)])
+
+    def test_gzip_and_bom(self):
+        data = json.dumps([trade(0), trade(1)]).encode('utf-8-sig')
+        self.assertEqual(self.trades(gzip.compress(data)), [trade(0), trade(1)])
+
+    def test_empty(self):
+        self.assertEqual(self.trades(b''), [])
+        self.assertEqual(self.trades(b' []\n'), [])
+
+    def test_not_trades(self):
+        for data in (b'{"error": "rate limited"}', b'{"trades": []}', b'[1, 2]', b'"text"',
+                     b'[{"timestamp": 1, "price": 0.5}]'):
+            with self.assertRaises(TradeFileError, msg=data):
+                self.trades(data)
+
+    def test_malformed(self):
+        for data in (b'[{"timestamp": 1', b'[' + json.dumps(trade(0)).encode(),
+                     b'[{"a": 1} {"b": 2}]', b'[{"a": 1}] x', b'[{"a": 1},]'):
+            with self.assertRaises(ValueError, msg=data):
+                self.trades(data)
+
+
+def load_main():
+    """projects/main.py is a script, not a package module."""
+    path = Path(__file__).resolve().parent.parent / 'projects' / 'main.py'
+    spec = importlib.util.spec_from_file_location('projects_main', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class ManifestTests(MockServerMixin, SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.main = load_main()
+
+    def manifest(self, text):
+        path = os.path.join(self.tmp.name, 'manifest.csv')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def test_read_manifest(self):
+        path = self.manifest('# comment\nMarket, Wallet ,resolved_side\nbtc,0xabc,yes\n\n0xm,0xdef,\n')
+        self.assertEqual(self.main.read_manifest(path), [
+            {'market': 'btc', 'wallet': '0xabc', 'resolved_side': 'YES'},
+            {'market': '0xm', 'wallet': '0xdef', 'resolved_side': 'AUTO'},
+        ])
+        with self.assertRaisesRegex(ValueError, 'row 3'):
+            self.main.read_manifest(self.manifest('market,wallet\nbtc,0xabc\nbtc,\n'))
+        with self.assertRaisesRegex(ValueError, 'resolved_side'):
+            self.main.read_manifest(self.manifest('market,wallet,resolved_side\nbtc,0xabc,maybe\n'))
+
+    def test_run_job(self):
+        with mock.patch.object(self.main, '_worker_client', self.api_client()):
+            ok = self.main.run_job(1, {'market': 'Synthetic market 1', 'wallet': '0xabc', 'resolved_side': 'AUTO'},
+                                   self.tmp.name)
+            missing = self.main.run_job(2, {'market': 'nothing like it', 'wallet': '0xabc', 'resolved_side': 'NO'},
+                                        self.tmp.name)
+        self.assertEqual((ok['status'], ok['condition_id'], ok['trades']), ('ok', self.markets[1], self.TRADES))
+        self.assertIn(ok['resolved_side'], ('YES', 'NO'))
+        self.assertEqual(sorted(os.listdir(ok['dir'])),
+                         ['chart.png', 'job.json', 'log.txt', 'report.xlsx', 'report_path', 'trades.json'])
+        with open(os.path.join(ok['dir'], 'job.json')) as f:
+            self.assertEqual(json.load(f)['status'], 'ok')
+        self.assertEqual(missing['status'], 'failed')
+        self.assertIn('LookupError', missing['error'])
+
+
+def catalog_event(i, title, questions, closed=False):
+    return {
+        'id': f'e{i}', 'slug': f'event-{i}', 'title': title, 'closed': closed, 'endDate': '2026-01-02T00:00:00Z',
+        'markets': [{'conditionId': f'0x{i:02x}{j:062x}', 'question': q, 'slug': f'market-{i}-{j}', 'closed': closed}
+                    for j, q in enumerate(questions)],
+    }
+
+
+class CatalogTests(TestCase):
+    def setUp(self):
+        store_events([
+            catalog_event(1, 'Bitcoin Up or Down', ['Bitcoin Up or Down - January 1, 10AM ET']),
+            catalog_event(2, 'Ethereum price', ['Will Ethereum reach $5,000 by March?', 'Will ETH dip to $1,500?']),
+            catalog_event(3, 'Café election', ['Crème brûlée (dessert) of the year: "yes" or no?'], closed=True),
+        ])
+
+    def questions(self, query):
+        return [m.question for m in search_catalog(query)]
+
+    def test_migration_matches_catalog_ddl(self):
+        migration = importlib.import_module('proxy_wallet.migrations.0004_catalog')
+        self.assertEqual(migration.FTS_DDL, FTS_DDL)
+
+    def test_fts_match(self):
+        self.assertEqual(fts_match('Bitcoin up'), '"bitcoin"* "up"*')
+        self.assertEqual(fts_match('will the'), '"will"* "the"*')
+        self.assertEqual(fts_match('"a" OR b* -c:(d)'), '"b"* "c"* "d"*')
+        self.assertEqual(fts_match('?!'), '')
+
+    def test_prefix_search(self):
+        self.assertEqual(self.questions('bitc'), ['Bitcoin Up or Down - January 1, 10AM ET'])
+        self.assertEqual(self.questions('ethereum'), ['Will Ethereum reach $5,000 by March?', 'Will ETH dip to $1,500?'])
+        self.assertEqual(self.questions('eth dip'), ['Will ETH dip to $1,500?'])
+        self.assertEqual(self.questions('bitcoin ethereum'), [])
+
+    def test_special_characters(self):
+        for query in ('"yes"', 'dessert)', '(dessert', 'brûlée*', 'year:', '-creme', 'NEAR(creme brulee)',
+                      "o'clock creme", '$5,000', 'AND', 'creme OR'):
+            with self.subTest(query=query):
+                search_catalog(query)
+        self.assertEqual(len(self.questions('"creme" -brulee')), 1)
+        # diacritics are folded both ways
+        self.assertEqual(len(self.questions('cafe')), 1)
+        self.assertEqual(len(self.questions('crème')), 1)
+        self.assertEqual(self.questions('?!'), [])
+
+    def test_open_markets_first(self):
+        store_events([catalog_event(4, 'Old bitcoin', ['Bitcoin above 100k?'], closed=True)])
+        self.assertEqual(self.questions('bitcoin')[-1], 'Bitcoin above 100k?')
+
+    def test_condition_id_lookup(self):
+        condition_id = f'0x02{1:062x}'
+        self.assertEqual(self.questions(condition_id.upper().replace('0X', '0x')), ['Will ETH dip to $1,500?'])
+
+    def test_upsert_replaces_index_rows(self):
+        store_events([catalog_event(1, 'Bitcoin Up or Down', ['Solana Up or Down'])])
+        self.assertEqual(CatalogMarket.objects.count(), 4)
+        self.assertEqual(self.questions('solana'), ['Solana Up or Down'])
+        self.assertEqual(self.questions('bitcoin'), ['Solana Up or Down'])  # still in the event title
+        self.assertEqual(self.questions('january'), [])
+        self.assertTrue(rebuild_index())
+        self.assertEqual(self.questions('solana'), ['Solana Up or Down'])
+
+    def test_icontains_without_fts(self):
+        with mock.patch('proxy_wallet.catalog.fts_available', return_value=False):
+            self.assertEqual(self.questions('ETH dip'), ['Will ETH dip to $1,500?'])
+            self.assertEqual(len(self.questions('ethereum')), 2)
+
+    def test_empty_catalog(self):
+        CatalogMarket.objects.all().delete()
+        self.assertIsNone(search_catalog('bitcoin'))
+
+    def test_search_view_remote_fallback(self):
+        client = mock.Mock()
+        client.search.return_value = {'events': [catalog_event(5, 'Dogecoin', ['Dogecoin to $1?'])]}
+        url = reverse('proxy_wallet:search_market')
+        with mock.patch('proxy_wallet.views.get_client', return_value=client):
+            response = self.client.get(url, {'q': 'bitcoin'})
+            self.assertContains(response, 'Bitcoin Up or Down')
+            # with the fallback off a local miss stays a miss
+            with override_settings(POLYMARKET_CATALOG_REMOTE_FALLBACK=False):
+                self.assertNotContains(self.client.get(url, {'q': 'dogecoin'}), 'Dogecoin')
+            client.search.assert_not_called()
+
+            with override_settings(POLYMARKET_CATALOG_REMOTE_FALLBACK=True):
+                self.assertContains(self.client.get(url, {'q': 'dogecoin'}), 'Dogecoin to $1?')
+            # stored: found locally from now on
+            self.assertEqual(self.questions('doge'), ['Dogecoin to $1?'])
@@ -0,0 +1,181 @@
+"""Streaming reader for trade files: JSON array, NDJSON, optionally gzipped.
+
+No Django imports, so ``projects/main.py`` can use it too. The file is read
+in READ_CHUNK pieces and decoded one value at a time with
+``JSONDecoder.raw_decode``, so only the current chunk and the current trade
+are held, never the whole text or the whole list of dicts. Values may be
+separated by commas inside a top-level array, or by whitespace / newlines
+(NDJSON). Gzip is detected by its magic bytes, not by the file name.
+
+Every value must look like a trade (timestamp, price and size keys), so a
+lone object such as {"error": ...} or {"trades": [...]} is rejected rather
+than read as a one-line NDJSON file.
+"""
+import codecs
+import gzip
+import json
+
+import numpy as np
+
+
+GZIP_MAGIC = b'\x1f\x8b'
+READ_CHUNK = 64 * 1024
+MAX_VALUE = 16 * READ_CHUNK     # one trade is a few hundred bytes
+NUMBER_CHARS = frozenset('0123456789.eE+-')
+TRADE_KEYS = frozenset(('timestamp', 'price', 'size'))
+
+TRADE_DTYPE = np.dtype([
+    ('timestamp', 'i8'),
+    ('is_buy', '?'),
+    ('is_yes', '?'),
+    ('price', 'f8'),     # cents
+    ('shares', 'f8'),
+    ('cost', 'f8'),      # $
+])
+
+
+class TradeFileError(ValueError):
+    """Valid JSON, but not a list of trades."""
+
+
+def open_binary(fileobj):
+    """Seekable binary file -> binary stream, gunzipped when it is gzip."""
+    magic = fileobj.read(2)
+    fileobj.seek(0)
+    if magic == GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=fileobj, mode='rb')
+    return fileobj
+
+
+def text_chunks(fileobj, size=READ_CHUNK):
+    """UTF-8 text of a (possibly gzipped) file in chunks; a BOM is dropped."""
+    stream = open_binary(fileobj)
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    while True:
+        data = stream.read(size)
+        if not data:
+            break
+        text = decoder.decode(data)
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def iter_json_values(chunks):
+    """Top-level values of a JSON array, or of whitespace-separated JSON (NDJSON).
+
+    Raises json.JSONDecodeError (a ValueError) on malformed input.
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buffer, pos, eof = '', 0, False
+
+    def fill():
+        # Drops what is already consumed and appends the next chunk
+        nonlocal buffer, pos, eof
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+        else:
+            buffer, pos = buffer[pos:] + chunk, 0
+        return not eof
+
+    def skip_space():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buffer) or not fill():
+                return pos < len(buffer)
+
+    def decode():
+        # A value that fails to decode or may continue past the buffer (an
+        # object split mid-way, a number like "0." or "12") is decoded again
+        # once the next chunk is in.
+        nonlocal pos
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if len(buffer) - pos < MAX_VALUE and fill():
+                    continue
+                raise
+            cut = end == len(buffer) or buffer[end] in NUMBER_CHARS
+            if cut and len(buffer) - pos < MAX_VALUE and fill():
+                continue
+            pos = end
+            return value
+
+    if not skip_space():
+        return
+    if buffer[pos] != '[':
+        # NDJSON / concatenated values
+        while skip_space():
+            yield decode()
+        return
+
+    pos += 1
+    first = True
+    while True:
+        if not skip_space():
+            raise json.JSONDecodeError("Expecting ']'", buffer, pos)
+        if buffer[pos] == ']':
+            pos += 1
+            break
+        if not first:
+            if buffer[pos] != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+            pos += 1
+            skip_space()
+        yield decode()
+        first = False
+
+    if skip_space():
+        raise json.JSONDecodeError('Extra data', buffer, pos)
+
+
+def iter_trades(fileobj):
+    """Trade dicts of an uploaded / local trade file, one at a time."""
+    for value in iter_json_values(text_chunks(fileobj)):
+        if not isinstance(value, dict) or not TRADE_KEYS <= value.keys():
+            raise TradeFileError('File must contain a list of trades')
+        yield value
+
+
+def trade_record(item):
+    """Raw trade -> TRADE_DTYPE tuple, normalized like views.parse_trades."""
+    price = float(item.get('price', 0))
+    shares = float(item.get('size', 0))
+    outcome = item.get('outcome', 'Up').strip().upper()
+    return (
+        int(item.get('timestamp', 0)),
+        item.get('side', 'BUY').upper() == 'BUY',
+        outcome not in {'NO', 'DOWN'},
+        price * 100.0,
+        shares,
+        price * shares,
+    )
+
+
+def collect_trades(items):
+    """Trades -> (TRADE_DTYPE array sorted by time, first trade, latest trade).
+
+    Only the compact records are kept; of the raw dicts just the first (market
+    title, ids) and the latest (resolved side inference) survive.
+    """
+    kept = {'first': None, 'latest': None}
+
+    def records():
+        for item in items:
+            latest = kept['latest']
+            if latest is None:
+                kept['first'] = kept['latest'] = item
+            elif item.get('timestamp', 0) > latest.get('timestamp', 0):
+                kept['latest'] = item
+            yield trade_record(item)
+
+    trades = np.fromiter(records(), dtype=TRADE_DTYPE)
+    trades = trades[np.argsort(trades['timestamp'], kind='stable')]
+    return trades, kept['first'], kept['latest']
@@ -0,0 +1,163 @@
+"""Server-side trade storage: raw API/JSON trades <-> Trade rows."""
+import itertools
+
+from django.db import transaction
+from django.db.models import Max
+
+from .models import Trade, WalletTradeSet
+
+
+STORE_BATCH = 2000
+
+
+def parse_number(value, cast=float, default=0):
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def trade_from_raw(trade_set, item):
+    return Trade(
+        trade_set=trade_set,
+        proxy_wallet=item.get('proxyWallet') or trade_set.user_address,
+        condition_id=item.get('conditionId') or trade_set.condition_id,
+        asset=str(item.get('asset') or ''),
+        side=str(item.get('side') or 'BUY').upper(),
+        outcome=item.get('outcome') or '',
+        outcome_index=parse_number(item.get('outcomeIndex'), int, None),
+        price=parse_number(item.get('price')),
+        size=parse_number(item.get('size')),
+        timestamp=parse_number(item.get('timestamp'), int),
+        transaction_hash=item.get('transactionHash') or '',
+    )
+
+
+def trade_to_raw(trade, title=''):
+    """Trade row as the dict shape the API returns (what parse_trades expects)."""
+    return {
+        'proxyWallet': trade.proxy_wallet,
+        'conditionId': trade.condition_id,
+        'asset': trade.asset,
+        'side': trade.side,
+        'outcome': trade.outcome,
+        'outcomeIndex': trade.outcome_index,
+        'price': trade.price,
+        'size': trade.size,
+        'timestamp': trade.timestamp,
+        'transactionHash': trade.transaction_hash,
+        'title': title,
+    }
+
+
+def store_trade_set(raw_trades, condition_id='', user_address='', source='api'):
+    """Save raw trades as a WalletTradeSet.
+
+    API pulls reuse the set of the same (condition_id, user_address) and
+    replace its trades; every upload gets its own set. `raw_trades` may be
+    any iterable (a streamed upload): it is consumed once, STORE_BATCH at a time.
+    """
+    raw_trades = iter(raw_trades)
+    first = next(raw_trades, None) or {}
+    condition_id = condition_id or first.get('conditionId', '')
+    user_address = user_address or first.get('proxyWallet', '')
+    title = first.get('title', 'Unknown Market')
+
+    with transaction.atomic():
+        trade_set = None
+        if source == 'api':
+            trade_set = WalletTradeSet.objects.filter(
+                source='api', condition_id=condition_id, user_address=user_address,
+            ).first()
+        if trade_set is None:
+            trade_set = WalletTradeSet(source=source, condition_id=condition_id, user_address=user_address)
+
+        trade_set.market_title = title
+        trade_set.trade_count = 0
+        trade_set.save()
+
+        trade_set.trades.all().delete()
+        if first:
+            raw_trades = itertools.chain([first], raw_trades)
+            while batch := [trade_from_raw(trade_set, item) for item in itertools.islice(raw_trades, STORE_BATCH)]:
+                Trade.objects.bulk_create(batch)
+                trade_set.trade_count += len(batch)
+        trade_set.save(update_fields=['trade_count'])
+    return trade_set
+
+
+def trade_key(transaction_hash, asset, side, price, size):
+    """Dedup key: one transaction can carry several fills of the same wallet."""
+    return (transaction_hash, str(asset or ''), str(side or '').upper(), round(float(price), 6), round(float(size), 6))
+
+
+def sync_trade_set(trade_set, client):
+    """Fetch only trades newer than the last stored one and merge them in.
+
+    Trades at the boundary timestamp are matched against stored ones by
+    transaction hash (plus asset/side/price/size), so nothing is stored
+    twice. Returns the number of new trades.
+    """
+    since = trade_set.trades.aggregate(last=Max('timestamp'))['last']
+    if since is None:
+        fresh = client.fetch_trades(trade_set.condition_id, trade_set.user_address)
+        known = set()
+    else:
+        fresh = client.fetch_trades_since(trade_set.condition_id, trade_set.user_address, since)
+        known = {
+            trade_key(*row)
+            for row in trade_set.trades.filter(timestamp__gte=since)
+            .values_list('transaction_hash', 'asset', 'side', 'price', 'size')
+        }
+
+    new = []
+    for item in fresh:
+        raw_key = trade_key(
+            item.get('transactionHash') or '', item.get('asset'), item.get('side') or 'BUY',
+            parse_number(item.get('price')), parse_number(item.get('size')),
+        )
+        if raw_key not in known:
+            known.add(raw_key)
+            new.append(trade_from_raw(trade_set, item))
+
+    with transaction.atomic():
+        Trade.objects.bulk_create(new, batch_size=STORE_BATCH)
+        trade_set.trade_count = trade_set.trades.count()
+        if fresh and trade_set.market_title in ('', 'Unknown Market'):
+            trade_set.market_title = fresh[0].get('title', '')
+        trade_set.save()
+    return len(new)
+
+
+def load_raw_trades(trade_set):
+    """All trades of a set as API-shaped dicts, oldest first."""
+    title = trade_set.market_title
+    return [trade_to_raw(t, title) for t in trade_set.trades.order_by('timestamp', 'id').iterator(chunk_size=5000)]
+
+
+def session_trade_set(request):
+    """WalletTradeSet referenced by the session, or None."""
+    pk = request.session.get('trade_set_id')
+    if not pk:
+        return None
+    return WalletTradeSet.objects.filter(pk=pk).first()
+
+
+def session_resolved_side(request, trade_set):
+    """YES / NO chosen in this session for the set, else the side inferred from its trades.
+
+    A trade set is shared by every session that pulls the same wallet and
+    market, so only the inferred side (derived from the shared trades) is
+    stored on it; a user's own choice stays in their session.
+    """
+    return request.session.get('resolved_sides', {}).get(str(trade_set.pk)) or trade_set.resolved_side
+
+
+def choose_resolved_side(request, trade_set_id, side):
+    """Remember this session's side for a set; '' forgets it."""
+    sides = dict(request.session.get('resolved_sides', {}))
+    if side:
+        sides[str(trade_set_id)] = side
+    else:
+        sides.pop(str(trade_set_id), None)
+    request.session['resolved_sides'] = sides
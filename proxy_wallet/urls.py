@@ -5,11 +5,17 @@ app_name = 'proxy_wallet'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('portfolio/', views.portfolio, name='portfolio'),
+    path('portfolio-analysis/', views.portfolio_analysis, name='portfolio_analysis'),
     path('search-market/', views.search_market, name='search_market'),
     path('fetch-trades/', views.fetch_trades, name='fetch_trades'),
+    path('refresh-trades/', views.refresh_trades, name='refresh_trades'),
     path('upload-trades/', views.upload_trades, name='upload_trades'),
+    path('batch-analysis/', views.batch_analysis, name='batch_analysis'),
+    path('open-wallet/', views.open_wallet, name='open_wallet'),
     path('set-resolved-side/', views.set_resolved_side, name='set_resolved_side'),
     path('generate-analysis/', views.generate_analysis, name='generate_analysis'),
+    path('analysis-feed/', views.analysis_feed, name='analysis_feed'),
     path('view-chart/', views.view_chart, name='view_chart'),
     path('download-report/', views.download_report, name='download_report'),
 ]
\ No newline at end of file
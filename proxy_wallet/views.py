@@ -1,16 +1,34 @@
-import json
 import datetime
+import gzip
 import io
+import itertools
+import tempfile
 import requests
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
 import numpy as np
 import matplotlib.ticker as ticker
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
 from django.shortcuts import render
-from django.http import JsonResponse, HttpResponse, FileResponse
+from django.http import JsonResponse, HttpResponse, HttpResponseNotModified, FileResponse, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
+from django.conf import settings
+
+from .analysis import save_analysis, trade_feed, unpack_columns
+from .batch import batch_totals, parse_wallet_list, run_batch
+from .catalog import search_catalog, store_events
+from .charts import chart_key, get_chart_cache
+from .client import PolymarketClient, default_cache
+from .ledger import ledger_series, sampled_series, update_ledger
+from .models import WalletTradeSet
+from .portfolio import run_portfolio
+from .rendering import chart_status, submit_chart
+from .reports import REPORT_FORMATS, iter_csv_report, iter_text_report, write_xlsx_report
+from .tradefile import TRADE_DTYPE, TradeFileError, iter_trades
+from .trades import (
+    choose_resolved_side, load_raw_trades, session_resolved_side, session_trade_set, store_trade_set,
+    sync_trade_set, trade_to_raw,
+)
 
 # CONFIG
 STYLES = {
@@ -20,10 +38,30 @@ STYLES = {
     ("Sell", "Down"):("#d40000", "o", "Sell NO")
 }
 
-SEARCH_URL = "https://gamma-api.polymarket.com/public-search"
-TRADES_URL = "https://data-api.polymarket.com/trades"
+STYLE_BY_CODE = {
+    # is_buy + 2 * is_yes (см. TRADE_DTYPE)
+    3: STYLES[("Buy", "Up")],
+    2: STYLES[("Sell", "Up")],
+    1: STYLES[("Buy", "Down")],
+    0: STYLES[("Sell", "Down")],
+}
+
 PRICE_RESOLUTION_THRESHOLD = 0.5
 
+# Выше этого числа сделок график рисуется в агрегированном режиме
+LOD_THRESHOLD = 400
+LOD_ANNOTATIONS = 30
+
+_client = None
+
+
+def get_client():
+    """Общий клиент API (пул соединений живёт между запросами)"""
+    global _client
+    if _client is None:
+        _client = PolymarketClient(cache=default_cache())
+    return _client
+
 
 def index(request):
     """Главная страница"""
@@ -32,21 +70,33 @@ def index(request):
 
 @require_http_methods(["GET"])
 def search_market(request):
-    """Поиск рынков через API"""
+    """Поиск рынков: локальный каталог (FTS), API только если в каталоге ничего нет"""
     query = request.GET.get('q', '').strip()
     
     if not query:
         return JsonResponse({'error': 'Query is required'}, status=400)
     
+    markets = search_catalog(query)
+    if markets:
+        results = [{
+            'event_title': market.event.title if market.event else '',
+            'market_title': market.question or 'Unknown Market',
+            'condition_id': market.condition_id,
+        } for market in markets]
+        return render(request, 'proxy_wallet/partials/market_results.html', {'results': results})
+    
+    if markets is not None and not settings.POLYMARKET_CATALOG_REMOTE_FALLBACK:
+        return render(request, 'proxy_wallet/partials/market_results.html', {'results': []})
+    
     try:
-        resp = requests.get(SEARCH_URL, params={"q": query}, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
+        data = get_client().search(query)
 
     except requests.RequestException as exc:
         return JsonResponse({'error': f'API Error: {str(exc)}'}, status=500)
     
     events = data.get("events", []) if isinstance(data, dict) else []
+    # Запоминаем найденное: следующий такой поиск обойдётся без API
+    store_events(events)
     results = []
     
     for event in events:
@@ -70,56 +120,70 @@ def fetch_trades(request):
     if not condition_id or not user_address:
         return JsonResponse({'error': 'Condition ID and User Address are required'}, status=400)
     
-    all_trades = []
-    offset = 0
-    page_limit = 500
+    # Уже загружали: докачиваем только новые сделки
+    trade_set = WalletTradeSet.objects.filter(
+        source='api', condition_id=condition_id, user_address=user_address,
+    ).first()
+    if trade_set is not None and trade_set.trade_count:
+        request.session['trade_set_id'] = trade_set.pk
+        return refresh_trades(request)
     
     try:
-        while True:
-            params = {
-                "limit": page_limit,
-                "offset": offset,
-                "takerOnly": "false",
-                "market": condition_id,
-                "user": user_address,
-            }
-            
-            resp = requests.get(TRADES_URL, params=params, timeout=15)
-            resp.raise_for_status()
-            data = resp.json()
-            
-            if isinstance(data, dict):
-                batch = data.get("trades", [])
-            elif isinstance(data, list):
-                batch = data
-            else:
-                batch = []
-            
-            all_trades.extend(batch)
-            
-            if len(batch) < page_limit:
-                break
-            offset += page_limit
-            
+        all_trades = get_client().fetch_trades(condition_id, user_address)
     except requests.RequestException as exc:
         return JsonResponse({'error': f'Error fetching trades: {str(exc)}'}, status=500)
     
     if not all_trades:
         return JsonResponse({'error': 'No trades found for this user/market'}, status=404)
     
-    # Сохраняем в сессию
-    request.session['raw_trades'] = all_trades
-    request.session['market_title'] = all_trades[0].get('title', 'Unknown Market')
-    request.session['condition_id'] = condition_id
+    # Сохраняем в БД, в сессии только id набора
+    trade_set = store_trade_set(all_trades, condition_id, user_address, source='api')
+    request.session['trade_set_id'] = trade_set.pk
     
     # Автоматически определяем resolved_side
     inferred, _ = infer_resolved_side_from_trades(all_trades)
     if inferred:
-        request.session['resolved_side'] = inferred
+        trade_set.resolved_side = inferred
+        trade_set.save(update_fields=['resolved_side'])
 
     return render(request, 'proxy_wallet/partials/trades_loaded.html', {
-        'trade_count': len(all_trades),
-        'market_title': request.session['market_title']
+        'trade_count': trade_set.trade_count,
+        'market_title': trade_set.market_title,
+        'can_refresh': True,
+    })
+
+
+@require_http_methods(["POST"])
+def refresh_trades(request):
+    """Инкрементальная докачка сделок текущего набора"""
+    trade_set = session_trade_set(request)
+    if trade_set is None:
+        return JsonResponse({'error': 'No trades data found'}, status=400)
+    
+    if not trade_set.condition_id or not trade_set.user_address:
+        return JsonResponse({'error': 'Trade set has no condition ID / user address to sync'}, status=400)
+    
+    try:
+        added = sync_trade_set(trade_set, get_client())
+    except requests.RequestException as exc:
+        return JsonResponse({'error': f'Error fetching trades: {str(exc)}'}, status=500)
+    
+    trade_set.refresh_from_db()
+    if not trade_set.trade_count:
+        return JsonResponse({'error': 'No trades found for this user/market'}, status=404)
+    
+    # Сторона могла определиться по новым сделкам
+    inferred, _ = infer_resolved_side_from_trades(load_raw_trades(trade_set))
+    if inferred and inferred != trade_set.resolved_side:
+        trade_set.resolved_side = inferred
+        trade_set.save(update_fields=['resolved_side'])
+    
+    return render(request, 'proxy_wallet/partials/trades_loaded.html', {
+        'trade_count': trade_set.trade_count,
+        'market_title': trade_set.market_title,
+        'added': added,
+        'refreshed': True,
+        'can_refresh': True,
     })
 
 
@@ -132,41 +196,134 @@ def upload_trades(request):
     
     file = request.FILES['file']
     
+    # Файл читается потоково (JSON-массив, NDJSON, gzip) прямо в БД, без списка словарей в памяти
+    trades = iter_trades(file)
     try:
-        content = file.read().decode('utf-8')
-        raw_data = json.loads(content)
-    except json.JSONDecodeError:
+        first = next(trades, None)
+        if first is None:
+            return JsonResponse({'error': 'File must contain a list of trades'}, status=400)
+        trade_set = store_trade_set(itertools.chain([first], trades), source='upload')
+    except TradeFileError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except (ValueError, EOFError, gzip.BadGzipFile):
         return JsonResponse({'error': 'Invalid JSON file'}, status=400)
     except Exception as e:
         return JsonResponse({'error': f'Error reading file: {str(e)}'}, status=500)
     
-    if not raw_data or not isinstance(raw_data, list):
-        return JsonResponse({'error': 'File must contain a list of trades'}, status=400)
-    
-    # Сохраняем в сессию
-    request.session['raw_trades'] = raw_data
-    request.session['market_title'] = raw_data[0].get('title', 'Unknown Market')
-    request.session['condition_id'] = raw_data[0].get('conditionId', '')
+    request.session['trade_set_id'] = trade_set.pk
     
-    # Автоматически определяем resolved_side
-    inferred, _ = infer_resolved_side_from_trades(raw_data)
+    # Автоматически определяем resolved_side по последней сделке
+    latest = trade_set.trades.order_by('-timestamp', 'id').first()
+    inferred, _ = infer_resolved_side_from_trades([trade_to_raw(latest)])
     if inferred:
-        request.session['resolved_side'] = inferred
+        trade_set.resolved_side = inferred
+        trade_set.save(update_fields=['resolved_side'])
 
     return render(request, 'proxy_wallet/partials/trades_loaded.html', {
-        'trade_count': len(raw_data),
-        'market_title': request.session['market_title']
+        'trade_count': trade_set.trade_count,
+        'market_title': trade_set.market_title,
+        'can_refresh': bool(trade_set.condition_id and trade_set.user_address),
+    })
+
+
+@require_http_methods(["POST"])
+def batch_analysis(request):
+    """Пакетный анализ списка кошельков по одному рынку (лидерборд)"""
+    condition_id = request.POST.get('condition_id', '').strip()
+    resolved_side = request.POST.get('resolved_side', 'AUTO').strip().upper()
+    
+    if not condition_id:
+        return JsonResponse({'error': 'Condition ID is required'}, status=400)
+    if resolved_side not in {'AUTO', 'YES', 'NO'}:
+        return JsonResponse({'error': 'Invalid resolved side. Must be YES, NO, or AUTO'}, status=400)
+    
+    # Адреса из текстового поля и/или файла (txt/csv/json - берём всё, что похоже на 0x-адрес)
+    text = request.POST.get('wallets', '')
+    if 'file' in request.FILES:
+        try:
+            text += '\n' + request.FILES['file'].read().decode('utf-8')
+        except UnicodeDecodeError:
+            return JsonResponse({'error': 'Wallet list must be a text file'}, status=400)
+    
+    addresses = parse_wallet_list(text)
+    if not addresses:
+        return JsonResponse({'error': 'No wallet addresses found'}, status=400)
+    if len(addresses) > settings.WALLET_BATCH_MAX:
+        return JsonResponse({'error': f'Too many wallets ({len(addresses)}), max {settings.WALLET_BATCH_MAX}'}, status=400)
+    
+    chosen = None if resolved_side == 'AUTO' else resolved_side
+    rows, failed, resolved_side = run_batch(get_client(), condition_id, addresses, chosen)
+    
+    # Выбранная вручную сторона - только для этой сессии (наборы общие)
+    if chosen:
+        for row in rows:
+            choose_resolved_side(request, row['trade_set_id'], chosen)
+    
+    return render(request, 'proxy_wallet/partials/batch_results.html', {
+        'rows': rows,
+        'failed': failed,
+        'totals': batch_totals(rows),
+        'resolved_side': resolved_side,
+        'market_title': rows[0]['market_title'] if rows else '',
     })
 
 
+def portfolio(request):
+    """Портфель кошелька по всем рынкам"""
+    return render(request, 'proxy_wallet/portfolio.html')
+
+
+@require_http_methods(["POST"])
+def portfolio_analysis(request):
+    """Все сделки кошелька: метрики по каждому рынку, realized / mark-to-market PnL и экспозиция во времени"""
+    user_address = request.POST.get('user_address', '').strip()
+    
+    if not user_address:
+        return JsonResponse({'error': 'User Address is required'}, status=400)
+    
+    try:
+        rows, totals, timeline = run_portfolio(get_client(), user_address)
+    except requests.RequestException as exc:
+        return JsonResponse({'error': f'Error fetching trades: {str(exc)}'}, status=500)
+    
+    if not rows:
+        return JsonResponse({'error': 'No trades found for this user'}, status=404)
+    
+    return render(request, 'proxy_wallet/partials/portfolio_results.html', {
+        'rows': rows,
+        'totals': totals,
+        'timeline': timeline,
+        'user_address': user_address,
+    })
+
+
+@require_http_methods(["GET"])
+def open_wallet(request):
+    """Открыть строку лидерборда: набор становится текущим, график рендерится только сейчас"""
+    try:
+        pk = int(request.GET.get('trade_set', ''))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid trade set'}, status=400)
+    
+    trade_set = WalletTradeSet.objects.filter(pk=pk).first()
+    if trade_set is None:
+        return JsonResponse({'error': 'Trade set not found'}, status=404)
+    
+    request.session['trade_set_id'] = trade_set.pk
+    return generate_analysis(request)
+
+
 @require_http_methods(["POST"])
 def set_resolved_side(request):
     """Установка стороны разрешения"""
     resolved_side = request.POST.get('resolved_side', '').strip().upper()
+    trade_set = session_trade_set(request)
+    if trade_set is None:
+        return JsonResponse({'error': 'No trades data found'}, status=400)
     
     if resolved_side == 'AUTO':
         # Автоматический вывод
-        raw_trades = request.session.get('raw_trades', [])
+        raw_trades = load_raw_trades(trade_set)
         if not raw_trades:
             return JsonResponse({'error': 'No trades data found'}, status=400)
         
@@ -174,7 +331,10 @@ def set_resolved_side(request):
         if not inferred:
             return JsonResponse({'error': 'Could not infer resolved side automatically'}, status=400)
         
-        request.session['resolved_side'] = inferred
+        # Выведенная из сделок сторона общая для набора, ручной выбор сессии сбрасывается
+        trade_set.resolved_side = inferred
+        trade_set.save(update_fields=['resolved_side'])
+        choose_resolved_side(request, trade_set.pk, '')
         price = float(latest.get("price", 0))
         outcome = latest.get("outcome", "")
         
@@ -186,7 +346,8 @@ def set_resolved_side(request):
         })
     
     elif resolved_side in {'YES', 'NO'}:
-        request.session['resolved_side'] = resolved_side
+        # Набор могут смотреть другие сессии: выбор хранится только в этой
+        choose_resolved_side(request, trade_set.pk, resolved_side)
         return render(request, 'proxy_wallet/partials/resolved_set.html', {
             'resolved_side': resolved_side,
             'auto_inferred': False
@@ -199,72 +360,167 @@ def set_resolved_side(request):
 @require_http_methods(["GET"])
 def generate_analysis(request):
     """Генерация анализа и визуализации"""
-    raw_trades = request.session.get('raw_trades')
-    resolved_side = request.session.get('resolved_side')
-    market_title = request.session.get('market_title', 'Unknown Market')
-    
-    if not raw_trades:
+    trade_set = session_trade_set(request)
+    if trade_set is None:
         return JsonResponse({'error': 'No trades data found'}, status=400)
     
+    resolved_side = session_resolved_side(request, trade_set)
+    market_title = trade_set.market_title or 'Unknown Market'
+    
     if not resolved_side:
         return JsonResponse({'error': 'Resolved side not set'}, status=400)
     
-    # Сортировка по timestamp
-    raw_trades.sort(key=lambda x: x.get("timestamp", 0))
+    # Сделки из БД сразу в массив, отсортированы по timestamp
+    trades = trade_set_array(trade_set)
     
-    # Парсинг сделок
-    parsed = parse_trades(raw_trades)
-    
-    if not parsed:
+    if not len(trades):
         return JsonResponse({'error': 'No valid trades found'}, status=400)
     
     # Вычисление метрик
-    metrics = calculate_metrics(parsed, resolved_side)
+    metrics = calculate_metrics(trades, resolved_side)
     
-    # Сохранение метрик в сессию
-    request.session['metrics'] = metrics
-    request.session['parsed_trades'] = parsed
+    # График: из кэша или в фоне в пуле процессов (ключ - хэш сделок, стороны и версии рендера)
+    key = chart_key(trades, resolved_side, market_title)
+    submit_chart(key, trades, metrics, market_title, resolved_side)
+    request.session['chart_key'] = key
     
-    # Генерация графика
-    chart_path = generate_chart(parsed, metrics, market_title, resolved_side)
-    request.session['chart_path'] = chart_path
+    # Кривые сохраняются в БД, страница получает только сводку
+    analysis = save_analysis(trade_set, trades, metrics, resolved_side)
     
-    # Генерация текстового отчета
-    report_content = generate_text_report(market_title, resolved_side, parsed, metrics)
-    request.session['report_content'] = report_content
+    # FIFO-леджер: применяются только сделки, добавленные с прошлого раза
+    ledger, ledger_record = update_ledger(trade_set)
     
     return render(request, 'proxy_wallet/partials/analysis_complete.html', {
-        'metrics': metrics,
+        'metrics': analysis.summary,
         'market_title': market_title,
         'resolved_side': resolved_side,
-        'trades_json': json.dumps(parsed)
+        'chart_key': key,
+        'ledger': ledger.summary(resolved_side),
+        'ledger_series': sampled_series(ledger_series(bytes(ledger_record.series))),
     })
 
 
+@require_http_methods(["GET"])
+def analysis_feed(request):
+    """Сделки для интерактивного графика: бакеты по времени или отдельные сделки
+
+    ?start=&end= (unix секунды) - диапазон при зуме, без них весь рынок.
+    """
+    trade_set = session_trade_set(request)
+    analysis = getattr(trade_set, 'analysis', None) if trade_set is not None else None
+    if analysis is None:
+        return JsonResponse({'error': 'Analysis not found'}, status=404)
+    
+    try:
+        start = float(request.GET['start']) if request.GET.get('start') else None
+        end = float(request.GET['end']) if request.GET.get('end') else None
+    except ValueError:
+        return JsonResponse({'error': 'start/end must be unix timestamps'}, status=400)
+    
+    columns = unpack_columns(bytes(analysis.data), analysis.trade_count)
+    return JsonResponse(trade_feed(columns, start, end))
+
+
 @require_http_methods(["GET"])
 def view_chart(request):
-    """Отображение графика"""
-    chart_path = request.session.get('chart_path')
+    """Отображение графика
+
+    ?v=<ключ> адресует конкретный график и кэшируется браузером навсегда,
+    без него отдаётся график текущей сессии с ревалидацией по ETag.
+    """
+    versioned = 'v' in request.GET
+    key = request.GET.get('v') if versioned else request.session.get('chart_key')
     
-    if not chart_path:
+    if not key:
         return HttpResponse('Chart not found', status=404)
     
-    try:
-        return FileResponse(open(chart_path, 'rb'), content_type='image/png')
-    except FileNotFoundError:
-        return HttpResponse('Chart file not found', status=404)
+    chart_path = get_chart_cache().get(key)
+    if chart_path is None:
+        status = chart_status(key)
+        if status == 'missing':
+            # Этот процесс о ключе не знает (рестарт, другой воркер, вытеснение из кэша):
+            # если это график сессии, ставим его в очередь заново
+            status = resubmit_chart(request, key)
+        if status == 'ready':
+            chart_path = get_chart_cache().get(key)
+    if chart_path is None:
+        if status == 'pending':
+            # Ещё рендерится: <img> повторит запрос
+            response = HttpResponse('Rendering', status=202, content_type='text/plain')
+            response['Retry-After'] = '1'
+            response['Cache-Control'] = 'no-store'
+            return response
+        return HttpResponse('Chart failed to render' if status == 'failed' else 'Chart file not found', status=404)
+    
+    etag = f'"{key}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        try:
+            response = FileResponse(open(chart_path, 'rb'), content_type='image/png')
+        except FileNotFoundError:
+            return HttpResponse('Chart file not found', status=404)
+    
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=31536000, immutable' if versioned else 'private, no-cache'
+    return response
+
+
+def resubmit_chart(request, key):
+    """Повторный рендер графика текущей сессии по его ключу; 'missing', если ключ не её"""
+    trade_set = session_trade_set(request)
+    resolved_side = session_resolved_side(request, trade_set) if trade_set is not None else ''
+    if not resolved_side:
+        return 'missing'
+    
+    trades = trade_set_array(trade_set)
+    if not len(trades):
+        return 'missing'
+    market_title = trade_set.market_title or 'Unknown Market'
+    if chart_key(trades, resolved_side, market_title) != key:
+        return 'missing'
+    
+    metrics = calculate_metrics(trades, resolved_side)
+    return submit_chart(key, trades, metrics, market_title, resolved_side)
 
 
 @require_http_methods(["GET"])
 def download_report(request):
-    """Скачивание текстового отчета"""
-    report_content = request.session.get('report_content')
+    """Скачивание отчета потоком: ?format=txt (по умолчанию), csv или xlsx"""
+    trade_set = session_trade_set(request)
+    resolved_side = session_resolved_side(request, trade_set) if trade_set is not None else ''
     
-    if not report_content:
+    if not resolved_side:
         return HttpResponse('Report not found', status=404)
     
-    response = HttpResponse(report_content, content_type='text/plain')
-    response['Content-Disposition'] = 'attachment; filename="polymarket_report.txt"'
+    report_format = request.GET.get('format', 'txt').lower()
+    if report_format not in REPORT_FORMATS:
+        return HttpResponse('Unknown report format', status=400)
+    
+    # Отчёт собирается заново из сохранённых сделок, строки генерируются по ходу отдачи
+    trades = trade_set_array(trade_set)
+    metrics = calculate_metrics(trades, resolved_side)
+    market_title = trade_set.market_title or 'Unknown Market'
+    filename = f'polymarket_report.{report_format}'
+    
+    if report_format == 'xlsx':
+        # write-only книга пишется во временный файл, отдаётся с диска
+        report_file = tempfile.TemporaryFile()
+        write_xlsx_report(report_file, market_title, resolved_side, trades, metrics)
+        report_file.seek(0)
+        return FileResponse(
+            report_file, as_attachment=True, filename=filename, content_type=REPORT_FORMATS['xlsx'],
+        )
+    
+    if report_format == 'csv':
+        chunks = iter_csv_report(trades, metrics)
+    else:
+        chunks = iter_text_report(market_title, resolved_side, trades, metrics)
+    
+    response = StreamingHttpResponse(
+        (chunk.encode('utf-8') for chunk in chunks), content_type=REPORT_FORMATS[report_format],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
     return response
 
 
@@ -323,52 +579,99 @@ def parse_trades(raw_data):
     return parsed
 
 
+def trades_array(parsed):
+    """Разобранные сделки -> структурированный массив TRADE_DTYPE (один проход)"""
+    if isinstance(parsed, np.ndarray):
+        return parsed
+    return np.fromiter(
+        ((e["timestamp"], e["type"] == "Buy", e["side"] == "Up", e["price"], e["shares"], e["cost"])
+         for e in parsed),
+        dtype=TRADE_DTYPE, count=len(parsed),
+    )
+
+
+def trade_set_array(trade_set):
+    """Сделки набора из БД сразу в TRADE_DTYPE, без промежуточных словарей (как parse_trades)"""
+    rows = trade_set.trades.order_by('timestamp', 'id').values_list(
+        'timestamp', 'side', 'outcome', 'price', 'size',
+    ).iterator(chunk_size=5000)
+    return np.fromiter(
+        ((ts, side.upper() == "BUY", outcome.strip().upper() not in {"NO", "DOWN"}, price * 100.0, size, price * size)
+         for ts, side, outcome, price, size in rows),
+        dtype=TRADE_DTYPE,
+    )
+
+
+def trade_dicts(trades):
+    """Массив TRADE_DTYPE -> словари как у parse_trades (для отрисовки по сделкам)"""
+    return [
+        {
+            "type": "Buy" if buy else "Sell",
+            "side": "Up" if up else "Down",
+            "price": price,
+            "shares": shares,
+            "cost": cost,
+            "timestamp": timestamp,
+        }
+        for timestamp, buy, up, price, shares, cost in trades.tolist()
+    ]
+
+
+def last_price(prices, mask):
+    """Последняя ненулевая цена среди сделок по маске"""
+    idx = np.flatnonzero(mask & (prices != 0))
+    return float(prices[idx[-1]]) if len(idx) else 0.0
+
+
 def calculate_metrics(parsed, resolved_side):
-    """Вычисление всех метрик"""
-    prices = [e["price"] for e in parsed]
-    
-    # Exposure curves
-    yes_curve = []
-    no_curve = []
-    net_curve = []
-    yes_sh_curve = []
-    no_sh_curve = []
-    net_sh_curve = []
-    
-    yes_exp = no_exp = 0
-    yes_sh_exp = no_sh_exp = 0
-    
-    for e in parsed:
-        # Dollar exposure
-        if e["side"] == "Up":
-            yes_exp += e["cost"] if e["type"] == "Buy" else -e["cost"]
-        else:
-            no_exp += e["cost"] if e["type"] == "Buy" else -e["cost"]
-        
-        # Shares exposure
-        if e["side"] == "Up":
-            yes_sh_exp += e["shares"] if e["type"] == "Buy" else -e["shares"]
-        else:
-            no_sh_exp += e["shares"] if e["type"] == "Buy" else -e["shares"]
-        
-        yes_curve.append(yes_exp)
-        no_curve.append(no_exp)
-        net_curve.append(yes_exp + no_exp)
-        yes_sh_curve.append(yes_sh_exp)
-        no_sh_curve.append(no_sh_exp)
-        net_sh_curve.append(yes_sh_exp + no_sh_exp)
-    
-    # Final PNL
-    remaining_yes = yes_sh_curve[-1] if yes_sh_curve else 0
-    remaining_no = no_sh_curve[-1] if no_sh_curve else 0
-    # Buy stats for cost basis
-    yes_buys_cost = sum(e["cost"] for e in parsed if e["side"] == "Up" and e["type"] == "Buy")
-    yes_buys_sh = sum(e["shares"] for e in parsed if e["side"] == "Up" and e["type"] == "Buy")
-    no_buys_cost = sum(e["cost"] for e in parsed if e["side"] == "Down" and e["type"] == "Buy")
-    no_buys_sh = sum(e["shares"] for e in parsed if e["side"] == "Down" and e["type"] == "Buy")
-    
-    avg_price_yes = (yes_buys_cost / yes_buys_sh) if yes_buys_sh > 0 else 0
-    avg_price_no = (no_buys_cost / no_buys_sh) if no_buys_sh > 0 else 0
+    """Вычисление всех метрик
+
+    Все кривые и суммы считаются векторно по структурированному массиву
+    сделок; кривые возвращаются массивами float64.
+    """
+    trades = trades_array(parsed)
+    n = len(trades)
+    is_yes = trades["is_yes"]
+    is_buy = trades["is_buy"]
+    prices = trades["price"]
+    shares = trades["shares"]
+    cost = trades["cost"]
+    
+    # Exposure curves: покупка +, продажа -
+    sign = np.where(is_buy, 1.0, -1.0)
+    signed_cost = cost * sign
+    signed_shares = shares * sign
+    yes_curve = np.cumsum(np.where(is_yes, signed_cost, 0.0))
+    no_curve = np.cumsum(np.where(is_yes, 0.0, signed_cost))
+    net_curve = yes_curve + no_curve
+    yes_sh_curve = np.cumsum(np.where(is_yes, signed_shares, 0.0))
+    no_sh_curve = np.cumsum(np.where(is_yes, 0.0, signed_shares))
+    net_sh_curve = yes_sh_curve + no_sh_curve
+    
+    yes_exp = yes_curve[-1] if n else 0.0
+    no_exp = no_curve[-1] if n else 0.0
+    remaining_yes = yes_sh_curve[-1] if n else 0.0
+    remaining_no = no_sh_curve[-1] if n else 0.0
+    
+    # Cumulative buys (они же cost basis)
+    yes_buy = is_yes & is_buy
+    no_buy = ~is_yes & is_buy
+    cum_yes = np.cumsum(np.where(yes_buy, shares, 0.0))
+    cum_no = np.cumsum(np.where(no_buy, shares, 0.0))
+    cum_yes_cost = np.cumsum(np.where(yes_buy, cost, 0.0))
+    cum_no_cost = np.cumsum(np.where(no_buy, cost, 0.0))
+    
+    yes_buy_sh = cum_yes[-1] if n else 0.0
+    no_buy_sh = cum_no[-1] if n else 0.0
+    yes_buy_cost = cum_yes_cost[-1] if n else 0.0
+    no_buy_cost = cum_no_cost[-1] if n else 0.0
+    yes_sell_sh = shares[is_yes & ~is_buy].sum()
+    yes_sell_cost = cost[is_yes & ~is_buy].sum()
+    no_sell_sh = shares[~is_yes & ~is_buy].sum()
+    no_sell_cost = cost[~is_yes & ~is_buy].sum()
+    
+    avg_price_yes = (yes_buy_cost / yes_buy_sh) if yes_buy_sh > 0 else 0
+    avg_price_no = (no_buy_cost / no_buy_sh) if no_buy_sh > 0 else 0
     
     # YES Outcome PnL (Cost of remaining shares + Lost capital from opposite side)
     final_value_yes = remaining_yes * 1.0
@@ -384,19 +687,11 @@ def calculate_metrics(parsed, resolved_side):
     pnl_no_pct = (pnl_no / cost_basis_no * 100) if cost_basis_no > 0 else 0
     
     # Use global total_spent for the main dashboard total metric
-    total_spent = net_curve[-1] if net_curve else 0
-    
-    # Current (Mark-to-Market) PnL
-    # Find latest price for YES (Up) and NO (Down)
-    last_up_price = 0
-    last_down_price = 0
-    for e in reversed(parsed):
-        if not last_up_price and e["side"] == "Up":
-            last_up_price = e["price"]
-        if not last_down_price and e["side"] == "Down":
-            last_down_price = e["price"]
-        if last_up_price and last_down_price:
-            break
+    total_spent = net_curve[-1] if n else 0
+    
+    # Current (Mark-to-Market) PnL по последним ценам YES (Up) и NO (Down)
+    last_up_price = last_price(prices, is_yes)
+    last_down_price = last_price(prices, ~is_yes)
             
     # If one side is missing, infer it (YES price + NO price = 100 cents)
     if last_up_price and not last_down_price:
@@ -418,60 +713,8 @@ def calculate_metrics(parsed, resolved_side):
         current_pnl_pct = pnl_no_pct
         current_value = final_value_no
     
-    # Buy/Sell totals
-    yes_buy_sh = yes_buy_cost = 0
-    yes_sell_sh = yes_sell_cost = 0
-    no_buy_sh = no_buy_cost = 0
-    no_sell_sh = no_sell_cost = 0
-    
-    raw_vol_yes = []
-    raw_vol_no = []
-    raw_cost_yes = []
-    raw_cost_no = []
-    
-    for e in parsed:
-        is_yes = (e["side"] == "Up")
-        is_buy = (e["type"] == "Buy")
-        
-        if is_buy:
-            if is_yes:
-                yes_buy_sh += e["shares"]
-                yes_buy_cost += e["cost"]
-                raw_vol_yes.append(e["shares"])
-                raw_vol_no.append(0)
-                raw_cost_yes.append(e["cost"])
-                raw_cost_no.append(0)
-            else:
-                no_buy_sh += e["shares"]
-                no_buy_cost += e["cost"]
-                raw_vol_yes.append(0)
-                raw_vol_no.append(e["shares"])
-                raw_cost_yes.append(0)
-                raw_cost_no.append(e["cost"])
-        else:
-            raw_vol_yes.append(0)
-            raw_vol_no.append(0)
-            raw_cost_yes.append(0)
-            raw_cost_no.append(0)
-            if is_yes:
-                yes_sell_sh += e["shares"]
-                yes_sell_cost += e["cost"]
-            else:
-                no_sell_sh += e["shares"]
-                no_sell_cost += e["cost"]
-    
-    cum_yes = np.cumsum(raw_vol_yes)
-    cum_no = np.cumsum(raw_vol_no)
-    cum_yes_cost = np.cumsum(raw_cost_yes)
-    cum_no_cost = np.cumsum(raw_cost_no)
-    
-    cum_yes_total = float(cum_yes[-1]) if len(cum_yes) > 0 else 0
-    cum_no_total = float(cum_no[-1]) if len(cum_no) > 0 else 0
-    cum_yes_cost_total = float(cum_yes_cost[-1]) if len(cum_yes_cost) > 0 else 0
-    cum_no_cost_total = float(cum_no_cost[-1]) if len(cum_no_cost) > 0 else 0
-    
     # Peaks
-    if len(yes_curve) > 0:
+    if n:
         yes_peak_idx = int(np.argmax(yes_curve))
         no_peak_idx = int(np.argmax(no_curve))
         yes_sh_peak_idx = int(np.argmax(yes_sh_curve))
@@ -488,7 +731,7 @@ def calculate_metrics(parsed, resolved_side):
         yes_sh_peak_val = no_sh_peak_val = 0
     
     return {
-        'trade_count': len(parsed),
+        'trade_count': n,
         'remaining_yes': float(remaining_yes),
         'remaining_no': float(remaining_no),
         'final_value_yes': float(final_value_yes),
@@ -509,10 +752,10 @@ def calculate_metrics(parsed, resolved_side):
         'no_buy_cost': float(no_buy_cost),
         'no_sell_sh': float(no_sell_sh),
         'no_sell_cost': float(no_sell_cost),
-        'cum_yes_total': float(cum_yes_total),
-        'cum_no_total': float(cum_no_total),
-        'cum_yes_cost_total': float(cum_yes_cost_total),
-        'cum_no_cost_total': float(cum_no_cost_total),
+        'cum_yes_total': float(yes_buy_sh),
+        'cum_no_total': float(no_buy_sh),
+        'cum_yes_cost_total': float(yes_buy_cost),
+        'cum_no_cost_total': float(no_buy_cost),
         'yes_peak_idx': yes_peak_idx,
         'no_peak_idx': no_peak_idx,
         'yes_sh_peak_idx': yes_sh_peak_idx,
@@ -521,40 +764,22 @@ def calculate_metrics(parsed, resolved_side):
         'no_peak_val': float(no_peak_val),
         'yes_sh_peak_val': float(yes_sh_peak_val),
         'no_sh_peak_val': float(no_sh_peak_val),
-        'yes_curve': [float(x) for x in yes_curve],
-        'no_curve': [float(x) for x in no_curve],
-        'net_curve': [float(x) for x in net_curve],
-        'yes_sh_curve': [float(x) for x in yes_sh_curve],
-        'no_sh_curve': [float(x) for x in no_sh_curve],
-        'net_sh_curve': [float(x) for x in net_sh_curve],
-        'prices': [float(x) for x in prices],
-        'cum_yes': cum_yes.tolist(),
-        'cum_no': cum_no.tolist(),
-        'cum_yes_cost': cum_yes_cost.tolist(),
-        'cum_no_cost': cum_no_cost.tolist(),
+        'yes_curve': yes_curve,
+        'no_curve': no_curve,
+        'net_curve': net_curve,
+        'yes_sh_curve': yes_sh_curve,
+        'no_sh_curve': no_sh_curve,
+        'net_sh_curve': net_sh_curve,
+        'prices': prices,
+        'cum_yes': cum_yes,
+        'cum_no': cum_no,
+        'cum_yes_cost': cum_yes_cost,
+        'cum_no_cost': cum_no_cost,
     }
 
 
-def generate_chart(parsed, metrics, market_title, resolved_side):
-    """Генерация графика"""
-    unique_timestamps = sorted(list(set(t['timestamp'] for t in parsed)))
-    ts_map = {ts: i for i, ts in enumerate(unique_timestamps)}
-    x_indices = [ts_map[e['timestamp']] for e in parsed]
-    
-    fig, (ax1, ax2, ax3, ax4) = plt.subplots(
-        4, 1, figsize=(16, 14.5),
-        gridspec_kw={'height_ratios': [3, 1.3, 1.1, 1.1]}
-    )
-    fig.subplots_adjust(hspace=0.45, bottom=0.2)
-    
-    # График 1: Scatter plot сделок
-    grouped_trades = {}
-    for i, e in enumerate(parsed):
-        x_idx = ts_map[e['timestamp']]
-        if x_idx not in grouped_trades:
-            grouped_trades[x_idx] = []
-        grouped_trades[x_idx].append(e)
-    
+def draw_trades_detailed(ax, grouped_trades):
+    """Сделки по одной: маркер, свеча и подпись на каждую группу timestamp"""
     next_up = True
     
     for x_idx in sorted(grouped_trades.keys()):
@@ -569,7 +794,7 @@ def generate_chart(parsed, metrics, market_title, resolved_side):
             else:
                 color, marker, label = ("gray", "o", "Unknown")
             
-            ax1.scatter(x_idx, e["price"], color=color, marker=marker,
+            ax.scatter(x_idx, e["price"], color=color, marker=marker,
                         s=60, linewidths=2.5 if marker=="x" else 1.0,
                         alpha=0.9, zorder=5)
             
@@ -578,11 +803,11 @@ def generate_chart(parsed, metrics, market_title, resolved_side):
             candle_len = 15 * 0.7
             end_y = e["price"] + direction * candle_len
             
-            ax1.vlines(x_idx, e["price"], end_y, colors=color, linewidth=1.5, alpha=0.6)
+            ax.vlines(x_idx, e["price"], end_y, colors=color, linewidth=1.5, alpha=0.6)
             
             label_text = f"{e['shares']:.2f}sh\n${e['cost']:.2f}"
             
-            ax1.annotate(
+            ax.annotate(
                 label_text,
                 xy=(x_idx, end_y),
                 xytext=(0, direction * 2),
@@ -602,8 +827,8 @@ def generate_chart(parsed, metrics, market_title, resolved_side):
             else:
                 color = "#1f77b4"
             
-            ax1.scatter(x_idx, avg_price, color="white", marker="o", s=300, edgecolors=color, linewidth=2, zorder=5)
-            ax1.text(x_idx, avg_price, str(count), ha="center", va="center", fontsize=9, fontweight="bold", color=color, zorder=6)
+            ax.scatter(x_idx, avg_price, color="white", marker="o", s=300, edgecolors=color, linewidth=2, zorder=5)
+            ax.text(x_idx, avg_price, str(count), ha="center", va="center", fontsize=9, fontweight="bold", color=color, zorder=6)
             
             direction = 1 if next_up else -1
             next_up = not next_up
@@ -622,9 +847,9 @@ def generate_chart(parsed, metrics, market_title, resolved_side):
             candle_len = raw_len * 0.7
             end_y = avg_price + direction * candle_len
             
-            ax1.vlines(x_idx, avg_price, end_y, colors=color, linewidth=2, alpha=0.6, linestyles="dotted")
+            ax.vlines(x_idx, avg_price, end_y, colors=color, linewidth=2, alpha=0.6, linestyles="dotted")
             
-            ax1.annotate(
+            ax.annotate(
                 box_text,
                 xy=(x_idx, end_y),
                 xytext=(0, direction * 2),
@@ -633,6 +858,126 @@ def generate_chart(parsed, metrics, market_title, resolved_side):
                 fontsize=6,
                 bbox=dict(boxstyle="round,pad=0.3", fc="white", alpha=0.85, ec=color)
             )
+
+
+def draw_trades_aggregated(ax, parsed, x_indices, top_n=LOD_ANNOTATIONS):
+    """Сделки крупного кошелька: несколько коллекций вместо artist'а на группу
+
+    Маркеры рисуются одним scatter на стиль, свечи одной LineCollection,
+    подписи остаются только у top_n групп с наибольшим объёмом в $.
+    """
+    trades = trades_array(parsed)
+    x = np.asarray(x_indices)
+    if not len(x):
+        return
+    codes = trades["is_buy"].astype(np.int8) + 2 * trades["is_yes"].astype(np.int8)
+    
+    # Группы по timestamp: [starts[g], ends[g]) в порядке order
+    order = np.argsort(x, kind="stable")
+    xs = x[order]
+    starts = np.flatnonzero(np.r_[True, xs[1:] != xs[:-1]])
+    ends = np.r_[starts[1:], len(xs)]
+    group_x = xs[starts]
+    counts = ends - starts
+    avg_price = np.add.reduceat(trades["price"][order], starts) / counts
+    group_cost = np.add.reduceat(trades["cost"][order], starts)
+    group_codes = codes[order]
+    same_side = np.minimum.reduceat(group_codes, starts) == np.maximum.reduceat(group_codes, starts)
+    first_code = group_codes[starts]
+    
+    direction = np.where(np.arange(len(starts)) % 2 == 0, 1.0, -1.0)
+    single = counts == 1
+    
+    # Длина свечи как в детальном режиме: строки подписи (до 5 + "...")
+    info_lines = np.minimum(counts, 5) + (counts > 5)
+    candle_len = np.where(single, 15 * 0.7, (25 + info_lines * 5) * 0.7)
+    end_y = avg_price + direction * candle_len
+    
+    group_colors = np.empty(len(starts), dtype=object)
+    group_colors[:] = "#1f77b4"
+    for code, (color, marker, _) in STYLE_BY_CODE.items():
+        mask = first_code == code
+        group_colors[mask & (same_side | single)] = color
+        points = mask & single
+        if points.any():
+            ax.scatter(group_x[points], avg_price[points], color=color, marker=marker,
+                       s=60, linewidths=2.5 if marker == "x" else 1.0, alpha=0.9, zorder=5)
+    
+    multi = ~single
+    if multi.any():
+        ax.scatter(group_x[multi], avg_price[multi], color="white", marker="o", s=300,
+                   edgecolors=list(group_colors[multi]), linewidth=2, zorder=5)
+    
+    for mask, linewidth, linestyle in ((single, 1.5, "solid"), (multi, 2, "dotted")):
+        if mask.any():
+            segments = np.stack([
+                np.column_stack([group_x[mask], avg_price[mask]]),
+                np.column_stack([group_x[mask], end_y[mask]]),
+            ], axis=1)
+            ax.add_collection(LineCollection(
+                segments, colors=list(group_colors[mask]), linewidths=linewidth,
+                linestyles=linestyle, alpha=0.6,
+            ))
+    
+    # Подписи только у крупнейших групп
+    for g in np.argsort(group_cost)[::-1][:top_n]:
+        color = group_colors[g]
+        va = "bottom" if direction[g] > 0 else "top"
+        members = [parsed[i] for i in order[starts[g]:ends[g]]]
+        if single[g]:
+            e = members[0]
+            text = f"{e['shares']:.2f}sh\n${e['cost']:.2f}"
+            fontsize, bbox = 7, dict(boxstyle="round,pad=0.2", fc="white", alpha=0.7, ec="none")
+        else:
+            lines = [f"{t['shares']:.2f}sh ${t['cost']:.2f} ({t['side']})" for t in members[:5]]
+            if len(members) > 5:
+                lines.append(f"...+ {len(members) - 5} more")
+            text = "\n".join(lines)
+            fontsize, bbox = 6, dict(boxstyle="round,pad=0.3", fc="white", alpha=0.85, ec=color)
+            ax.text(group_x[g], avg_price[g], str(counts[g]), ha="center", va="center",
+                    fontsize=9, fontweight="bold", color=color, zorder=6)
+        ax.annotate(
+            text, xy=(group_x[g], end_y[g]), xytext=(0, direction[g] * 2),
+            textcoords="offset points", ha="center", va=va, fontsize=fontsize, bbox=bbox,
+        )
+
+
+def generate_chart(parsed, metrics, market_title, resolved_side, path, lod=None):
+    """Генерация графика в PNG по пути path
+
+    lod=None выбирает режим сам: выше LOD_THRESHOLD сделок сделки рисуются
+    агрегированно (draw_trades_aggregated). parsed - словари parse_trades
+    или массив TRADE_DTYPE, словари из него собираются уже в воркере.
+    """
+    if isinstance(parsed, np.ndarray):
+        parsed = trade_dicts(parsed)
+    if lod is None:
+        lod = len(parsed) > LOD_THRESHOLD
+    
+    unique_timestamps = sorted(list(set(t['timestamp'] for t in parsed)))
+    ts_map = {ts: i for i, ts in enumerate(unique_timestamps)}
+    x_indices = [ts_map[e['timestamp']] for e in parsed]
+    
+    # OO API без глобального состояния pyplot (рендер идёт в пуле процессов)
+    fig = Figure(figsize=(16, 14.5))
+    ax1, ax2, ax3, ax4 = fig.subplots(
+        4, 1,
+        gridspec_kw={'height_ratios': [3, 1.3, 1.1, 1.1]}
+    )
+    fig.subplots_adjust(hspace=0.45, bottom=0.2)
+    
+    # График 1: Scatter plot сделок
+    grouped_trades = {}
+    for i, e in enumerate(parsed):
+        x_idx = ts_map[e['timestamp']]
+        if x_idx not in grouped_trades:
+            grouped_trades[x_idx] = []
+        grouped_trades[x_idx].append(e)
+    
+    if lod:
+        draw_trades_aggregated(ax1, parsed, x_indices)
+    else:
+        draw_trades_detailed(ax1, grouped_trades)
     
     ax1.set_title(f"Trades for {market_title}")
     ax1.set_ylabel("Price (cents)")
@@ -664,19 +1009,24 @@ def generate_chart(parsed, metrics, market_title, resolved_side):
     x_range = np.arange(len(unique_timestamps))
     vol_ax = ax1.inset_axes([0, 0.0, 1.0, 0.2], sharex=ax1)
     vol_ax.patch.set_alpha(0)
-    vol_ax.bar(x_range - 0.35/2, vol_yes_per_ts, width=0.35,
-               color="green", alpha=0.18, label="Buy YES volume")
-    vol_ax.bar(x_range + 0.35/2, vol_no_per_ts, width=0.35,
-               color="red", alpha=0.18, label="Buy NO volume")
+    if lod:
+        # Тысячи баров уже пикселя: одна LineCollection на сторону
+        vol_ax.vlines(x_range - 0.35/2, 0, vol_yes_per_ts, colors="green", alpha=0.18, label="Buy YES volume")
+        vol_ax.vlines(x_range + 0.35/2, 0, vol_no_per_ts, colors="red", alpha=0.18, label="Buy NO volume")
+    else:
+        vol_ax.bar(x_range - 0.35/2, vol_yes_per_ts, width=0.35,
+                   color="green", alpha=0.18, label="Buy YES volume")
+        vol_ax.bar(x_range + 0.35/2, vol_no_per_ts, width=0.35,
+                   color="red", alpha=0.18, label="Buy NO volume")
     vol_ax.set_yticks([])
     vol_ax.set_xticks([])
     vol_ax.set_xlim(-0.5, len(unique_timestamps) - 0.5)
     
     # График 2: Cumulative Buys
-    cum_yes = np.array(metrics['cum_yes'])
-    cum_no = np.array(metrics['cum_no'])
-    cum_yes_cost = np.array(metrics['cum_yes_cost'])
-    cum_no_cost = np.array(metrics['cum_no_cost'])
+    cum_yes = metrics['cum_yes']
+    cum_no = metrics['cum_no']
+    cum_yes_cost = metrics['cum_yes_cost']
+    cum_no_cost = metrics['cum_no_cost']
     
     ax2.plot(x_indices, cum_yes, color="green", alpha=0.3, linewidth=1, label="Cum Buy YES (sh)")
     ax2.fill_between(x_indices, cum_yes, color="green", alpha=0.1)
@@ -791,7 +1141,9 @@ def generate_chart(parsed, metrics, market_title, resolved_side):
     ax4.set_ylabel("Shares")
     ax4.xaxis.set_major_locator(ticker.MaxNLocator(nbins=12))
     ax4.xaxis.set_major_formatter(ticker.FuncFormatter(time_formatter))
-    plt.setp(ax4.get_xticklabels(), rotation=30, ha='right')
+    for label in ax4.get_xticklabels():
+        label.set_rotation(30)
+        label.set_ha('right')
     ax4.legend(loc="upper left")
     
     # Sync X limits
@@ -799,97 +1151,9 @@ def generate_chart(parsed, metrics, market_title, resolved_side):
     for axis in (ax1, ax2, ax3, ax4):
         axis.set_xlim(*xlim_range)
     
-    plt.tight_layout()
+    fig.tight_layout()
     
     # Сохранение
-    import tempfile
-    import os
-    fd, path = tempfile.mkstemp(suffix='.png', prefix='chart_')
-    os.close(fd)
-    plt.savefig(path, dpi=200, bbox_inches="tight")
-    plt.close('all')
+    fig.savefig(path, dpi=200, bbox_inches="tight")
     
     return path
-
-
-def generate_text_report(market_title, resolved_side, parsed, metrics):
-    """Генерация текстового отчета"""
-    start_time = "N/A"
-    end_time = "N/A"
-    if parsed:
-        start_time = datetime.datetime.fromtimestamp(parsed[0]['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
-        end_time = datetime.datetime.fromtimestamp(parsed[-1]['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
-    
-    min_price = min(metrics['prices']) if metrics['prices'] else 0
-    max_price = max(metrics['prices']) if metrics['prices'] else 0
-    
-    yes_curve = metrics['yes_curve']
-    no_curve = metrics['no_curve']
-    net_curve = metrics['net_curve']
-    yes_sh_curve = metrics['yes_sh_curve']
-    no_sh_curve = metrics['no_sh_curve']
-    net_sh_curve = metrics['net_sh_curve']
-    
-    final_yes_exp = yes_curve[-1] if yes_curve else 0
-    final_yes_sh = yes_sh_curve[-1] if yes_sh_curve else 0
-    final_no_exp = no_curve[-1] if no_curve else 0
-    final_no_sh = no_sh_curve[-1] if no_sh_curve else 0
-    final_net_exp = net_curve[-1] if net_curve else 0
-    final_net_sh = net_sh_curve[-1] if net_sh_curve else 0
-    
-    lines = [
-        f"MARKET: {market_title}",
-        f"RESOLUTION: {resolved_side}",
-        f"TRADES: {metrics['trade_count']}",
-        f"TIME RANGE: {start_time} to {end_time}",
-        f"PRICE RANGE: {min_price:.2f} - {max_price:.2f}",
-        f"CURRENT PNL (MtM): $ {metrics['current_pnl']:.2f} ({metrics['current_pnl_pct']:.2f}%)",
-        f"CURRENT VALUE:     $ {metrics['current_value']:.2f}",
-        "",
-        "--- Position at resolution ---",
-        f"Remaining YES shares: {metrics['remaining_yes']:.2f}",
-        f"Remaining NO shares:  {metrics['remaining_no']:.2f}",
-        f"Total spent (net exposure): $ {metrics['total_spent']:.2f}",
-        "",
-        f"IF RESOLVED YES:",
-        f"  Final value: $ {metrics['final_value_yes']:.2f}",
-        f"  PnL:         $ {metrics['pnl_yes']:.2f} ({metrics['pnl_yes_pct']:.2f}%)",
-        "",
-        f"IF RESOLVED NO:",
-        f"  Final value: $ {metrics['final_value_no']:.2f}",
-        f"  PnL:         $ {metrics['pnl_no']:.2f} ({metrics['pnl_no_pct']:.2f}%)",
-        "",
-        "--- Buy/Sell totals ---",
-        f"YES buys:  {metrics['yes_buy_sh']:.2f} sh / $ {metrics['yes_buy_cost']:.2f}",
-        f"YES sells: {metrics['yes_sell_sh']:.2f} sh / $ {metrics['yes_sell_cost']:.2f}",
-        f"NO buys:   {metrics['no_buy_sh']:.2f} sh / $ {metrics['no_buy_cost']:.2f}",
-        f"NO sells:  {metrics['no_sell_sh']:.2f} sh / $ {metrics['no_sell_cost']:.2f}",
-        "",
-        "--- Cumulative buys ---",
-        f"YES cumulative: {metrics['cum_yes_total']:.2f} sh / $ {metrics['cum_yes_cost_total']:.2f}",
-        f"NO cumulative:  {metrics['cum_no_total']:.2f} sh / $ {metrics['cum_no_cost_total']:.2f}",
-        "",
-        "--- Exposure peaks (trade index: earliest → latest) ---",
-        f"YES dollar peak: $ {metrics['yes_peak_val']:.2f} at trade #{metrics['yes_peak_idx'] + 1}",
-        f"NO dollar peak:  $ {metrics['no_peak_val']:.2f} at trade #{metrics['no_peak_idx'] + 1}",
-        f"YES share peak:  {metrics['yes_sh_peak_val']:.2f} sh at trade #{metrics['yes_sh_peak_idx'] + 1}",
-        f"NO share peak:   {metrics['no_sh_peak_val']:.2f} sh at trade #{metrics['no_sh_peak_idx'] + 1}",
-        "",
-        "--- Final exposure ---",
-        f"YES exposure: $ {final_yes_exp:.2f} | {final_yes_sh:.2f} sh",
-        f"NO exposure:  $ {final_no_exp:.2f} | {final_no_sh:.2f} sh",
-        f"NET exposure: $ {final_net_exp:.2f} | {final_net_sh:.2f} sh",
-        "",
-        "--- Trades (Sorted by Timestamp) ---",
-        "Idx | Time                | Type | Side | Price(c) |   Shares   |    Cost($)",
-        "----+---------------------+------+-----+----------+------------+------------"
-    ]
-    
-    for i, t in enumerate(parsed):
-        dt_str = datetime.datetime.fromtimestamp(t['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
-        lines.append(
-            f"{i+1:3d} | {dt_str} | {t['type']:<4} | {t['side']:<4} | "
-            f"{t['price']:8.2f} | {t['shares']:10.2f} | $ {t['cost']:9.2f}"
-        )
-    
-    return "\n".join(lines)
\ No newline at end of file